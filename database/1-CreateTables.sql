@@ -56,10 +56,12 @@ CREATE TABLE conjugations (
     third_person_singular       varchar,
     first_person_plural         varchar,
     second_person_formal        varchar,
-    third_person_plural         varchar
+    third_person_plural         varchar,
+
+    unique(verb_id, tense)
 );
 
---  These are actually slowdowns at small scale.  Try bringing it back later:
+--  These are actually slowdowns at small scale.  The lookup indexes are now added by migration 2 instead:
 --  CREATE INDEX IF NOT EXISTS conjugation_index ON conjugations (infinitive);
 --  CREATE INDEX IF NOT EXISTS conjugation_index ON conjugations (infinitive, tense);
 
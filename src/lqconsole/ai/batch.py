@@ -0,0 +1,188 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from os import environ, makedirs, path
+from typing import Callable
+
+import json
+import logging
+import shutil
+import uuid
+
+import openai
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_KEY      = "lqconsole_job"
+
+def batch_request(custom_id: str, prompt: str, model: str="gpt-4o", role: str="user") -> dict:
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": { "model": model, "messages": [{ "role": role, "content": prompt }] }
+    }
+
+def batch_response_content(result: dict) -> str | None:
+    #   Pulls the completion text out of one line of a batch output file.
+    response = result.get("response") or {}
+
+    if result.get("error") is not None or response.get("status_code", 200) != 200:
+        return None
+
+    choices = (response.get("body") or {}).get("choices") or []
+
+    return choices[0]["message"]["content"] if choices else None
+
+@dataclass
+class BatchStatus:
+
+    state:     str          # One of validating, in_progress, finalizing, completed, failed, expired, cancelled.
+    completed: int = 0
+    failed:    int = 0
+    total:     int = 0
+
+    @property
+    def is_finished(self) -> bool:
+        return self.state in ("completed", "failed", "expired", "cancelled")
+
+class BatchBackend(ABC):
+
+    #   Batches are submitted under a key of the caller's, so that one whose id was never recorded can be found again
+    #   rather than paid for twice.
+    @abstractmethod
+    async def submit(self, input_filename: str, key: str) -> str:
+        pass
+
+    @abstractmethod
+    async def find(self, key: str) -> str | None:
+        pass
+
+    @abstractmethod
+    async def status(self, batch_id: str) -> BatchStatus:
+        pass
+
+    @abstractmethod
+    async def download(self, batch_id: str, output_filename: str):
+        pass
+
+class OpenAIBatchBackend(BatchBackend):
+
+    def __init__(self, api_key: str=None, completion_window: str="24h"):
+        self.client = openai.AsyncOpenAI(api_key=environ.get("OPENAI_API_KEY") if api_key is None else api_key)
+        self.completion_window = completion_window
+
+    async def submit(self, input_filename: str, key: str) -> str:
+        with open(input_filename, "rb") as input_file:
+            uploaded = await self.client.files.create(file=input_file, purpose="batch")
+
+        batch = await self.client.batches.create(
+            input_file_id     = uploaded.id,
+            endpoint          = BATCH_ENDPOINT,
+            completion_window = self.completion_window,
+            metadata          = { BATCH_KEY: key })
+
+        return batch.id
+
+    async def find(self, key: str) -> str | None:
+        #   Newest first, so a batch submitted moments before a crash is among the first looked at.
+        async for batch in self.client.batches.list(limit=100):
+            if (batch.metadata or {}).get(BATCH_KEY) == key:
+                return batch.id
+
+        return None
+
+    async def status(self, batch_id: str) -> BatchStatus:
+        batch  = await self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+
+        return BatchStatus(
+            state     = batch.status,
+            completed = counts.completed if counts else 0,
+            failed    = counts.failed if counts else 0,
+            total     = counts.total if counts else 0)
+
+    async def download(self, batch_id: str, output_filename: str):
+        batch = await self.client.batches.retrieve(batch_id)
+
+        with open(output_filename, "wb") as output_file:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id is not None:
+                    content = await self.client.files.content(file_id)
+                    output_file.write(content.read())
+
+def canned_sentence_responder(body: dict) -> str: # pylint: disable=unused-argument
+    return json.dumps({
+        "sentence": "Je le sais.",
+        "translation": "I know it.",
+        "is_correct": "True",
+        "negation": "none",
+        "direct_object": "masculine",
+        "indirect_pronoun": "none"
+    })
+
+class LocalBatchBackend(BatchBackend):
+
+    #   A file based stand-in for the batch API, so that the bulk pipeline can be run end to end offline.  Batches are
+    #   'processed' by the responder on the first status check after submission.
+    def __init__(self, directory: str, responder: Callable[[dict], str]=canned_sentence_responder):
+        self.directory = directory
+        self.responder = responder
+
+    def __filename(self, batch_id: str, kind: str) -> str:
+        return path.join(self.directory, f"{batch_id}.{kind}.jsonl")
+
+    async def submit(self, input_filename: str, key: str) -> str:
+        makedirs(self.directory, exist_ok=True)
+
+        batch_id: str = f"batch_{uuid.uuid4().hex}"
+        shutil.copyfile(input_filename, self.__filename(batch_id, "input"))
+
+        with open(path.join(self.directory, f"{key}.key"), "w", encoding="utf-8") as key_file:
+            key_file.write(batch_id)
+
+        logging.info("Submitted local batch %s", batch_id)
+
+        return batch_id
+
+    async def find(self, key: str) -> str | None:
+        key_filename = path.join(self.directory, f"{key}.key")
+
+        if not path.exists(key_filename):
+            return None
+
+        with open(key_filename, encoding="utf-8") as key_file:
+            return key_file.read().strip()
+
+    async def status(self, batch_id: str) -> BatchStatus:
+        input_filename  = self.__filename(batch_id, "input")
+        output_filename = self.__filename(batch_id, "output")
+
+        if not path.exists(input_filename):
+            return BatchStatus(state="failed")
+
+        if not path.exists(output_filename):
+            with open(input_filename, encoding="utf-8") as input_file, open(output_filename + ".tmp", "w", encoding="utf-8") as output_file:
+                for line in input_file:
+                    if not line.strip():
+                        continue
+
+                    request = json.loads(line)
+                    result  = {
+                        "id": f"request_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": { "choices": [{ "index": 0, "message": { "role": "assistant", "content": self.responder(request["body"]) } }] }
+                        },
+                        "error": None
+                    }
+                    output_file.write(json.dumps(result) + "\n")
+
+            shutil.move(output_filename + ".tmp", output_filename)
+
+        with open(output_filename, encoding="utf-8") as output_file:
+            total = sum(1 for line in output_file if line.strip())
+
+        return BatchStatus(state="completed", completed=total, total=total)
+
+    async def download(self, batch_id: str, output_filename: str):
+        shutil.copyfile(self.__filename(batch_id, "output"), output_filename)
@@ -0,0 +1,215 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from os import environ, makedirs, path
+
+import hashlib
+import logging
+import sqlite3
+import time
+
+def cache_key(model: str, role: str, prompt: str, endpoint: str=None) -> str:
+    #   Responses from any endpoint other than OpenAI's own, such as the fake server, are kept apart from OpenAI's.
+    return hashlib.sha256("\x1f".join([model, role, prompt] + ([endpoint] if endpoint else [])).encode("utf-8")).hexdigest()
+
+@dataclass
+class CacheStats:
+
+    hits:   int = 0
+    misses: int = 0
+    writes: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.requests if self.requests > 0 else 0.0
+
+    def __str__(self):
+        return f"{self.hits} hits, {self.misses} misses, {self.writes} writes ({self.hit_rate:.0%} hit rate)"
+
+class ResponseCache(ABC):
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    @abstractmethod
+    def _get(self, key: str) -> str | None:
+        pass
+
+    @abstractmethod
+    def _set(self, key: str, value: str):
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    def get(self, key: str) -> str | None:
+        value = self._get(key)
+
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+
+        return value
+
+    def set(self, key: str, value: str):
+        self.stats.writes += 1
+        self._set(key, value)
+
+class MemoryCache(ResponseCache):
+
+    def __init__(self, max_entries: int=1024, ttl: float | None=None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        self.entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def _get(self, key: str) -> str | None:
+        entry = self.entries.get(key)
+
+        if entry is None:
+            return None
+
+        created, value = entry
+
+        if self.ttl is not None and time.time() - created > self.ttl:
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: str):
+        self.entries[key] = (time.time(), value)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+class SqliteCache(ResponseCache):
+
+    #   Lookups are sub-millisecond local reads, so these are run inline on the event loop rather than in a thread.
+    def __init__(self, filename: str, max_entries: int=100_000, ttl: float | None=None):
+        super().__init__()
+        self.filename    = filename
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        self.connection: sqlite3.Connection = None
+
+    def __connect(self) -> sqlite3.Connection:
+        #   Connect lazily, as clients are constructed as default arguments at import time.
+        if self.connection is None:
+            directory = path.dirname(self.filename)
+
+            if directory:
+                makedirs(directory, exist_ok=True)
+
+            self.connection = sqlite3.connect(self.filename)
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                        key      TEXT PRIMARY KEY,
+                                        value    TEXT NOT NULL,
+                                        created  REAL NOT NULL,
+                                        accessed REAL NOT NULL)""")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self.connection.commit()
+
+        return self.connection
+
+    def _get(self, key: str) -> str | None:
+        connection = self.__connect()
+        row = connection.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            return None
+
+        value, created = row
+        now = time.time()
+
+        if self.ttl is not None and now - created > self.ttl:
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            connection.commit()
+            return None
+
+        connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        connection.commit()
+
+        return value
+
+    def _set(self, key: str, value: str):
+        connection = self.__connect()
+        now = time.time()
+
+        connection.execute("INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)", (key, value, now, now))
+        connection.execute("""DELETE FROM responses WHERE key IN (
+                                SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)""", (self.max_entries,))
+        connection.commit()
+
+    def delete(self, key: str):
+        connection = self.__connect()
+        connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+        connection.commit()
+
+    def clear(self):
+        connection = self.__connect()
+        connection.execute("DELETE FROM responses")
+        connection.commit()
+
+class TieredCache(ResponseCache):
+
+    def __init__(self, *tiers: ResponseCache):
+        super().__init__()
+        self.tiers = tiers
+
+    def _get(self, key: str) -> str | None:
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+
+            if value is not None:
+                #   Promote into the faster tiers that missed.
+                for faster_tier in self.tiers[:i]:
+                    faster_tier.set(key, value)
+                return value
+
+        return None
+
+    def _set(self, key: str, value: str):
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def delete(self, key: str):
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+def default_response_cache() -> ResponseCache | None:
+
+    #   Answers from the fake LLM are never kept, or they would be served to real runs later.
+    if any(environ.get(name, "false").lower() in ("1", "true", "yes") for name in ("RESPONSE_CACHE_DISABLED", "FAKE_LLM")):
+        return None
+
+    ttl      = float(environ["RESPONSE_CACHE_TTL"]) if "RESPONSE_CACHE_TTL" in environ else None
+    filename = environ.get("RESPONSE_CACHE_PATH", path.join(path.expanduser("~"), ".cache", "lqconsole", "responses.sqlite"))
+
+    logging.debug("Using response cache at %s", filename)
+
+    return TieredCache(
+        MemoryCache(max_entries=int(environ.get("RESPONSE_CACHE_MEMORY_SIZE", 1024)), ttl=ttl),
+        SqliteCache(filename, max_entries=int(environ.get("RESPONSE_CACHE_DISK_SIZE", 100_000)), ttl=ttl))
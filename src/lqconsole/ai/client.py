@@ -1,41 +1,133 @@
 from os import environ
 
-import traceback
+import asyncio
 import logging
-import backoff
+import random
+import traceback
 import openai
 
-logging.getLogger("backoff").setLevel(logging.WARNING)
+from lqconsole.ai.cache import ResponseCache, cache_key, default_response_cache
+from lqconsole.ai.ratelimit import AdaptiveRateLimiter, estimate_tokens, shared_rate_limiter
+
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("openai").setLevel(logging.WARNING)
 
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+def is_transient(ex: Exception) -> bool:
+    #   What the SDK would retry itself, other than 429s, which are the limiter's.
+    if isinstance(ex, openai.APIConnectionError):        # Timeouts included.
+        return True
+    return isinstance(ex, openai.APIStatusError) and (ex.status_code in (408, 409) or ex.status_code >= 500)
+
 class AsyncChatGPTClient:
 
-    def __init__(self, model: str="gpt-4o", role: str="user", api_key: str=None):
+    def __init__(self, model: str="gpt-4o", role: str="user", api_key: str=None, cache: ResponseCache=None,
+                 limiter: AdaptiveRateLimiter=None, max_retries: int=5, base_url: str=None, http_client=None,
+                 retry_backoff: float=1.0):
         self.api_key = environ.get("OPENAI_API_KEY") if api_key is None else api_key
-        self.client = openai.AsyncOpenAI(api_key=api_key)
+
+        #   FAKE_LLM answers every request from the templates in ai/fake.py, in process.  To use the fake server instead,
+        #   point OPENAI_BASE_URL (or base_url) at 'lqconsole fake-llm serve'.
+        if http_client is None and environ.get("FAKE_LLM", "false").lower() in ("1", "true", "yes"):
+            from lqconsole.ai.fake_transport import fake_http_client # pylint: disable=import-outside-toplevel
+
+            http_client = fake_http_client()
+            base_url    = base_url or str(http_client.base_url)
+            api_key     = api_key or self.api_key or "fake"
+
+        #   Retries are done here rather than by the SDK, so that every 429 is seen by the limiter and slows everyone down.
+        self.client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+        self.endpoint = None if str(self.client.base_url).rstrip("/") == OPENAI_BASE_URL else str(self.client.base_url)
         self.model = model
         self.role = role
+        self.cache = default_response_cache() if cache is None else cache
+        self.limiter = shared_rate_limiter() if limiter is None else limiter
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
 
-    @backoff.on_exception(backoff.expo, openai.RateLimitError)
     async def completions_with_backoff(self, **kwargs):
-        return await self.client.chat.completions.create(**kwargs) # pylint: disable=broad-exception-caught disable=missing-kwoa
 
-    async def generate_response(self, prompt: str):
+        estimated_tokens: int = sum(estimate_tokens(message["content"], completion_tokens=0) for message in kwargs["messages"]) \
+            + kwargs.get("max_tokens", 512)
+
+        for attempt in range(self.max_retries + 1):
+            async with self.limiter.request(estimated_tokens) as permit:
+                try:
+                    raw_response = await self.client.chat.completions.with_raw_response.create(**kwargs) # pylint: disable=missing-kwoa
+                except openai.RateLimitError as ex:
+                    permit.throttled(ex.response.headers if ex.response is not None else None)
+
+                    if attempt == self.max_retries:
+                        raise ex
+
+                    continue
+                except openai.APIError as ex:
+                    if not is_transient(ex) or attempt == self.max_retries:
+                        raise ex
+
+                    logging.warning("Retrying a completion after %s", type(ex).__name__)
+                else:
+                    completion = raw_response.parse()
+                    permit.completed(raw_response.headers, completion.usage.total_tokens if completion.usage else None)
+
+                    return completion
+
+            #   Only transient failures get here.  They are waited out without holding a place in the limiter.
+            await asyncio.sleep(min(self.retry_backoff * 2 ** attempt, 30.0) * random.uniform(0.5, 1.0))
+
+    #   The cache is only ever a shortcut.  When it fails, such as a SQLite file locked by another process, the request
+    #   goes to the API, and a completion already paid for is returned even if it cannot be kept.
+    def __cached(self, key: str) -> str | None:
+        try:
+            return self.cache.get(key)
+        except Exception: # pylint: disable=broad-exception-caught
+            logging.warning("Response cache read failed; asking the API instead.", exc_info=True)
+            return None
+
+    def __store(self, key: str, response: str):
+        try:
+            self.cache.set(key, response)
+        except Exception: # pylint: disable=broad-exception-caught
+            logging.warning("Response cache write failed; the response was not kept.", exc_info=True)
+
+    async def generate_response(self, prompt: str, use_cache: bool=True):
         try:
             if hasattr(self, 'api_key') is False:
                 raise ValueError("Missing API key.")
 
+            #   Prompts with randomised content (ie. new sentences) should opt out, or they will always get the same answer.
+            key: str = cache_key(self.model, self.role, prompt, self.endpoint)
+
+            if use_cache and self.cache is not None:
+                cached_response = self.__cached(key)
+
+                if cached_response is not None:
+                    return cached_response
+
             completion = await self.completions_with_backoff(
                 model = self.model,
                 messages = [{ "role": self.role, "content": prompt }])
 
             if completion.choices and len(completion.choices) > 0:
-                return completion.choices[0].message.content
+                response: str = completion.choices[0].message.content
+
+                if use_cache and self.cache is not None and response is not None:
+                    self.__store(key, response)
+
+                return response
 
             raise openai.APIStatusError(message="No completion choices found.", response=None, body=None)
         except Exception as e: # pylint: disable=broad-exception-caught
             return f"str({e}): {traceback.format_exc()}"
 
-    async def handle_request(self, prompt: str):
-        return await self.generate_response(prompt)
+    def forget(self, prompt: str):
+        #   Drop a cached response that turned out to be unusable, so that the next request goes back to the API.
+        if self.cache is not None:
+            try:
+                self.cache.delete(cache_key(self.model, self.role, prompt, self.endpoint))
+            except Exception: # pylint: disable=broad-exception-caught
+                logging.warning("Response cache delete failed.", exc_info=True)
+
+    async def handle_request(self, prompt: str, use_cache: bool=True):
+        return await self.generate_response(prompt, use_cache=use_cache)
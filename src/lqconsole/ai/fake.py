@@ -0,0 +1,269 @@
+from dataclasses import asdict, dataclass
+from os import environ
+
+import json
+import math
+import random
+import re
+import time
+
+from lqconsole.ai.ratelimit import TokenBucket, estimate_tokens
+
+#   A stand-in for the chat completions API, so that throughput, latency and rate limiting can be measured and
+#   tested without a key or a network.  Responses are built from templates and depend only on the prompt and the
+#   seed: verbs are conjugated as regular verbs, and sentences are built from those conjugations, so that they pass
+#   the local validator.  Latency, 429s and malformed output are injected from a seeded sequence.
+
+PRONOUNS     = ["je", "tu", "il/elle/on", "nous", "vous", "ils/elles"]
+SUBJECTS     = { "first person": 0, "second person": 1, "third person": 2, "first person plural": 3, "second person plural": 4,
+                 "third person plural": 5 }
+SUBJECT_WORDS = ["je", "tu", "il", "nous", "vous", "ils"]
+TRANSLATIONS = ["I", "you", "he", "we", "you", "they"]
+
+NEGATIONS    = { "pas": "pas", "jamais": "jamais", "rien": "rien", "personne": "personne", "plus": "plus", "aucun": "aucun",
+                 "aucune": "aucune", "encore": "pas encore" }
+
+ENDINGS = {
+    "er": { "present": ["e", "es", "e", "ons", "ez", "ent"], "participle": "é" },
+    "ir": { "present": ["is", "is", "it", "issons", "issez", "issent"], "participle": "i" },
+    "re": { "present": ["s", "s", "", "ons", "ez", "ent"], "participle": "u" },
+}
+
+IMPARFAIT_ENDINGS = ["ais", "ais", "ait", "ions", "iez", "aient"]
+FUTURE_ENDINGS    = ["ai", "as", "a", "ons", "ez", "ont"]
+
+#   The auxiliaries themselves, which every other verb depends on.
+IRREGULARS = {
+    "avoir": { "present": ["ai", "as", "a", "avons", "avez", "ont"], "imparfait": ["avais", "avais", "avait", "avions", "aviez", "avaient"],
+               "future_simple": ["aurai", "auras", "aura", "aurons", "aurez", "auront"], "participle": "eu" },
+    "être":  { "present": ["suis", "es", "est", "sommes", "êtes", "sont"], "imparfait": ["étais", "étais", "était", "étions", "étiez", "étaient"],
+               "future_simple": ["serai", "seras", "sera", "serons", "serez", "seront"], "participle": "été" },
+}
+
+ETRE_VERBS = { "aller", "venir", "arriver", "partir", "entrer", "sortir", "monter", "descendre", "naître", "mourir", "rester",
+               "tomber", "retourner", "devenir", "revenir" }
+
+def auxiliary_of(infinitive: str) -> str:
+    return "être" if infinitive in ETRE_VERBS or infinitive.startswith(("se ", "s'")) else "avoir"
+
+def conjugate(infinitive: str) -> dict[str, list[str] | str]:
+
+    #   Every verb is treated as regular for its group, apart from the auxiliaries.
+    verb = infinitive.removeprefix("se ").removeprefix("s'")
+
+    if verb in IRREGULARS:
+        tenses = dict(IRREGULARS[verb])
+    else:
+        group   = verb[-2:] if verb[-2:] in ENDINGS else "er"
+        stem    = verb[:-2]
+        present = [stem + ending for ending in ENDINGS[group]["present"]]
+        future  = verb[:-1] if group == "re" else verb
+
+        tenses = {
+            "present":       present,
+            "imparfait":     [present[3].removesuffix("ons") + ending for ending in IMPARFAIT_ENDINGS],
+            "future_simple": [future + ending for ending in FUTURE_ENDINGS],
+            "participle":    stem + ENDINGS[group]["participle"],
+        }
+
+    auxiliary = IRREGULARS[auxiliary_of(infinitive)]["present"]
+    tenses["passe_compose"] = [f"{form} {tenses['participle']}" for form in auxiliary]
+
+    return tenses
+
+def verb_response(infinitive: str) -> dict:
+    tenses = conjugate(infinitive)
+
+    return {
+        "auxiliary": auxiliary_of(infinitive),
+        "infinitive": infinitive,
+        "tenses": [
+            *[{ "tense": tense, "conjugations": [{ "pronoun": pronoun, "verb": form, "translation": f"{TRANSLATIONS[i]} {infinitive}" }
+                                                for i, (pronoun, form) in enumerate(zip(PRONOUNS, tenses[tense]))] }
+              for tense in ["present", "passe_compose", "imparfait", "future_simple"]],
+            { "tense": "participle", "conjugations": [{ "pronoun": "-", "verb": tenses["participle"], "translation": infinitive }] },
+        ]
+    }
+
+VERB_PROPERTIES = re.compile(r"the verb infinitive (.+?) in the (.+?) tense, and may start with a (.+?) subject pronoun")
+
+def sentence_response(requirements: str, rng: random.Random) -> dict:
+
+    #   One sentence from the requirements the prompt gives for it.
+    properties = VERB_PROPERTIES.search(requirements)
+    infinitive, tense, subject = properties.groups() if properties else ("parler", "present", "first person")
+
+    person   = SUBJECTS.get(subject, 0)
+    forms    = conjugate(infinitive).get(tense.replace(" ", "_"))
+    forms    = forms if isinstance(forms, list) else conjugate(infinitive)["present"]
+    negation = re.search(r"must contain the negation (\w+)", requirements)
+    negation = negation.group(1) if negation and negation.group(1) in NEGATIONS else "none"
+    correct  = "must contain an error" not in requirements
+
+    #   An incorrect sentence gets the form of another person.
+    verb = forms[person] if correct else forms[(person + 1 + rng.randrange(5)) % 6]
+
+    words = verb.split(" ")
+    if negation != "none":
+        words = ["n'" + words[0] if words[0][0] in "aeiouéêh" else "ne " + words[0], NEGATIONS[negation], *words[1:]]
+
+    predicate = " ".join(words)
+    subject   = SUBJECT_WORDS[person]
+    content   = f"J'{predicate}." if subject == "je" and predicate[0] in "aeiouéêh" else f"{subject.capitalize()} {predicate}."
+
+    return {
+        "sentence": content,
+        "translation": f"{TRANSLATIONS[person].capitalize()} ({infinitive}, {tense})." if correct else "The verb is conjugated for the wrong person.",
+        "is_correct": str(correct),
+        "negation": negation,
+        "direct_object": "none",
+        "indirect_pronoun": "none",
+    }
+
+def respond(prompt: str, seed: int=0) -> str:
+
+    #   Recognises each of the prompts in verbs/prompts.py and sentences/prompts.py by its wording.
+    rng = random.Random(f"{seed}:{prompt}")
+
+    if (verb := re.search(r"of the French verb (.+?),", prompt)) is not None:
+        return json.dumps(verb_response(verb.group(1).strip()), ensure_ascii=False)
+
+    if prompt.startswith("Generate the numbered French sentences"):
+        blocks = re.split(r"^Sentence \d+:$", prompt, flags=re.MULTILINE)[1:]
+        return json.dumps([{ "index": i, **sentence_response(block, rng) } for i, block in enumerate(blocks)], ensure_ascii=False)
+
+    if prompt.startswith("For each of the numbered sentences"):
+        return json.dumps([True] * len(re.findall(r"^\d+: ", prompt, flags=re.MULTILINE)))
+
+    if prompt.startswith("Is the sentence"):
+        return "True"
+
+    if (correction := re.search(r"errors in the sentence '(.*)' in terms of", prompt)) is not None:
+        return json.dumps({ "corrected_sentence": correction.group(1), "corrected_translation": "Corrected." }, ensure_ascii=False)
+
+    if "All six fields must be present" in prompt:
+        return json.dumps(sentence_response(prompt, rng), ensure_ascii=False)
+
+    return "OK"
+
+@dataclass
+class FakeLLMSettings:
+    # pylint: disable=too-many-instance-attributes
+
+    latency:             str   = "fixed"     # fixed, uniform, or lognormal.
+    latency_ms:          float = 0.0         # The fixed latency, or the median of the others.
+    latency_spread:      float = 0.5         # Uniform: plus or minus this fraction of the median.  Lognormal: sigma.
+    rate_limit_rate:     float = 0.0         # Fraction of requests refused with a 429, on top of the limits below.
+    malformed_rate:      float = 0.0         # Fraction of completions cut off halfway through.
+    requests_per_minute: int   = 10_000
+    tokens_per_minute:   int   = 2_000_000
+    retry_after:         float = 1.0
+    seed:                int   = 0
+
+    @classmethod
+    def from_environment(cls) -> "FakeLLMSettings":
+        return cls(
+            latency             = environ.get("FAKE_LLM_LATENCY", cls.latency),
+            latency_ms          = float(environ.get("FAKE_LLM_LATENCY_MS", cls.latency_ms)),
+            latency_spread      = float(environ.get("FAKE_LLM_LATENCY_SPREAD", cls.latency_spread)),
+            rate_limit_rate     = float(environ.get("FAKE_LLM_RATE_LIMIT_RATE", cls.rate_limit_rate)),
+            malformed_rate      = float(environ.get("FAKE_LLM_MALFORMED_RATE", cls.malformed_rate)),
+            requests_per_minute = int(environ.get("FAKE_LLM_REQUESTS_PER_MINUTE", cls.requests_per_minute)),
+            tokens_per_minute   = int(environ.get("FAKE_LLM_TOKENS_PER_MINUTE", cls.tokens_per_minute)),
+            retry_after         = float(environ.get("FAKE_LLM_RETRY_AFTER", cls.retry_after)),
+            seed                = int(environ.get("FAKE_LLM_SEED", cls.seed)))
+
+@dataclass
+class FakeLLMStats:
+
+    requests:     int = 0
+    completions:  int = 0
+    rate_limited: int = 0
+    malformed:    int = 0
+
+class FakeLLM:
+
+    def __init__(self, settings: FakeLLMSettings=None, clock=time.monotonic):
+        self.settings = FakeLLMSettings() if settings is None else settings
+        self.random   = random.Random(self.settings.seed)
+        self.requests = TokenBucket(self.settings.requests_per_minute, clock)
+        self.tokens   = TokenBucket(self.settings.tokens_per_minute, clock)
+        self.stats    = FakeLLMStats()
+
+    def latency(self) -> float:
+        median = self.settings.latency_ms / 1000
+
+        match self.settings.latency:
+            case "uniform":
+                return max(0.0, self.random.uniform(median * (1 - self.settings.latency_spread), median * (1 + self.settings.latency_spread)))
+            case "lognormal":
+                return self.random.lognormvariate(math.log(median), self.settings.latency_spread) if median > 0 else 0.0
+            case _:
+                return median
+
+    def content(self, prompt: str) -> str:
+        content = respond(prompt, self.settings.seed)
+
+        if self.random.random() < self.settings.malformed_rate:
+            self.stats.malformed += 1
+            return content[:len(content) // 2]
+
+        return content
+
+    def headers(self) -> dict[str, str]:
+        return {
+            "x-ratelimit-limit-requests":     str(self.settings.requests_per_minute),
+            "x-ratelimit-remaining-requests": str(max(0, int(self.requests.tokens))),
+            "x-ratelimit-limit-tokens":       str(self.settings.tokens_per_minute),
+            "x-ratelimit-remaining-tokens":   str(max(0, int(self.tokens.tokens))),
+            "x-ratelimit-reset-requests":     f"{max(0.0, 1 - self.requests.tokens) / self.requests.rate:.3f}s",
+        }
+
+    def complete(self, body: dict) -> tuple[int, dict[str, str], dict]:
+
+        #   The status, headers and JSON body of one chat completion.
+        self.stats.requests += 1
+
+        prompt   = "\n".join(message.get("content") or "" for message in body.get("messages", []))
+        estimate = estimate_tokens(prompt, completion_tokens=body.get("max_tokens", 512))
+
+        refused  = self.requests.delay(1) > 0 or self.tokens.delay(estimate) > 0 or self.random.random() < self.settings.rate_limit_rate
+
+        if refused:
+            self.stats.rate_limited += 1
+            headers = { **self.headers(), "retry-after": f"{self.settings.retry_after:g}" }
+            return 429, headers, { "error": { "message": "Rate limit reached (fake).", "type": "requests", "code": "rate_limit_exceeded" } }
+
+        content = self.content(prompt)
+        usage   = { "prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4 }
+
+        self.requests.take(1)
+        self.tokens.take(usage["prompt_tokens"] + usage["completion_tokens"])
+        self.stats.completions += 1
+
+        return 200, self.headers(), {
+            "id": f"chatcmpl-fake-{self.stats.completions}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{ "index": 0, "message": { "role": "assistant", "content": content }, "finish_reason": "stop" }],
+            "usage": { **usage, "total_tokens": usage["prompt_tokens"] + usage["completion_tokens"] },
+        }
+
+    def batch_responder(self, body: dict) -> str:
+        #   For LocalBatchBackend, whose batches are not rate limited.
+        return self.content("\n".join(message.get("content") or "" for message in body.get("messages", [])))
+
+    def report(self) -> dict:
+        return { **asdict(self.stats), "settings": asdict(self.settings) }
+
+shared_fake: FakeLLM = None
+
+def shared_fake_llm() -> FakeLLM:
+    #   One fake per process, so that every client shares its limits, as they would share an account.
+    global shared_fake # pylint: disable=global-statement
+
+    if shared_fake is None:
+        shared_fake = FakeLLM(FakeLLMSettings.from_environment())
+
+    return shared_fake
@@ -0,0 +1,49 @@
+from asyncio import sleep
+
+import json
+
+import httpx
+
+from lqconsole.ai.fake import FakeLLM, shared_fake_llm
+
+#   Serves the fake to an httpx client in this process, or over HTTP from 'lqconsole fake-llm serve'.
+
+class FakeLLMTransport(httpx.AsyncBaseTransport):
+
+    #   Answers an httpx client in process, ie. AsyncChatGPTClient(http_client=httpx.AsyncClient(transport=...)).
+    def __init__(self, fake: FakeLLM=None):
+        self.fake = FakeLLM() if fake is None else fake
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+            return httpx.Response(404, json={ "error": { "message": f"No fake for {request.method} {request.url.path}" } })
+
+        body = json.loads(await request.aread())
+
+        await sleep(self.fake.latency())
+
+        status, headers, content = self.fake.complete(body)
+        return httpx.Response(status, headers=headers, json=content)
+
+def fake_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=FakeLLMTransport(shared_fake_llm()), base_url="http://fake-llm/v1")
+
+def create_fake_llm_app(fake: FakeLLM):
+    # pylint: disable=import-outside-toplevel
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        await sleep(fake.latency())
+
+        status, headers, content = fake.complete(await request.json())
+        return JSONResponse(content, status_code=status, headers=headers)
+
+    @app.get("/stats")
+    async def stats():
+        return fake.report()
+
+    return app
@@ -0,0 +1,277 @@
+from asyncio import Condition, sleep
+from contextlib import asynccontextmanager
+from os import environ
+from typing import AsyncGenerator, Mapping
+
+import fcntl
+import logging
+import os
+import re
+import time
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS   = { "ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0 }
+
+def parse_duration(value: str | None) -> float | None:
+    #   OpenAI resets look like '1s', '6m0s', or '20ms'.  Retry-after is plain seconds.
+    if value is None:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    matches = DURATION_PATTERN.findall(value)
+
+    if not matches:
+        return None
+
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in matches)
+
+def parse_int(value: str | None) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+def estimate_tokens(prompt: str, completion_tokens: int=512) -> int:
+    #   Roughly four characters per token, plus a budget for the response.
+    return len(prompt) // 4 + completion_tokens
+
+class TokenBucket:
+
+    def __init__(self, per_minute: float, clock=time.monotonic):
+        self.clock    = clock
+        self.capacity = per_minute
+        self.rate     = per_minute / 60.0
+        self.tokens   = per_minute
+        self.updated  = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        self.refill()
+        #   Requests larger than the whole bucket are let through once it is full, rather than never.
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float):
+        self.refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def observe(self, limit: int | None, remaining: int | None):
+        #   The server's view always wins over our local estimate.
+        self.refill()
+
+        if limit is not None and limit > 0 and limit != self.capacity:
+            self.capacity = float(limit)
+            self.rate     = limit / 60.0
+
+        if remaining is not None:
+            self.tokens = min(self.tokens, float(remaining))
+
+class SharedPause:
+
+    #   A pause that several processes sharing one account observe together: when any of them is told to back off, the
+    #   others back off as well instead of each finding out with a 429 of its own.  The file holds the wall clock time
+    #   the pause ends, and is locked around every read and write.  Reads are cached for a short interval, since every
+    #   request checks the pause and the file only changes on a 429.
+    def __init__(self, filename: str, clock=time.time, refresh_interval: float=0.25):
+        self.filename         = filename
+        self.clock            = clock
+        self.refresh_interval = refresh_interval
+
+        self.until:   float = 0.0
+        self.checked: float = float("-inf")
+
+    def __read(self, file) -> float:
+        file.seek(0)
+
+        try:
+            return float(file.read() or 0.0)
+        except ValueError:
+            return 0.0
+
+    def __load(self) -> float:
+        if not os.path.exists(self.filename):
+            return 0.0
+
+        with open(self.filename, "r", encoding="utf-8") as file:
+            fcntl.flock(file, fcntl.LOCK_SH)
+            return self.__read(file)
+
+    def pause(self, seconds: float):
+        with open(self.filename, "a+", encoding="utf-8") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+
+            until = max(self.__read(file), self.clock() + seconds)
+
+            file.seek(0)
+            file.truncate()
+            file.write(repr(until))
+
+        self.until, self.checked = until, self.clock()
+
+    def remaining(self) -> float:
+        now = self.clock()
+
+        if now - self.checked >= self.refresh_interval:
+            self.until, self.checked = self.__load(), now
+
+        return max(0.0, self.until - now)
+
+class Permit:
+
+    def __init__(self, limiter: "AdaptiveRateLimiter", estimated_tokens: int):
+        self.limiter          = limiter
+        self.estimated_tokens = estimated_tokens
+        self.outcome: str     = None
+
+    def completed(self, headers: Mapping[str, str]=None, used_tokens: int=None):
+        self.outcome = "completed"
+        self.limiter.observe(headers or {})
+
+        if used_tokens is not None and used_tokens < self.estimated_tokens:
+            self.limiter.tokens.refund(self.estimated_tokens - used_tokens)
+
+    def throttled(self, headers: Mapping[str, str]=None):
+        self.outcome = "throttled"
+        self.limiter.throttle(headers or {})
+
+class AdaptiveRateLimiter:
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self,
+                 requests_per_minute: int   = 500,
+                 tokens_per_minute:   int   = 30_000,
+                 initial_concurrency: int   = 4,
+                 max_concurrency:     int   = 64,
+                 share:               float = 1.0,
+                 shared_pause:        SharedPause = None,
+                 clock                      = time.monotonic):
+
+        #   A share below one is this limiter's part of a quota split between processes.  It scales the configured
+        #   rates and everything the server reports, since the server's limits are for the whole account.
+        self.clock        = clock
+        self.share        = share
+        self.shared_pause = shared_pause
+        self.requests     = TokenBucket(requests_per_minute * share, clock)
+        self.tokens       = TokenBucket(tokens_per_minute * share, clock)
+
+        self.concurrency:     float = float(initial_concurrency)
+        self.max_concurrency: int   = max_concurrency
+        self.in_flight:       int   = 0
+        self.paused_until:    float = 0.0
+
+        self.completed_requests: int = 0
+        self.throttled_requests: int = 0
+
+        self.condition: Condition = None
+
+    def __condition(self) -> Condition:
+        #   Created lazily so that the limiter can be built outside of a running event loop.
+        if self.condition is None:
+            self.condition = Condition()
+        return self.condition
+
+    def __scaled(self, value: str | None) -> int | None:
+        value = parse_int(value)
+        return int(value * self.share) if value is not None else None
+
+    def observe(self, headers: Mapping[str, str]):
+        self.completed_requests += 1
+
+        self.requests.observe(self.__scaled(headers.get("x-ratelimit-limit-requests")),
+                              self.__scaled(headers.get("x-ratelimit-remaining-requests")))
+        self.tokens.observe(self.__scaled(headers.get("x-ratelimit-limit-tokens")),
+                            self.__scaled(headers.get("x-ratelimit-remaining-tokens")))
+
+        #   Additive increase: roughly one extra slot for each window of successful requests.
+        self.concurrency = min(float(self.max_concurrency), self.concurrency + 1.0 / self.concurrency)
+
+    def throttle(self, headers: Mapping[str, str]):
+        self.throttled_requests += 1
+
+        retry_after = parse_duration(headers.get("retry-after")) \
+            or parse_duration(headers.get("x-ratelimit-reset-requests")) \
+            or 1.0
+
+        self.paused_until = max(self.paused_until, self.clock() + retry_after)
+
+        if self.shared_pause is not None:
+            self.shared_pause.pause(retry_after)
+
+        #   Multiplicative decrease.
+        self.concurrency = max(1.0, self.concurrency / 2.0)
+
+        logging.debug("Rate limited; pausing for %.2fs with a concurrency of %d.", retry_after, int(self.concurrency))
+
+    def delay(self, estimated_tokens: int) -> float:
+        shared = self.shared_pause.remaining() if self.shared_pause is not None else 0.0
+        return max(self.paused_until - self.clock(), shared, self.requests.delay(1), self.tokens.delay(estimated_tokens))
+
+    async def acquire(self, estimated_tokens: int):
+        condition = self.__condition()
+
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.concurrency))
+            self.in_flight += 1
+
+        try:
+            while (wait := self.delay(estimated_tokens)) > 0:
+                await sleep(wait)
+
+            self.requests.take(1)
+            self.tokens.take(estimated_tokens)
+        except BaseException:
+            await self.release()
+            raise
+
+    async def release(self):
+        condition = self.__condition()
+
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def request(self, estimated_tokens: int) -> AsyncGenerator[Permit, None]:
+        await self.acquire(estimated_tokens)
+        permit = Permit(self, estimated_tokens)
+
+        try:
+            yield permit
+        finally:
+            await self.release()
+
+    def __str__(self):
+        return f"{self.completed_requests} completed, {self.throttled_requests} throttled, concurrency {int(self.concurrency)}"
+
+shared_limiter: AdaptiveRateLimiter = None
+
+def shared_rate_limiter() -> AdaptiveRateLimiter:
+    #   Every client in the process shares the one account quota, so they share one limiter.  Processes splitting the
+    #   quota between them set OPENAI_RATE_SHARE, and OPENAI_SHARED_PAUSE_FILE to back off together.
+    global shared_limiter # pylint: disable=global-statement
+
+    if shared_limiter is None:
+        pause_file = environ.get("OPENAI_SHARED_PAUSE_FILE")
+        share      = float(environ.get("OPENAI_RATE_SHARE", 1.0))
+
+        shared_limiter = AdaptiveRateLimiter(
+            requests_per_minute = int(environ.get("OPENAI_REQUESTS_PER_MINUTE", 500)),
+            tokens_per_minute   = int(environ.get("OPENAI_TOKENS_PER_MINUTE", 30_000)),
+            initial_concurrency = max(1, int(int(environ.get("OPENAI_INITIAL_CONCURRENCY", 4)) * share)),
+            max_concurrency     = max(1, int(int(environ.get("OPENAI_MAX_CONCURRENCY", 64)) * share)),
+            share               = share,
+            shared_pause        = SharedPause(pause_file) if pause_file else None)
+
+    return shared_limiter
@@ -0,0 +1,88 @@
+# pylint: disable=import-outside-toplevel
+import logging
+import random
+import time
+
+from lqconsole.benchmarks.lookups import random_infinitive, verbs_for
+from lqconsole.benchmarks.results import BenchmarkResult
+from lqconsole.benchmarks.scratch import forget_cached_rows, grow_tables, scratch_bank, sync_sequences
+from lqconsole.benchmarks.stats import LatencySummary
+
+#   Random sampling and insert throughput as the bank grows, with the lookup indexes in place.  Inserted rows are
+#   deleted again after each size, so that every size is measured on the bank it names.
+
+def synthetic_sentences(count: int, verbs: int, rng: random.Random) -> list:
+    from lqconsole.sentences.models import DirectObject, IndirectPronoun, Negation, Pronoun, Sentence
+    from lqconsole.verbs.models import Tense
+
+    return [Sentence(infinitive=random_infinitive(rng, verbs), auxiliary="avoir", pronoun=rng.choice(list(Pronoun)),
+                     tense=rng.choice([Tense.present, Tense.passe_compose, Tense.imparfait, Tense.future_simple]),
+                     direct_object=DirectObject.none, indirect_pronoun=IndirectPronoun.none, negation=Negation.none,
+                     content=f"phrase {index}", translation=f"sentence {index}", is_correct=rng.random() < 0.25)
+            for index in range(count)]
+
+async def time_sampling(verbs: int, samples: int, rng: random.Random) -> tuple[LatencySummary, float]:
+    from lqconsole.sentences.database import sample_sentences
+
+    #   The first draw for each verb loads its ids, which a running server would have done long before.
+    for verb in range(1, min(verbs, 100) + 1):
+        await sample_sentences(1, infinitive=f"verbe{verb}", is_correct=True)
+
+    timings: list[float] = []
+    started = time.perf_counter()
+
+    for _ in range(samples):
+        infinitive = random_infinitive(rng, min(verbs, 100))
+        before     = time.perf_counter()
+        await sample_sentences(1, infinitive=infinitive, is_correct=True)
+        timings.append(time.perf_counter() - before)
+
+    elapsed = time.perf_counter() - started
+    return LatencySummary.of(timings), samples / elapsed if elapsed > 0 else 0.0
+
+async def time_inserts(rows: list, use_copy: bool, batch_size: int) -> float:
+    from lqconsole.sentences.writer import SentenceWriter
+
+    started = time.perf_counter()
+
+    async with SentenceWriter(batch_size=batch_size, use_copy=use_copy) as writer:
+        await writer.add_all(rows)
+
+    elapsed = time.perf_counter() - started
+    return len(rows) / elapsed if elapsed > 0 else 0.0
+
+async def benchmark_bank(sizes: list[int], samples: int=1000, inserts: int=5000, batch_size: int=500, seed: int=0) -> list[BenchmarkResult]:
+
+    rng: random.Random = random.Random(seed)
+    results: list[BenchmarkResult] = []
+
+    async with scratch_bank() as driver:
+        verbs, sentences = 0, 0
+
+        for size in sorted(sizes):
+            logging.info("Growing the benchmark bank to %d sentences.", size)
+
+            await grow_tables(driver, verbs, max(verbs, verbs_for(size)), sentences, size)
+            verbs, sentences = max(verbs, verbs_for(size)), size
+
+            #   Ids of the rows inserted and deleted at the last size would otherwise be sampled.
+            forget_cached_rows()
+
+            latency, rate = await time_sampling(verbs, samples, rng)
+
+            results.append(BenchmarkResult("bank", "sample", { "size": size },
+                { "samples_per_second": rate, **latency.metrics() }))
+
+            for use_copy in (False, True):
+                rows_per_second = await time_inserts(synthetic_sentences(inserts, verbs, rng), use_copy, batch_size)
+
+                results.append(BenchmarkResult("bank", "copy" if use_copy else "insert", { "size": size, "batch_size": batch_size },
+                    { "rows_per_second": rows_per_second }))
+
+                await driver.execute("DELETE FROM sentences WHERE id > $1", size)
+                await sync_sequences(driver)
+
+            for result in results[-3:]:
+                logging.info("%s", result)
+
+    return results
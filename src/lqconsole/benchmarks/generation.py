@@ -0,0 +1,49 @@
+# pylint: disable=import-outside-toplevel
+from dataclasses import asdict
+
+import logging
+import time
+
+from lqconsole.benchmarks.results import BenchmarkResult
+from lqconsole.benchmarks.scratch import BENCHMARK_VERBS, scratch_bank, seed_verbs
+from lqconsole.utils.queues import Progress
+
+#   Problem batches end to end against the fake LLM: prompts, parsing, validation and writes, with the model's
+#   latency and limits being whatever the fake is set to.  The batch runs in this process only, since spawned
+#   processes would not be routed to the scratch schema.
+
+async def benchmark_generation(quantity: int=200, workers: int=10, buffered_writes: bool=True) -> list[BenchmarkResult]:
+    from lqconsole.ai.fake import shared_fake_llm
+    from lqconsole.problems.batch import BatchOptions, batch_stats, run_problem_batch
+
+    results: list[BenchmarkResult] = []
+
+    async with scratch_bank() as driver:
+        await seed_verbs(BENCHMARK_VERBS)
+
+        for batched in (False, True):
+            options  = BatchOptions(workers=workers, batched=batched, buffered_writes=buffered_writes, display=False)
+            progress = Progress(total=quantity, stream=None, name="batched" if batched else "single")
+            before   = asdict(shared_fake_llm().stats)
+            stored   = await driver.fetchval("SELECT count(*) FROM sentences")
+
+            started = time.monotonic()
+            await run_problem_batch(quantity, options, progress)
+            elapsed = time.monotonic() - started
+
+            stats     = batch_stats(progress)
+            sentences = await driver.fetchval("SELECT count(*) FROM sentences") - stored
+            fake      = { name: value - before[name] for name, value in asdict(shared_fake_llm().stats).items() }
+
+            results.append(BenchmarkResult("generation", "problem batch",
+                { "quantity": quantity, "workers": workers, "batched": batched, "buffered_writes": buffered_writes },
+                { "problems_per_second":  stats.generated / elapsed if elapsed > 0 else 0.0,
+                  "sentences_per_second": sentences / elapsed if elapsed > 0 else 0.0,
+                  "failed":               stats.failed,
+                  "completions":          fake["completions"],
+                  "rate_limited":         fake["rate_limited"],
+                  "peak_connections":     stats.peak_connections }))
+
+            logging.info("%s", results[-1])
+
+    return results
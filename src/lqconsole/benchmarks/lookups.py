@@ -0,0 +1,110 @@
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+import logging
+import random
+import time
+
+from lqconsole.benchmarks.results import BenchmarkResult
+from lqconsole.benchmarks.scratch import grow_tables, lookup_indexes, scratch_bank
+from lqconsole.benchmarks.stats import LatencySummary
+
+#   Lookup latency against bank size, with and without the lookup indexes.
+
+@dataclass
+class LookupQuery:
+
+    name:      str
+    sql:       str
+    arguments: Callable[[random.Random, int, int], tuple]    # (rng, verbs, sentences) -> query arguments
+
+def random_infinitive(rng: random.Random, verbs: int) -> str:
+    return f"verbe{rng.randrange(verbs) + 1}"
+
+LOOKUP_QUERIES: list[LookupQuery] = [
+    LookupQuery("verb",
+        "SELECT id, infinitive, auxiliary FROM verbs WHERE infinitive = $1 ORDER BY id DESC LIMIT 1",
+        lambda rng, verbs, sentences: (random_infinitive(rng, verbs),)),
+    LookupQuery("conjugation",
+        "SELECT * FROM conjugations WHERE infinitive = $1 AND tense = $2 ORDER BY id DESC LIMIT 1",
+        lambda rng, verbs, sentences: (random_infinitive(rng, verbs), rng.choice(["present", "passe_compose", "imparfait", "future_simple"]))),
+    LookupQuery("sentence ids by verb",
+        "SELECT id FROM sentences WHERE infinitive = $1 AND is_correct = $2 AND id > 0 ORDER BY id",
+        lambda rng, verbs, sentences: (random_infinitive(rng, verbs), rng.random() < 0.25)),
+    LookupQuery("new sentence ids",
+        "SELECT id FROM sentences WHERE is_correct = $1 AND id > $2 ORDER BY id",
+        lambda rng, verbs, sentences: (rng.random() < 0.25, max(0, sentences - 100))),
+]
+
+@dataclass
+class LookupResult:
+
+    size:    int
+    verbs:   int
+    indexed: bool
+    query:   str
+    latency: LatencySummary
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def as_result(self) -> BenchmarkResult:
+        return BenchmarkResult("lookups", self.query, { "size": self.size, "indexed": self.indexed }, self.latency.metrics())
+
+    def __str__(self):
+        return f"{self.size:>10} sentences  {'indexed' if self.indexed else 'no index':<8}  {self.query:<22} {self.latency}"
+
+def verbs_for(size: int) -> int:
+    #   Roughly a hundred sentences per verb, as a well stocked bank would have.
+    return max(100, size // 100)
+
+async def time_queries(driver, verbs: int, sentences: int, repetitions: int, rng: random.Random) -> dict[str, LatencySummary]:
+
+    latencies: dict[str, LatencySummary] = {}
+
+    for query in LOOKUP_QUERIES:
+        #   A few untimed runs first, so that statement preparation and cold pages are not counted.
+        for _ in range(min(10, repetitions)):
+            await driver.fetch(query.sql, *query.arguments(rng, verbs, sentences))
+
+        samples: list[float] = []
+
+        for _ in range(repetitions):
+            arguments = query.arguments(rng, verbs, sentences)
+            started   = time.perf_counter()
+            await driver.fetch(query.sql, *arguments)
+            samples.append(time.perf_counter() - started)
+
+        latencies[query.name] = LatencySummary.of(samples)
+
+    return latencies
+
+async def benchmark_lookups(sizes: list[int], repetitions: int=200, seed: int=0) -> list[LookupResult]:
+
+    index_sql, index_names = lookup_indexes()
+
+    rng: random.Random = random.Random(seed)
+    results: list[LookupResult] = []
+
+    async with scratch_bank(indexed=False) as driver:
+        verbs, sentences = 0, 0
+
+        for size in sorted(sizes):
+            logging.info("Growing the benchmark bank to %d sentences.", size)
+
+            await grow_tables(driver, verbs, max(verbs, verbs_for(size)), sentences, size)
+            verbs, sentences = max(verbs, verbs_for(size)), size
+
+            for indexed in (False, True):
+                if indexed:
+                    await driver.execute(index_sql)
+                    await driver.execute("ANALYZE verbs, conjugations, sentences")
+
+                for name, latency in (await time_queries(driver, verbs, sentences, repetitions, rng)).items():
+                    results.append(LookupResult(size, verbs, indexed, name, latency))
+                    logging.info("%s", results[-1])
+
+            for name in index_names:
+                await driver.execute(f"DROP INDEX IF EXISTS {name}")
+
+    return results
@@ -0,0 +1,89 @@
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+import json
+import platform
+
+#   Every suite reports flat results that can be written out as JSON and compared against a stored baseline.  Whether
+#   a metric is better higher or lower is told by its name: throughputs end in _per_second and latencies in _ms, and
+#   anything else is only reported.
+
+@dataclass
+class BenchmarkResult:
+
+    suite:      str
+    name:       str
+    parameters: dict = field(default_factory=dict)
+    metrics:    dict[str, float] = field(default_factory=dict)
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return self.suite, self.name, json.dumps(self.parameters, sort_keys=True)
+
+    def __str__(self):
+        parameters = ", ".join(f"{name}={value}" for name, value in self.parameters.items())
+        metrics    = ", ".join(f"{name} {value:.3f}" if isinstance(value, float) else f"{name} {value}" for name, value in self.metrics.items())
+        return f"{self.suite:<10} {self.name:<24} {parameters:<36} {metrics}"
+
+@dataclass
+class Regression:
+
+    result:   BenchmarkResult
+    metric:   str
+    baseline: float
+    current:  float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline
+
+    def __str__(self):
+        return f"{self.result.suite}/{self.result.name} {self.result.parameters}: {self.metric} {self.baseline:.3f} -> {self.current:.3f} ({self.change:+.1%})"
+
+def higher_is_better(metric: str) -> bool | None:
+    if metric.endswith("_per_second"):
+        return True
+    if metric.endswith("_ms"):
+        return False
+    return None
+
+def compare(results: list[BenchmarkResult], baseline: list[BenchmarkResult], tolerance: float=0.1) -> list[Regression]:
+
+    #   Only results and metrics found in both are compared, so suites can be added or left out of a run freely.
+    previous = { result.key: result for result in baseline }
+    regressions: list[Regression] = []
+
+    for result in results:
+        if result.key not in previous:
+            continue
+
+        for metric, current in result.metrics.items():
+            direction = higher_is_better(metric)
+            before    = previous[result.key].metrics.get(metric)
+
+            if direction is None or not before:
+                continue
+
+            change = (current - before) / before
+
+            if (direction and change < -tolerance) or (not direction and change > tolerance):
+                regressions.append(Regression(result, metric, before, current))
+
+    return regressions
+
+def write_results(filename: str, results: list[BenchmarkResult], settings: dict | None=None):
+
+    report = {
+        "created":  datetime.now(timezone.utc).isoformat(),
+        "host":     platform.node(),
+        "python":   platform.python_version(),
+        "settings": settings or {},
+        "results":  [asdict(result) for result in results],
+    }
+
+    with open(filename, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+
+def read_results(filename: str) -> list[BenchmarkResult]:
+    with open(filename, encoding="utf-8") as input_file:
+        return [BenchmarkResult(**result) for result in json.load(input_file)["results"]]
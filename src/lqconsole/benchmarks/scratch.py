@@ -0,0 +1,127 @@
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
+import re
+
+from sqlalchemy import event
+
+from lqconsole.database import engine
+from lqconsole.database.migrate import read_migrations
+
+#   Benchmarks run against copies of the bank tables in a scratch schema, which is dropped afterwards, so the real
+#   bank is never touched.  While one is open, every new pooled connection has the scratch schema first on its
+#   search path, so the application code being measured reads and writes the copies without knowing it.
+
+BENCHMARK_SCHEMA = "lqconsole_benchmark"
+BENCHMARK_TABLES = ("verbs", "conjugations", "sentences")
+INDEX_MIGRATION  = "AddLookupIndexes"
+
+#   Regular verbs of each group, and the auxiliaries, which the fake LLM conjugates correctly.
+BENCHMARK_VERBS = ["avoir", "être", "parler", "aimer", "regarder", "arriver", "finir", "choisir", "vendre", "attendre"]
+
+def lookup_indexes() -> tuple[str, list[str]]:
+    #   The SQL of the lookup index migration, and the names of the indexes it creates.
+    index_sql = next(m for m in read_migrations() if m.name == INDEX_MIGRATION).sql()
+    return index_sql, re.findall(r"CREATE INDEX IF NOT EXISTS (\w+)", index_sql)
+
+async def create_tables(driver):
+    #   Only what 1-CreateTables.sql declares: primary keys and the unique conjugation key.  Each table gets a sequence
+    #   of its own, so that rows inserted without an id never take one from the real tables.
+    for name in BENCHMARK_TABLES:
+        await driver.execute(f"CREATE TABLE {BENCHMARK_SCHEMA}.{name} (LIKE public.{name})")
+        await driver.execute(f"ALTER TABLE {BENCHMARK_SCHEMA}.{name} ADD PRIMARY KEY (id)")
+        await driver.execute(f"CREATE SEQUENCE {BENCHMARK_SCHEMA}.{name}_id_seq OWNED BY {BENCHMARK_SCHEMA}.{name}.id")
+        await driver.execute(f"ALTER TABLE {BENCHMARK_SCHEMA}.{name} ALTER id SET DEFAULT nextval('{BENCHMARK_SCHEMA}.{name}_id_seq')")
+
+    await driver.execute(f"ALTER TABLE {BENCHMARK_SCHEMA}.conjugations ADD UNIQUE (verb_id, tense)")
+
+async def sync_sequences(driver):
+    #   After rows were inserted with explicit ids.
+    for name in BENCHMARK_TABLES:
+        await driver.execute(f"SELECT setval('{BENCHMARK_SCHEMA}.{name}_id_seq', greatest(1, (SELECT max(id) FROM {BENCHMARK_SCHEMA}.{name})))")
+
+async def seed_verbs(infinitives: list[str]):
+    # pylint: disable=import-outside-toplevel
+    from lqconsole.verbs.get import download_verb
+
+    #   Through the application's own download, so that they are whatever the configured LLM answers.
+    for infinitive in infinitives:
+        await download_verb(infinitive)
+
+async def grow_tables(driver, verbs_from: int, verbs_to: int, sentences_from: int, sentences_to: int):
+
+    if verbs_to > verbs_from:
+        await driver.execute("""
+            INSERT INTO verbs (id, infinitive, auxiliary)
+            SELECT g, 'verbe' || g, 'avoir' FROM generate_series($1::int, $2::int) g""", verbs_from + 1, verbs_to)
+
+        await driver.execute("""
+            INSERT INTO conjugations (id, verb_id, tense, infinitive, first_person_singular, second_person_singular,
+                                      third_person_singular, first_person_plural, second_person_formal, third_person_plural)
+            SELECT (g - 1) * 5 + t.n, g, t.tense, 'verbe' || g, 'je', 'tu', 'il', 'nous', 'vous', 'ils'
+            FROM generate_series($1::int, $2::int) g, unnest(enum_range(NULL::tense)) WITH ORDINALITY AS t(tense, n)""",
+            verbs_from + 1, verbs_to)
+
+    if sentences_to > sentences_from:
+        await driver.execute("""
+            INSERT INTO sentences (id, infinitive, auxiliary, pronoun, tense, direct_object, indirect_pronoun, negation,
+                                   content, translation, is_correct)
+            SELECT g, 'verbe' || (g % $3 + 1), 'avoir',
+                   (enum_range(NULL::pronoun))[g % 6 + 1],
+                   (enum_range(NULL::tense))[g % 4 + 1],
+                   (enum_range(NULL::direct_object))[g % 4 + 1],
+                   (enum_range(NULL::indirect_pronoun))[g / 7 % 4 + 1],
+                   (enum_range(NULL::negation))[g % 9 + 1],
+                   'phrase ' || g, 'sentence ' || g, g % 4 = 0
+            FROM generate_series($1::int, $2::int) g""", sentences_from + 1, sentences_to, verbs_to)
+
+    await sync_sequences(driver)
+    await driver.execute("ANALYZE verbs, conjugations, sentences")
+
+def forget_cached_rows():
+    # pylint: disable=import-outside-toplevel
+    #   Verbs and sentence ids cached from one bank must not be served from another.  Imported here, as the verb module
+    #   creates a client, which has to wait until the caller has chosen between OpenAI and the fake.
+    from lqconsole.sentences.database import sentence_sampler
+    from lqconsole.verbs.get import notify_verb_changed, verb_sampler
+
+    for sampler in (sentence_sampler, verb_sampler):
+        sampler.buckets.clear()
+
+    notify_verb_changed()
+
+@asynccontextmanager
+async def scratch_bank(indexed: bool=True) -> AsyncGenerator:
+
+    #   Yields a driver connection to the empty scratch tables, with the lookup indexes unless asked otherwise.
+    def route(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET search_path TO {BENCHMARK_SCHEMA}, public")
+        cursor.close()
+
+    async with engine.async_engine.connect() as connection:
+        driver = (await connection.get_raw_connection()).driver_connection
+
+        await driver.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE")
+        await driver.execute(f"CREATE SCHEMA {BENCHMARK_SCHEMA}")
+        await driver.execute(f"SET search_path TO {BENCHMARK_SCHEMA}, public")
+
+        #   Connections opened before this point are dropped, so that every later one is routed.
+        event.listen(engine.async_engine.sync_engine, "connect", route)
+        await engine.async_engine.dispose()
+        forget_cached_rows()
+
+        try:
+            await create_tables(driver)
+
+            if indexed:
+                await driver.execute(lookup_indexes()[0])
+
+            yield driver
+        finally:
+            event.remove(engine.async_engine.sync_engine, "connect", route)
+            await engine.async_engine.dispose()
+            forget_cached_rows()
+
+            await driver.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE")
+            await driver.execute("RESET search_path")
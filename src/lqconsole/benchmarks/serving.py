@@ -0,0 +1,86 @@
+# pylint: disable=import-outside-toplevel
+from asyncio import gather
+
+import logging
+import random
+import time
+
+from lqconsole.benchmarks.results import BenchmarkResult
+from lqconsole.benchmarks.scratch import BENCHMARK_VERBS, scratch_bank, seed_verbs, sync_sequences
+from lqconsole.benchmarks.stats import LatencySummary
+
+#   Request latency of the web service, measured in process through its ASGI interface so that the numbers are the
+#   application's and the database's rather than the network's.  The inventory runs as it does when serving.
+
+async def stock_sentences(driver, infinitives: list[str], per_verb: int):
+    #   Synthetic sentences, since it is sampling and serialization being measured here, not generation.
+    await driver.execute("""
+        INSERT INTO sentences (infinitive, auxiliary, pronoun, tense, direct_object, indirect_pronoun, negation,
+                               content, translation, is_correct)
+        SELECT v, 'avoir',
+               (enum_range(NULL::pronoun))[g % 6 + 1],
+               (enum_range(NULL::tense))[g % 4 + 1],
+               (enum_range(NULL::direct_object))[g % 4 + 1],
+               (enum_range(NULL::indirect_pronoun))[g / 7 % 4 + 1],
+               (enum_range(NULL::negation))[g % 9 + 1],
+               'phrase ' || g, 'sentence ' || g, g % 4 = 0
+        FROM unnest($1::text[]) v, generate_series(1, $2::int) g""", infinitives, per_verb)
+
+    await sync_sequences(driver)
+    await driver.execute("ANALYZE sentences")
+
+async def time_requests(client, paths: list[str], requests: int, concurrency: int, rng: random.Random) -> tuple[LatencySummary, float, int]:
+
+    samples: list[float] = []
+    errors:  int         = 0
+
+    async def run_client(count: int):
+        nonlocal errors
+
+        for _ in range(count):
+            path     = rng.choice(paths)
+            started  = time.perf_counter()
+            response = await client.get(path)
+            samples.append(time.perf_counter() - started)
+
+            errors += 0 if response.status_code < 400 else 1
+
+    started = time.perf_counter()
+    await gather(*[run_client(requests // concurrency + (1 if index < requests % concurrency else 0)) for index in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    return LatencySummary.of(samples), len(samples) / elapsed if elapsed > 0 else 0.0, errors
+
+async def benchmark_serving(requests: int=2000, concurrency: int=10, sentences_per_verb: int=1000, seed: int=0) -> list[BenchmarkResult]:
+    import httpx
+
+    from lqconsole.webserver.app import app
+
+    endpoints: dict[str, list[str]] = {
+        "/verbs/{infinitive}": [f"/verbs/{verb}" for verb in BENCHMARK_VERBS],
+        "/sentence":           [f"/sentence?verb={verb}" for verb in BENCHMARK_VERBS] + ["/sentence"],
+    }
+
+    rng: random.Random = random.Random(seed)
+    results: list[BenchmarkResult] = []
+
+    async with scratch_bank() as driver:
+        await seed_verbs(BENCHMARK_VERBS)
+        await stock_sentences(driver, BENCHMARK_VERBS, sentences_per_verb)
+
+        async with app.router.lifespan_context(app), \
+                   httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://lqconsole") as client:
+
+            for endpoint, paths in endpoints.items():
+                #   Warm the caches and the pool first, as a server that has been up a while would have them.
+                await time_requests(client, paths, min(requests, 100), concurrency, rng)
+
+                latency, rate, errors = await time_requests(client, paths, requests, concurrency, rng)
+
+                results.append(BenchmarkResult("serving", endpoint,
+                    { "requests": requests, "concurrency": concurrency },
+                    { "requests_per_second": rate, **latency.metrics(), "errors": errors }))
+
+                logging.info("%s", results[-1])
+
+    return results
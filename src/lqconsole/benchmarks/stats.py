@@ -0,0 +1,40 @@
+from dataclasses import asdict, dataclass
+
+import math
+
+def percentile(values: list[float], p: float) -> float:
+
+    #   Nearest rank, which is exact enough for latency reports and never invents a value that was not measured.
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+@dataclass
+class LatencySummary:
+
+    count:   int   = 0
+    mean_ms: float = 0.0
+    p50_ms:  float = 0.0
+    p95_ms:  float = 0.0
+    p99_ms:  float = 0.0
+    max_ms:  float = 0.0
+
+    @classmethod
+    def of(cls, seconds: list[float]) -> "LatencySummary":
+        milliseconds = [1000 * s for s in seconds]
+
+        return cls(
+            count   = len(milliseconds),
+            mean_ms = sum(milliseconds) / len(milliseconds) if milliseconds else 0.0,
+            p50_ms  = percentile(milliseconds, 50),
+            p95_ms  = percentile(milliseconds, 95),
+            p99_ms  = percentile(milliseconds, 99),
+            max_ms  = max(milliseconds, default=0.0))
+
+    def metrics(self, prefix: str="") -> dict[str, float]:
+        return { f"{prefix}{name}": value for name, value in asdict(self).items() if name != "count" }
+
+    def __str__(self):
+        return f"p50 {self.p50_ms:.3f}ms, p95 {self.p95_ms:.3f}ms, p99 {self.p99_ms:.3f}ms ({self.count} samples)"
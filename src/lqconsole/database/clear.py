@@ -1,9 +1,15 @@
 from sqlalchemy import delete
 
 from lqconsole.database.engine import get_async_session
+from lqconsole.sentences.database import sentence_sampler
+from lqconsole.verbs.get import notify_verb_changed, verb_sampler
 from lqconsole.verbs.models import Verb
 
 async def clear_database():
 
     async with get_async_session() as session:
         await session.execute(delete(Verb))
+
+    verb_sampler.invalidate()
+    sentence_sampler.invalidate()
+    notify_verb_changed()
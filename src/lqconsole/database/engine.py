@@ -1,14 +1,18 @@
-# from asyncio import Lock, Event
+from asyncio import Task, current_task
+from contextvars import ContextVar
+
 import logging
 import os
+import time
 import traceback
 
+from dataclasses import dataclass, fields, replace
 from typing import AsyncGenerator
 from contextlib import asynccontextmanager
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-
-from .metadata import Base
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 db_user = os.getenv("DB_USER", "postgres")
 db_password = os.getenv("DB_PASSWORD", "postgres")
@@ -16,10 +20,103 @@ db_name = os.getenv("DB_NAME", "language_app")
 db_host = os.getenv("DB_HOST", "localhost")
 db_port = os.getenv("DB_PORT", "5432")
 
-async_engine = create_async_engine(f"postgresql+asyncpg://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}")
+@dataclass
+class PoolSettings:
+
+    pool_size:            int   = 5
+    max_overflow:         int   = 10
+    pool_timeout:         float = 30.0
+    pool_recycle:         int   = -1
+    pool_pre_ping:        bool  = False
+    statement_cache_size: int   = 100     # Prepared statements cached per connection by the asyncpg dialect.
+
+    @classmethod
+    def from_environment(cls) -> "PoolSettings":
+        return cls(
+            pool_size            = int(os.getenv("DB_POOL_SIZE", cls.pool_size)),
+            max_overflow         = int(os.getenv("DB_MAX_OVERFLOW", cls.max_overflow)),
+            pool_timeout         = float(os.getenv("DB_POOL_TIMEOUT", cls.pool_timeout)),
+            pool_recycle         = int(os.getenv("DB_POOL_RECYCLE", cls.pool_recycle)),
+            pool_pre_ping        = os.getenv("DB_POOL_PRE_PING", str(cls.pool_pre_ping)).lower() in ("1", "true", "yes"),
+            statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", cls.statement_cache_size)))
+
+@dataclass
+class PoolStatistics:
+
+    size:            int   = 0
+    checked_out:     int   = 0
+    checked_in:      int   = 0
+    overflow:        int   = 0
+    waiting:         int   = 0
+    checkouts:       int   = 0
+    timeouts:        int   = 0
+    average_wait_ms: float = 0.0
+    max_wait_ms:     float = 0.0
+    peak_checked_out: int  = 0
+
+    def __str__(self):
+        return (f"{self.checked_out} checked out (peak {self.peak_checked_out}), {self.checked_in} idle, {self.overflow} overflow of {self.size}, {self.waiting} waiting, "
+                f"{self.checkouts} checkouts, {self.timeouts} timeouts, {self.average_wait_ms:.2f}ms average wait, {self.max_wait_ms:.2f}ms max wait")
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+
+    #   Counts checkouts and how long they waited, so that an undersized pool shows up instead of silently stalling.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting:    int   = 0
+        self.checkouts:  int   = 0
+        self.timeouts:   int   = 0
+        self.wait_time:  float = 0.0
+        self.max_wait:   float = 0.0
+        self.peak:       int   = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        self.waiting += 1
+
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+        waited = time.perf_counter() - started
+
+        self.checkouts += 1
+        self.wait_time += waited
+        self.max_wait   = max(self.max_wait, waited)
+        self.peak       = max(self.peak, self.checkedout())
+
+        return connection
+
+    def statistics(self) -> PoolStatistics:
+        return PoolStatistics(
+            size            = self.size(),
+            checked_out     = self.checkedout(),
+            checked_in      = self.checkedin(),
+            overflow        = max(0, self.overflow()),
+            waiting         = self.waiting,
+            checkouts       = self.checkouts,
+            timeouts        = self.timeouts,
+            average_wait_ms = 1000 * self.wait_time / self.checkouts if self.checkouts else 0.0,
+            max_wait_ms     = 1000 * self.max_wait,
+            peak_checked_out = self.peak)
+
+def create_engine(settings: PoolSettings) -> AsyncEngine:
+    return create_async_engine(
+        f"postgresql+asyncpg://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}?prepared_statement_cache_size={settings.statement_cache_size}",
+        poolclass     = InstrumentedQueuePool,
+        pool_size     = settings.pool_size,
+        max_overflow  = settings.max_overflow,
+        pool_timeout  = settings.pool_timeout,
+        pool_recycle  = settings.pool_recycle,
+        pool_pre_ping = settings.pool_pre_ping)
 
-# reflection_lock: Lock  = Lock()
-# reflection_done: Event = Event()
+pool_settings: PoolSettings = PoolSettings.from_environment()
+
+async_engine = create_engine(pool_settings)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
@@ -27,6 +124,28 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+async def configure_engine(**overrides) -> PoolSettings:
+    #   Rebuilds the engine with any non-None overrides (ie. from the command line) on top of the environment.
+    global async_engine, pool_settings # pylint: disable=global-statement
+
+    overrides = { k: v for k, v in overrides.items() if v is not None and k in { f.name for f in fields(PoolSettings) } }
+
+    if not overrides:
+        return pool_settings
+
+    previous_engine = async_engine
+
+    pool_settings = replace(pool_settings, **overrides)
+    async_engine  = create_engine(pool_settings)
+    AsyncSessionLocal.configure(bind=async_engine)
+
+    await previous_engine.dispose()
+
+    return pool_settings
+
+def pool_statistics() -> PoolStatistics:
+    return async_engine.pool.statistics()
+
 @asynccontextmanager
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
@@ -40,19 +159,27 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
-async def reflect_tables():
-    #   There could be sublte race conditions depending on table loading.
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.prepare, reflect=True)
-
-    # global reflection_lock
-    # async with reflection_lock:
-    #     if not reflection_done:
-    #         async with async_engine.begin() as conn:
-    #             await conn.run_sync(metadata.reflect)
-    #             await conn.run_sync(Base.prepare)
-    #         reflection_done.set()
-
-# async def get_orm():
-#     reflection_done.wait()
-#     return Base.classes
+#   The session of the unit of work open in the current task, if any.  The owning task is kept with it because new
+#   tasks copy the context, and a session must never be shared between concurrent tasks.
+current_unit_of_work: ContextVar[tuple[Task, AsyncSession]] = ContextVar("current_unit_of_work", default=None)
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncGenerator[AsyncSession, None]:
+
+    #   Joins the unit of work already open in this task, or opens one that commits when it closes.  Keep units to
+    #   the database work itself: the session holds a pooled connection from its first query until it closes, so
+    #   never await the LLM inside one.
+    task  = current_task()
+    outer = current_unit_of_work.get()
+
+    if outer is not None and outer[0] is task:
+        yield outer[1]
+        return
+
+    async with get_async_session() as session:
+        token = current_unit_of_work.set((task, session))
+
+        try:
+            yield session
+        finally:
+            current_unit_of_work.reset(token)
@@ -1,7 +1,9 @@
 from sqlalchemy import MetaData
-from sqlalchemy.ext.automap import automap_base
+from sqlalchemy.orm import DeclarativeBase
 
 metadata = MetaData()
 
-Base = automap_base()
-Base.metadata = metadata
+#   Tables are declared explicitly to match database/1-CreateTables.sql, so nothing is reflected at startup.  Use
+#   check_schema() to compare them against a live database.
+class Base(DeclarativeBase): # pylint: disable=too-few-public-methods
+    metadata = metadata
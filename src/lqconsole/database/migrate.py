@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from os import environ, listdir, path
+
+import logging
+import re
+
+from sqlalchemy import column, insert, select, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from lqconsole.database import engine
+
+MIGRATIONS_DIRECTORY = environ.get("DB_MIGRATIONS_DIRECTORY", path.join(path.dirname(__file__), "migrations"))
+
+#   Any key will do, as long as no one else takes the same advisory lock.
+MIGRATION_LOCK = 7_310_001
+
+migrations_table = table("schema_migrations", column("version"), column("name"))
+
+@dataclass
+class Migration:
+
+    version:  int
+    name:     str
+    filename: str
+
+    def sql(self) -> str:
+        with open(self.filename, encoding="utf-8") as sql_file:
+            return sql_file.read()
+
+    def __str__(self):
+        return f"{self.version:04d}-{self.name}"
+
+def read_migrations(directory: str=MIGRATIONS_DIRECTORY) -> list[Migration]:
+
+    #   Files are named like the bootstrap scripts, '<version>-<Name>.sql', and run in version order.
+    migrations: dict[int, Migration] = {}
+
+    for filename in listdir(directory):
+        match = re.fullmatch(r"(\d+)-(\w+)\.sql", filename)
+
+        if match is None:
+            continue
+
+        version = int(match.group(1))
+
+        if version in migrations:
+            raise ValueError(f"Migrations {migrations[version].filename} and {filename} have the same version.")
+
+        migrations[version] = Migration(version, match.group(2), path.join(directory, filename))
+
+    return [migrations[version] for version in sorted(migrations)]
+
+async def run_sql(connection: AsyncConnection, sql: str):
+    #   Through the driver, which accepts several statements and DO blocks at once, but inside the connection's
+    #   transaction.
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.execute(sql)
+
+async def prepare_migrations_table(connection: AsyncConnection):
+    await connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     integer     primary key,
+            name        varchar     not null,
+            applied_at  timestamptz not null default now()
+        )"""))
+
+async def get_applied_migrations() -> set[int]:
+
+    async with engine.async_engine.begin() as connection:
+        await prepare_migrations_table(connection)
+        return set((await connection.scalars(select(migrations_table.c.version))).all())
+
+async def migrate(target: int=None, dry_run: bool=False, directory: str=MIGRATIONS_DIRECTORY) -> list[Migration]:
+
+    #   Each migration runs in its own transaction together with its bookkeeping row, under an advisory lock so that
+    #   two runners cannot apply the same step.
+    applied: set[int]        = await get_applied_migrations()
+    pending: list[Migration] = [m for m in read_migrations(directory) if m.version not in applied and (target is None or m.version <= target)]
+
+    if dry_run:
+        return pending
+
+    completed: list[Migration] = []
+
+    for migration in pending:
+        async with engine.async_engine.begin() as connection:
+            await connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), { "key": MIGRATION_LOCK })
+
+            already_applied = await connection.scalar(
+                select(migrations_table.c.version).where(migrations_table.c.version == migration.version))
+
+            if already_applied is not None:
+                continue
+
+            logging.info("Applying migration %s", migration)
+
+            await run_sql(connection, migration.sql())
+            await connection.execute(insert(migrations_table).values(version=migration.version, name=migration.name))
+
+        completed.append(migration)
+
+    return completed
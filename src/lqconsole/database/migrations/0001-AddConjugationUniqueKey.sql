@@ -0,0 +1,16 @@
+--  For databases created before conjugations had a unique (verb_id, tense) key.  New databases already have it.
+
+--  Keep only the latest row of any duplicated conjugation:
+DELETE FROM conjugations a
+    USING conjugations b
+    WHERE a.verb_id = b.verb_id
+      AND a.tense   = b.tense
+      AND a.id      < b.id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'conjugations_verb_id_tense_key') THEN
+        ALTER TABLE conjugations ADD CONSTRAINT conjugations_verb_id_tense_key UNIQUE (verb_id, tense);
+    END IF;
+END
+$$;
@@ -0,0 +1,17 @@
+--  Indexes for the lookups on the hot paths.  Each is ordered so that the 'latest row' and 'ids after the high water
+--  mark' queries are answered straight from the index.
+
+--  get_verb: WHERE infinitive = ? ORDER BY id DESC LIMIT 1
+CREATE INDEX IF NOT EXISTS verbs_infinitive_index ON verbs (infinitive, id DESC);
+
+--  get_conjugation: WHERE infinitive = ? AND tense = ? ORDER BY id DESC LIMIT 1
+--  Lookups by verb_id already use the unique (verb_id, tense) key from migration 1.
+CREATE INDEX IF NOT EXISTS conjugations_infinitive_tense_index ON conjugations (infinitive, tense, id DESC);
+
+--  The sentence sampler: WHERE infinitive = ? AND is_correct = ? [AND <features> = ?] AND id > ? ORDER BY id
+--  The feature columns are included so that any combination of them is an index only scan.
+CREATE INDEX IF NOT EXISTS sentences_lookup_index ON sentences (infinitive, is_correct, id)
+    INCLUDE (tense, direct_object, indirect_pronoun, negation);
+
+--  The sentence sampler without a verb: WHERE is_correct = ? AND id > ? ORDER BY id
+CREATE INDEX IF NOT EXISTS sentences_is_correct_index ON sentences (is_correct, id);
@@ -0,0 +1,27 @@
+--  A durable queue of generation work, shared by every 'lqconsole worker run' process.  Workers claim jobs with
+--  SELECT ... FOR UPDATE SKIP LOCKED, and hold them under a lease that they renew while working.  A job whose lease
+--  runs out is claimed again, until it has used up its attempts.
+CREATE TYPE job_kind   AS ENUM ('problems', 'sentences');
+CREATE TYPE job_status AS ENUM ('queued', 'running', 'succeeded', 'failed');
+
+CREATE TABLE IF NOT EXISTS generation_jobs (
+    id                  serial      primary key,
+    kind                job_kind    not null,
+    quantity            integer     not null default 1 check (quantity >= 1),
+    parameters          jsonb       not null default '{}',
+    status              job_status  not null default 'queued',
+    attempts            integer     not null default 0,
+    max_attempts        integer     not null default 3,
+    lease_owner         varchar,
+    lease_expires_at    timestamptz,
+    result              jsonb,
+    error               varchar,
+    created_at          timestamptz not null default now(),
+    updated_at          timestamptz not null default now(),
+    finished_at         timestamptz
+);
+
+--  The claim: WHERE status = 'queued' OR (status = 'running' AND lease_expires_at < now()) ORDER BY id.  Finished jobs
+--  are kept for their results but left out of the index.
+CREATE INDEX IF NOT EXISTS generation_jobs_claim_index ON generation_jobs (status, id)
+    WHERE status IN ('queued', 'running');
@@ -0,0 +1,8 @@
+--  One row per ingested bulk batch, written in the same transaction as its sentences.  A bulk job that stopped after
+--  that transaction committed, but before its manifest said so, finds the row on resume instead of ingesting again.
+CREATE TABLE IF NOT EXISTS bulk_ingests (
+    batch_id            text        primary key,
+    ingested            integer     not null,
+    failed              integer     not null,
+    created_at          timestamptz not null default now()
+);
@@ -0,0 +1,88 @@
+from array import array
+from asyncio import Lock
+from dataclasses import dataclass, field
+
+import random
+import time
+
+from sqlalchemy import column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+#   Random row selection without ORDER BY random().  The ids matching each filter are kept in a compact in-memory
+#   array, topped up with only the rows added since the last refresh, so picking one is O(1) however large the
+#   table grows.
+
+@dataclass
+class IdBucket:
+
+    ids:          array = field(default_factory=lambda: array("q"))
+    high_water:   int   = 0
+    refreshed:    float = 0.0
+    lock:         Lock  = field(default_factory=Lock)
+
+class IdSampler:
+
+    def __init__(self, table_name: str, filter_columns: list[str]=None, refresh_interval: float=30.0):
+        self.table            = table(table_name, column("id"), *[column(name) for name in filter_columns or []])
+        self.filter_columns   = set(filter_columns or [])
+        self.refresh_interval = refresh_interval
+        self.buckets: dict[tuple, IdBucket] = {}
+
+    def __key(self, filters: dict) -> tuple:
+        unknown = set(filters) - self.filter_columns
+
+        if unknown:
+            raise ValueError(f"Cannot sample {self.table.name} by {', '.join(sorted(unknown))}")
+
+        return tuple(sorted((name, value) for name, value in filters.items() if value is not None))
+
+    async def refresh(self, session: AsyncSession, filters: dict, force: bool=False) -> IdBucket:
+
+        key    = self.__key(filters)
+        bucket = self.buckets.setdefault(key, IdBucket())
+
+        async with bucket.lock:
+            if not force and bucket.ids and time.monotonic() - bucket.refreshed < self.refresh_interval:
+                return bucket
+
+            stmt = select(self.table.c.id).where(self.table.c.id > bucket.high_water).order_by(self.table.c.id)
+
+            for name, value in key:
+                stmt = stmt.where(self.table.c[name] == value)
+
+            new_ids = (await session.scalars(stmt)).all()
+
+            if new_ids:
+                bucket.ids.extend(new_ids)
+                bucket.high_water = new_ids[-1]
+
+            bucket.refreshed = time.monotonic()
+
+        return bucket
+
+    async def sample(self, session: AsyncSession, quantity: int=1, **filters) -> list[int]:
+
+        bucket = await self.refresh(session, filters)
+
+        if len(bucket.ids) == 0:
+            return []
+
+        if quantity == 1:
+            return [bucket.ids[random.randrange(len(bucket.ids))]]
+
+        return [bucket.ids[i] for i in random.sample(range(len(bucket.ids)), min(quantity, len(bucket.ids)))]
+
+    def discard(self, row_id: int):
+        #   Rows deleted since they were loaded are dropped when a caller fails to fetch them.  This is rare, so a
+        #   linear removal is fine.
+        for bucket in self.buckets.values():
+            try:
+                bucket.ids.remove(row_id)
+            except ValueError:
+                pass
+
+    def invalidate(self):
+        self.buckets.clear()
+
+    def __len__(self):
+        return sum(len(bucket.ids) for bucket in self.buckets.values())
@@ -0,0 +1,31 @@
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+from lqconsole.database import engine
+from lqconsole.database.metadata import metadata
+
+#   Imported for their tables, so that the metadata is complete before it is compared.
+import lqconsole.jobs.models      # pylint: disable=unused-import
+import lqconsole.sentences.models # pylint: disable=unused-import
+import lqconsole.verbs.models     # pylint: disable=unused-import
+
+def compare_schema(connection: Connection) -> list[str]:
+
+    #   Only looks for what the mappings need: missing tables and columns.  Extra columns in the database are fine.
+    inspector = inspect(connection)
+    problems: list[str] = []
+
+    for table in metadata.sorted_tables:
+
+        if not inspector.has_table(table.name):
+            problems.append(f"Table {table.name} does not exist.")
+            continue
+
+        stored: set[str] = { stored_column["name"] for stored_column in inspector.get_columns(table.name) }
+        problems += [f"Column {table.name}.{column.name} does not exist." for column in table.columns if column.name not in stored]
+
+    return problems
+
+async def check_schema() -> list[str]:
+    async with engine.async_engine.connect() as connection:
+        return await connection.run_sync(compare_schema)
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import inspect
+from sqlalchemy import Enum, inspect
 
 def object_as_dict(obj):
     return {
@@ -12,3 +12,8 @@ class DatabaseStringEnum(enum.Enum):
 
     def __str__(self):
         return self.name
+
+def database_enum(enum_class: type[enum.Enum], name: str) -> Enum:
+    #   The database enums hold the member names, without the prompt only 'random' choice.  Values are read back as
+    #   plain strings, as they were when the tables were reflected.
+    return Enum(*[member.name for member in enum_class if member.name != "random"], name=name)
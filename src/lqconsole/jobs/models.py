@@ -0,0 +1,36 @@
+from enum import auto
+
+from sqlalchemy import JSON, Column, DateTime, Integer, String, func
+
+from lqconsole.database.metadata import Base
+from lqconsole.database.utils import DatabaseStringEnum, database_enum
+
+class JobStatus(DatabaseStringEnum):
+    queued    = auto()
+    running   = auto()
+    succeeded = auto()
+    failed    = auto()
+
+class JobKind(DatabaseStringEnum):
+    problems  = auto()      # parameters: batched
+    sentences = auto()      # parameters: any of the sentence filters
+
+class GenerationJob(Base): # pylint: disable=too-few-public-methods
+    __tablename__ = "generation_jobs"
+
+    #   Matches migration 3.  A running job belongs to lease_owner until lease_expires_at, after which any worker may
+    #   claim it again, so a job can run more than once and its work must be safe to repeat.
+    id               = Column(Integer, primary_key=True)
+    kind             = Column(database_enum(JobKind, "job_kind"), nullable=False)
+    quantity         = Column(Integer, nullable=False, default=1)
+    parameters       = Column(JSON, nullable=False, default=dict)
+    status           = Column(database_enum(JobStatus, "job_status"), nullable=False, default=JobStatus.queued.name)
+    attempts         = Column(Integer, nullable=False, default=0)
+    max_attempts     = Column(Integer, nullable=False, default=3)
+    lease_owner      = Column(String())
+    lease_expires_at = Column(DateTime(timezone=True))
+    result           = Column(JSON)
+    error            = Column(String())
+    created_at       = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at       = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at      = Column(DateTime(timezone=True))
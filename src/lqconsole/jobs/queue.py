@@ -0,0 +1,147 @@
+from datetime import timedelta
+from os import environ
+
+from sqlalchemy import and_, case, cast, func, insert, or_, select, update
+
+from lqconsole.database.engine import unit_of_work
+from lqconsole.jobs.models import GenerationJob, JobKind, JobStatus
+from lqconsole.sentences.database import SentenceFilters
+
+#   Every operation is its own short unit of work, so that a claim or a renewal is committed, and visible to the
+#   other workers, as soon as it returns.  Updates on a claimed job only apply while its lease is still held: a
+#   worker that lost its lease to another cannot overwrite what the other one does.
+
+LEASE_SECONDS = float(environ.get("JOB_LEASE_SECONDS", 60))
+
+PROBLEM_PARAMETERS = { "batched" }
+
+def validate_job(kind: str, quantity: int, parameters: dict):
+
+    if kind not in JobKind.__members__:
+        raise ValueError(f"Unknown job kind '{kind}'")
+
+    if quantity < 1:
+        raise ValueError("A job needs a quantity of at least one")
+
+    if kind == JobKind.problems.name:
+        unknown = set(parameters) - PROBLEM_PARAMETERS
+        if unknown:
+            raise ValueError(f"Unknown problem parameters: {', '.join(sorted(unknown))}")
+    else:
+        try:
+            SentenceFilters.parse(**parameters)
+        except TypeError as ex:
+            raise ValueError(f"Unknown sentence parameters: {ex}") from ex
+
+def split_jobs(quantity: int, job_size: int=None) -> list[int]:
+    #   Smaller jobs spread over more workers, and lose less when one of them has to be run again.
+    if job_size is None or job_size >= quantity:
+        return [quantity]
+
+    return [job_size] * (quantity // job_size) + ([quantity % job_size] if quantity % job_size else [])
+
+async def enqueue(kind: str, quantity: int, parameters: dict=None, job_size: int=None, max_attempts: int=3) -> list[int]:
+
+    parameters = parameters or {}
+    validate_job(kind, quantity, parameters)
+
+    rows = [{ "kind": kind, "quantity": size, "parameters": parameters, "max_attempts": max_attempts } for size in split_jobs(quantity, job_size)]
+
+    async with unit_of_work() as session:
+        return list((await session.execute(insert(GenerationJob).values(rows).returning(GenerationJob.id))).scalars())
+
+def lease_until(lease: float):
+    return func.now() + timedelta(seconds=lease)
+
+def claim_query(owner: str, lease: float):
+
+    #   The oldest job that is waiting, or whose lease has run out.  Rows other workers are claiming are skipped rather
+    #   than waited on, so that any number of workers can claim at once.
+    claimable = (select(GenerationJob.id)
+        .where(or_(GenerationJob.status == JobStatus.queued.name,
+                   and_(GenerationJob.status == JobStatus.running.name, GenerationJob.lease_expires_at < func.now())),
+               GenerationJob.attempts < GenerationJob.max_attempts)
+        .order_by(GenerationJob.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery())
+
+    return (update(GenerationJob)
+        .where(GenerationJob.id == claimable)
+        .values(status           = JobStatus.running.name,
+                attempts         = GenerationJob.attempts + 1,
+                lease_owner      = owner,
+                lease_expires_at = lease_until(lease),
+                updated_at       = func.now())
+        .returning(GenerationJob))
+
+def expire_query():
+
+    #   Jobs whose last attempt was lost with its worker.
+    return (update(GenerationJob)
+        .where(GenerationJob.status == JobStatus.running.name,
+               GenerationJob.lease_expires_at < func.now(),
+               GenerationJob.attempts >= GenerationJob.max_attempts)
+        .values(status      = JobStatus.failed.name,
+                error       = func.coalesce(GenerationJob.error, "The lease expired on the last attempt"),
+                lease_owner = None,
+                updated_at  = func.now(),
+                finished_at = func.now()))
+
+def held(job_id: int, owner: str):
+    return and_(GenerationJob.id == job_id, GenerationJob.lease_owner == owner, GenerationJob.status == JobStatus.running.name)
+
+async def claim(owner: str, lease: float=LEASE_SECONDS) -> GenerationJob | None:
+    async with unit_of_work() as session:
+        await session.execute(expire_query())
+        return (await session.execute(claim_query(owner, lease))).scalar_one_or_none()
+
+async def renew(job_id: int, owner: str, lease: float=LEASE_SECONDS) -> bool:
+    async with unit_of_work() as session:
+        result = await session.execute(update(GenerationJob)
+            .where(held(job_id, owner))
+            .values(lease_expires_at=lease_until(lease), updated_at=func.now()))
+
+    return result.rowcount == 1
+
+async def succeed(job_id: int, owner: str, result: dict) -> bool:
+    async with unit_of_work() as session:
+        updated = await session.execute(update(GenerationJob)
+            .where(held(job_id, owner))
+            .values(status=JobStatus.succeeded.name, result=result, error=None, lease_owner=None, lease_expires_at=None,
+                    updated_at=func.now(), finished_at=func.now()))
+
+    return updated.rowcount == 1
+
+async def fail(job_id: int, owner: str, error: str) -> bool:
+
+    #   Back to the queue while it has attempts left.  The status is cast, since the driver would send it as text.
+    exhausted = GenerationJob.attempts >= GenerationJob.max_attempts
+    status    = cast(case((exhausted, JobStatus.failed.name), else_=JobStatus.queued.name), GenerationJob.status.type)
+
+    async with unit_of_work() as session:
+        updated = await session.execute(update(GenerationJob)
+            .where(held(job_id, owner))
+            .values(status           = status,
+                    error            = error,
+                    lease_owner      = None,
+                    lease_expires_at = None,
+                    updated_at       = func.now(),
+                    finished_at      = case((exhausted, func.now()), else_=None)))
+
+    return updated.rowcount == 1
+
+async def release(job_id: int, owner: str) -> bool:
+
+    #   A worker that is stopping hands its job back, along with the attempt it had not finished.
+    async with unit_of_work() as session:
+        updated = await session.execute(update(GenerationJob)
+            .where(held(job_id, owner))
+            .values(status=JobStatus.queued.name, attempts=GenerationJob.attempts - 1, lease_owner=None, lease_expires_at=None,
+                    updated_at=func.now()))
+
+    return updated.rowcount == 1
+
+async def get_job(job_id: int) -> GenerationJob | None:
+    async with unit_of_work() as session:
+        return await session.get(GenerationJob, job_id)
@@ -0,0 +1,157 @@
+# pylint: disable=import-outside-toplevel
+from asyncio import CancelledError, Task, create_task, gather, shield, sleep
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import logging
+import os
+import socket
+
+from lqconsole.jobs import queue
+from lqconsole.jobs.models import GenerationJob, JobKind
+
+#   Drains generation_jobs.  Any number of workers, on any number of hosts, can run against the same database: each
+#   claims one job at a time per slot, renews its lease while the job runs, and records the outcome only if it still
+#   holds the lease.  A worker that dies leaves its job to be claimed again once the lease runs out, so jobs are run
+#   at least once.
+
+JobHandler = Callable[[GenerationJob], Awaitable[dict]]
+
+async def run_problems_job(job: GenerationJob) -> dict:
+    from lqconsole.problems.create import create_random_problem
+    from lqconsole.utils.queues import stream_operation
+
+    failed: int = 0
+
+    async for result in stream_operation(range(job.quantity), lambda _: create_random_problem(batched=job.parameters.get("batched", False)),
+                                         workers=min(job.quantity, 10)):
+        failed += 0 if result.ok else 1
+
+    if failed == job.quantity:
+        raise RuntimeError(f"All {failed} problems failed")
+
+    return { "generated": job.quantity - failed, "failed": failed }
+
+async def run_sentences_job(job: GenerationJob) -> dict:
+    from lqconsole.sentences.create import create_sentences
+    from lqconsole.sentences.database import SentenceFilters
+    from lqconsole.sentences.inventory import refill_spec
+
+    spec      = refill_spec(SentenceFilters.parse(**job.parameters))
+    generated = 0
+
+    #   A few sentences per completion, as the inventory refills them.
+    for start in range(0, job.quantity, 5):
+        sentences  = await create_sentences([spec] * min(5, job.quantity - start))
+        generated += sum(sentence is not None for sentence in sentences)
+
+    if generated == 0:
+        raise RuntimeError("No sentences were generated")
+
+    return { "generated": generated, "failed": job.quantity - generated }
+
+default_handlers: dict[str, JobHandler] = {
+    JobKind.problems.name:  run_problems_job,
+    JobKind.sentences.name: run_sentences_job,
+}
+
+@dataclass
+class WorkerStats:
+
+    claimed:   int = 0
+    succeeded: int = 0
+    failed:    int = 0
+    lost:      int = 0      # Leases taken over by another worker before the job finished.
+
+class JobWorker:
+    # pylint: disable=too-many-arguments
+
+    def __init__(self, concurrency: int=1, lease: float=queue.LEASE_SECONDS, poll_interval: float=2.0, max_jobs: int=None,
+                 exit_when_empty: bool=False, handlers: dict[str, JobHandler]=None, owner: str=None):
+        self.concurrency     = concurrency
+        self.lease           = lease
+        self.poll_interval   = poll_interval
+        self.max_jobs        = max_jobs
+        self.exit_when_empty = exit_when_empty
+        self.handlers        = default_handlers if handlers is None else handlers
+        self.owner           = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.stats           = WorkerStats()
+        self.claiming: int   = 0
+
+    def __done(self) -> bool:
+        return self.max_jobs is not None and self.stats.claimed + self.claiming >= self.max_jobs
+
+    async def __renew(self, job: GenerationJob, work: Task):
+        #   Renewed well before it runs out.  Once it is lost, the job belongs to someone else, so stop working on it.
+        while True:
+            await sleep(self.lease / 3)
+
+            if not await queue.renew(job.id, self.owner, self.lease):
+                logging.warning("Lost the lease on job %d.", job.id)
+                work.cancel()
+                return
+
+    async def process(self, job: GenerationJob):
+
+        handler = self.handlers.get(job.kind)
+        work    = create_task(handler(job)) if handler is not None else None
+        renewal = create_task(self.__renew(job, work)) if work is not None else None
+
+        try:
+            if work is None:
+                raise ValueError(f"No handler for {job.kind} jobs")
+
+            result = await work
+        except CancelledError:
+            if renewal is not None and renewal.done():
+                self.stats.lost += 1
+                return
+
+            #   This worker is stopping: hand the job back rather than wait for its lease to run out.
+            work.cancel()
+            await shield(queue.release(job.id, self.owner))
+            raise
+        except Exception as ex: # pylint: disable=broad-exception-caught
+            logging.warning("Job %d failed on attempt %d of %d: %s", job.id, job.attempts, job.max_attempts, ex)
+            self.stats.failed += 1
+            await queue.fail(job.id, self.owner, str(ex) or type(ex).__name__)
+            return
+        finally:
+            if renewal is not None:
+                renewal.cancel()
+
+        if await queue.succeed(job.id, self.owner, result):
+            self.stats.succeeded += 1
+            logging.info("Job %d: %s", job.id, result)
+        else:
+            self.stats.lost += 1
+            logging.warning("Job %d finished after its lease was lost; its result was not recorded.", job.id)
+
+    async def __slot(self):
+        while not self.__done():
+            self.claiming += 1
+
+            try:
+                job: GenerationJob = await queue.claim(self.owner, self.lease)
+            finally:
+                self.claiming -= 1
+
+            if job is None:
+                if self.exit_when_empty:
+                    return
+
+                await sleep(self.poll_interval)
+                continue
+
+            self.stats.claimed += 1
+            logging.info("Claimed job %d: %d %s, attempt %d of %d.", job.id, job.quantity, job.kind, job.attempts, job.max_attempts)
+
+            await self.process(job)
+
+    async def run(self) -> WorkerStats:
+        await gather(*[self.__slot() for _ in range(self.concurrency)])
+        return self.stats
+
+    def __str__(self):
+        return (f"{self.owner}: {self.stats.claimed} claimed, {self.stats.succeeded} succeeded, {self.stats.failed} failed, "
+                f"{self.stats.lost} lost")
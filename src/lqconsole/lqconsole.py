@@ -1,38 +1,31 @@
 #!/usr/bin/env python3
+#   Only the command line itself is imported here.  Each command imports what it needs when it runs, so that --help
+#   and light commands do not pay for openai, fastapi or uvicorn, and nothing touches the database until a command
+#   does.
+# pylint: disable=import-outside-toplevel
 from pprint import pprint
 
 import logging
+import os
 import traceback
 import asyncclick as click
 
 from .cli.options import random_options, sentence_options
 
-from .database.clear import clear_database
-from .database.engine import reflect_tables
-from .database.init import init_auxiliaries
-from .database.utils import object_as_dict
-
-from .problems.create import create_random_problem_with_delay, create_random_problem
-
-from .sentences.create import create_random_sentence, create_sentence
-from .sentences.database import get_random_sentence
-from .sentences.utils import problem_formatter
-
-from .verbs.get import download_verb, get_verb, get_random_verb
-
 from .utils.console import Style
-from .utils.queues import batch_operation
-
-from .webserver.app import app
-
-import os
-import uvicorn
 
 @click.group()
 @click.option('--debug', default=False, is_flag=True)
 @click.option('--debug-openai', default=False, is_flag=True)
 @click.option('--debug-recovery', default=False, is_flag=True)
-async def cli(debug=False, debug_openai=False, debug_recovery=True):
+@click.option('--pool-size', type=click.INT, help="Database connections kept open.  Defaults to DB_POOL_SIZE or 5.")
+@click.option('--max-overflow', type=click.INT, help="Extra connections allowed under load.  Defaults to DB_MAX_OVERFLOW or 10.")
+@click.option('--pool-timeout', type=click.FLOAT, help="Seconds to wait for a connection.  Defaults to DB_POOL_TIMEOUT or 30.")
+@click.option('--pool-recycle', type=click.INT, help="Seconds before a connection is replaced.  Defaults to DB_POOL_RECYCLE or never.")
+@click.option('--pool-pre-ping/--no-pool-pre-ping', default=None, help="Check connections before use.  Defaults to DB_POOL_PRE_PING or off.")
+@click.option('--statement-cache-size', type=click.INT, help="Prepared statements cached per connection.  Defaults to DB_STATEMENT_CACHE_SIZE or 100.")
+@click.option('--check-schema/--no-check-schema', default=None, help="Compare the mapped tables with the database first.  Defaults to DB_CHECK_SCHEMA or off.")
+async def cli(debug=False, debug_openai=False, debug_recovery=True, check_schema=None, **pool_options):
 
     logging.basicConfig(level = logging.DEBUG if debug else logging.INFO)
 
@@ -42,7 +35,20 @@ async def cli(debug=False, debug_openai=False, debug_recovery=True):
     if debug_recovery:
         logging.getLogger("recovery").setLevel(logging.DEBUG)
 
-    await reflect_tables()
+    from .database.engine import configure_engine
+
+    await configure_engine(**pool_options)
+
+    if check_schema is None:
+        check_schema = os.getenv("DB_CHECK_SCHEMA", "false").lower() in ("1", "true", "yes")
+
+    if check_schema:
+        from .database.schema import check_schema as compare_with_database
+
+        problems = await compare_with_database()
+
+        if problems:
+            raise click.ClickException("The database schema does not match the models:\n  " + "\n  ".join(problems))
 
 @cli.group()
 async def database():
@@ -50,14 +56,33 @@ async def database():
 
 @database.command()
 async def clean():
+    from .database.clear import clear_database
+
     click.echo("Cleaning the database of any user data and history.")
     await clear_database()
 
 @database.command()
 async def init():
+    from .database.init import init_auxiliaries
+
     click.echo("Initializing the database to default settings and content.")
     click.echo("Fetching auxiliaries.")
-    await init_auxiliaries(with_common_verbs=True)
+    report = await init_auxiliaries(with_common_verbs=True)
+    click.echo(str(report))
+
+@database.command()
+@click.option('--target', type=click.INT, help="Stop after this migration version.")
+@click.option('--dry-run', default=False, is_flag=True, help="List the pending migrations without applying them.")
+async def migrate(target: int, dry_run: bool):
+    from .database.migrate import migrate as apply_migrations
+
+    migrations = await apply_migrations(target=target, dry_run=dry_run)
+
+    if not migrations:
+        click.echo("The database is up to date.")
+
+    for migration in migrations:
+        click.echo(f"{'Pending' if dry_run else 'Applied'} {migration}")
 
 @database.command()
 async def reset():
@@ -68,19 +93,79 @@ async def problem():
     pass
 
 @problem.command()
-async def random():
-    results = await create_random_problem()
+@click.option('--batched', default=False, is_flag=True)
+async def random(batched: bool):
+    from .problems.create import create_random_problem
+    from .sentences.utils import problem_formatter
+
+    results = await create_random_problem(batched=batched)
     print(problem_formatter(results))
 
+@problem.command('get')
+@click.option('-q', '--quantity', default=1, type=click.INT)
+@click.option('-v', '--verb-infinitive', required=False)
+@click.option('-t', '--tense', required=False)
+@click.option('-cod', '--direct-object', required=False)
+@click.option('-coi', '--indirect-pronoun', required=False)
+@click.option('-neg', '--negation', required=False)
+@click.option('-m', '--match', multiple=True, type=click.Choice(["infinitive", "tense", "direct_object", "indirect_pronoun", "negation"]),
+              help="Columns the incorrect sentences must share with the correct one, infinitive included.  Defaults to infinitive.")
+async def get_problem(quantity: int, verb_infinitive: str, tense: str, direct_object: str, indirect_pronoun: str, negation: str, match: tuple):
+    from .problems.bank import get_bank_problems
+    from .sentences.database import SentenceFilters
+    from .sentences.utils import problem_formatter
+
+    try:
+        filters  = SentenceFilters.parse(verb_infinitive, tense, direct_object, indirect_pronoun, negation)
+        problems = await get_bank_problems(quantity, filters, list(match) if match else None)
+    except ValueError as ex:
+        raise click.ClickException(str(ex)) from ex
+
+    for result in problems:
+        print(problem_formatter(result))
+
+    if len(problems) < quantity:
+        click.echo(f"Only {len(problems)} of {quantity} problems could be built from the stored sentences.")
+
 @problem.command()
 @click.argument('quantity', default=10, type=click.INT)
 @click.option('--workers', default=10, type=click.INT)
-async def batch(quantity: int, workers: int):
+@click.option('--batched', default=False, is_flag=True)
+@click.option('--buffered-writes', default=False, is_flag=True)
+@click.option('--write-batch-size', default=500, type=click.INT)
+@click.option('--window', default=2, type=click.INT, help="Problems in flight per worker.")
+@click.option('--retries', default=0, type=click.INT, help="Extra attempts for a failed problem.")
+@click.option('--progress-interval', default=5.0, type=click.FLOAT)
+@click.option('--processes', default=1, type=click.IntRange(min=1), help="Worker processes, splitting the OpenAI rate limits between them.")
+async def batch(quantity: int, processes: int, progress_interval: float, **options):
+    from .database import engine
+    from .problems.batch import BatchOptions, batch_stats, run_batch_processes, run_problem_batch
+    from .utils.queues import Progress
+
+    options = BatchOptions(progress_interval=progress_interval, **options)
+
+    if processes > 1:
+        #   Each process prints its own problems and progress; the totals are printed here once they have all finished,
+        #   or stopped on Ctrl-C.
+        reported = []
+
+        try:
+            await run_batch_processes(quantity, processes, options, engine.pool_settings, reported)
+        finally:
+            for stats in reported:
+                print(f"{Style.BOLD}Generated {stats}{Style.RESET}")
+        return
+
+    #   Ctrl-C cancels the problems in flight and still prints the summary.
+    progress = Progress(total=quantity, interval=progress_interval)
+
     try:
-        results = await batch_operation(workers=workers, quantity=quantity, method=create_random_problem_with_delay, display=True)
-        print(f"{Style.BOLD}Generated {len(results)}{Style.RESET}")
+        await run_problem_batch(quantity, options, progress)
     except Exception as ex:
         print(f"str({ex}): {traceback.format_exc()}")
+    finally:
+        print(f"{Style.BOLD}Generated {batch_stats(progress)}{Style.RESET}")
+        print(f"Database pool: {engine.pool_statistics()}")
 
 @cli.group()
 async def sentence():
@@ -90,16 +175,25 @@ async def sentence():
 @click.option('-q', '--quantity', required=False, default=1)
 @sentence_options
 async def get(quantity: int, **kwargs):
+    from .sentences.database import get_random_sentence
+    from .sentences.utils import problem_formatter
+
     result = await get_random_sentence(quantity, **kwargs)
     print(problem_formatter(result))
 
 @sentence.command('new')
 @click.option('-q', '--quantity', required=False, default=1)
+@click.option('--batched', default=False, is_flag=True)
 @sentence_options
-async def generate(quantity: int, **kwargs):
+async def generate(quantity: int, batched: bool, **kwargs):
+    from .sentences.create import SentenceSpec, create_sentence, create_sentences
+    from .sentences.utils import problem_formatter
+
     try:
         results = []
-        for i in range(quantity):
+        if batched:
+            results = [result for result in await create_sentences([SentenceSpec(**kwargs)] * quantity) if result is not None]
+        for i in range(quantity - len(results)):
             results.append(await create_sentence(**kwargs))
         print(problem_formatter(results))
     except Exception as ex:
@@ -109,6 +203,9 @@ async def generate(quantity: int, **kwargs):
 @click.option('-q', '--quantity', required=False, default=1)
 @random_options
 async def random(quantity: int, **kwargs):
+    from .sentences.create import create_random_sentence
+    from .sentences.utils import problem_formatter
+
     try:
         results = []
         for i in range(quantity):
@@ -117,6 +214,46 @@ async def random(quantity: int, **kwargs):
     except Exception as ex:
         print(f"str({ex}): {traceback.format_exc()}")
 
+@sentence.command('bulk')
+@click.argument('quantity', default=100, type=click.INT)
+@click.option('--job-dir', required=True, type=click.Path(file_okay=False))
+@click.option('--backend', type=click.Choice(['openai', 'local']), default='openai')
+@click.option('--poll-interval', default=60.0, type=click.FLOAT)
+async def bulk(quantity: int, job_dir: str, backend: str, poll_interval: float):
+    from .ai.batch import LocalBatchBackend, OpenAIBatchBackend
+    from .ai.fake import shared_fake_llm
+    from .sentences.bulk import run_bulk_job
+
+    #   Re-running with the same --job-dir resumes an interrupted job from its last completed stage.  The local backend
+    #   answers from the fake LLM's templates.
+    try:
+        batch_backend = OpenAIBatchBackend() if backend == 'openai' else \
+            LocalBatchBackend(os.path.join(job_dir, 'local-batches'), responder=shared_fake_llm().batch_responder)
+        job = await run_bulk_job(job_dir, batch_backend, quantity=quantity, poll_interval=poll_interval)
+        print(f"{Style.BOLD}Ingested {job.ingested} sentences, {job.failed} failed{Style.RESET}")
+    except Exception as ex:
+        print(f"str({ex}): {traceback.format_exc()}")
+
+@sentence.command('stream')
+@click.argument('quantity', default=100, type=click.INT)
+@click.option('--generators', default=8, type=click.INT)
+@click.option('--validators', default=4, type=click.INT)
+@click.option('--correctors', default=2, type=click.INT)
+@click.option('--queue-size', default=32, type=click.INT)
+@click.option('--save-batch', default=50, type=click.INT)
+@click.option('--display-interval', default=5.0, type=click.FLOAT)
+async def stream(quantity: int, generators: int, validators: int, correctors: int, queue_size: int, save_batch: int, display_interval: float):
+    from .sentences.pipeline import SentencePipeline
+
+    try:
+        pipeline = SentencePipeline(generators=generators, validators=validators, correctors=correctors,
+                                    queue_size=queue_size, save_batch=save_batch)
+        saved = await pipeline.run(quantity, display_interval=display_interval)
+        print(pipeline.report())
+        print(f"{Style.BOLD}Generated {saved}{Style.RESET}")
+    except Exception as ex:
+        print(f"str({ex}): {traceback.format_exc()}")
+
 @cli.group()
 async def verb():
     pass
@@ -124,29 +261,158 @@ async def verb():
 @verb.command()
 @click.argument('verb')
 async def download(verb: str):
+    from .database.utils import object_as_dict
+    from .verbs.get import download_verb
+
     click.echo(f"Downloading verb {verb}.")
     result = await download_verb(verb)
     print(object_as_dict(result))
 
+@verb.command('import', help="Import the verbs listed in FILENAME, by default the frequency list in lqconsole/verbs/verbs.txt.")
+@click.argument('filename', required=False, type=click.Path(exists=True, dir_okay=False))
+@click.option('--checkpoint', required=False, type=click.Path(dir_okay=False),
+              help="Defaults to FILENAME.checkpoint.jsonl, or verbs.txt.checkpoint.jsonl in the working directory.")
+@click.option('--workers', default=16, type=click.INT)
+@click.option('--attempts', default=3, type=click.INT)
+async def import_(filename: str, checkpoint: str, workers: int, attempts: int):
+    from .verbs.catalog import DEFAULT_FREQUENCY_FILE
+    from .verbs.importer import import_verbs, read_verb_list
+
+    #   Re-running with the same checkpoint skips verbs that were already imported, and retries the ones that failed.
+    #   The shipped list may be installed read-only, so its checkpoint is kept in the working directory.
+    if filename is None:
+        filename   = DEFAULT_FREQUENCY_FILE
+        checkpoint = "verbs.txt.checkpoint.jsonl" if checkpoint is None else checkpoint
+
+    checkpoint = f"{filename}.checkpoint.jsonl" if checkpoint is None else checkpoint
+    click.echo(f"Importing verbs from {filename}, checkpointing to {checkpoint}.")
+    report = await import_verbs(read_verb_list(filename), checkpoint=checkpoint, workers=workers, attempts=attempts)
+    click.echo(str(report))
+
 @verb.command()
 @click.argument('verb')
 async def get(verb: str):
+    from .database.utils import object_as_dict
+    from .verbs.get import get_verb
+
     click.echo(f"Fetching verb {verb}.")
     result = await get_verb(verb)
     pprint(object_as_dict(result))
 
 @verb.command()
 async def random():
+    from .database.utils import object_as_dict
+    from .verbs.get import get_random_verb
+
     result = await get_random_verb()
     click.echo(f"Selected verb {result.infinitive}")
     pprint(object_as_dict(result))
 
+@cli.group()
+async def job():
+    pass
+
+@job.command('enqueue')
+@click.argument('kind', type=click.Choice(['problems', 'sentences']))
+@click.argument('quantity', default=10, type=click.INT)
+@click.option('--job-size', type=click.IntRange(min=1), help="Split the quantity into jobs of at most this many.")
+@click.option('--max-attempts', default=3, type=click.IntRange(min=1))
+@click.option('--batched', default=False, is_flag=True, help="Problems only.")
+@click.option('-v', '--verb', help="Sentences only, as are the other filters.")
+@click.option('--tense')
+@click.option('--direct-object')
+@click.option('--indirect-pronoun')
+@click.option('--negation')
+@click.option('--incorrect', default=False, is_flag=True)
+async def enqueue(kind: str, quantity: int, job_size: int, max_attempts: int, batched: bool, verb: str, incorrect: bool, **filters):
+    from .jobs.queue import enqueue as enqueue_jobs
+
+    if kind == 'problems':
+        parameters = { "batched": batched }
+    else:
+        parameters = { "infinitive": verb, "is_correct": not incorrect, **filters }
+
+    try:
+        ids = await enqueue_jobs(kind, quantity, parameters, job_size=job_size, max_attempts=max_attempts)
+    except ValueError as ex:
+        raise click.ClickException(str(ex)) from ex
+
+    click.echo(f"Enqueued {len(ids)} job{'s' if len(ids) != 1 else ''}: {', '.join(str(job_id) for job_id in ids)}")
+
+@job.command('status')
+@click.argument('job_id', type=click.INT)
+async def status(job_id: int):
+    from .database.utils import object_as_dict
+    from .jobs.queue import get_job
+
+    result = await get_job(job_id)
+
+    if result is None:
+        raise click.ClickException(f"There is no job {job_id}.")
+
+    pprint(object_as_dict(result))
+
+@cli.group()
+async def worker():
+    pass
+
+@worker.command('run')
+@click.option('--concurrency', default=1, type=click.IntRange(min=1), help="Jobs worked on at once.")
+@click.option('--lease', type=click.FLOAT, help="Seconds a claimed job is held between renewals.  Defaults to JOB_LEASE_SECONDS or 60.")
+@click.option('--poll-interval', default=2.0, type=click.FLOAT, help="Seconds between claims when the queue is empty.")
+@click.option('--max-jobs', type=click.INT, help="Stop after claiming this many jobs.")
+@click.option('--exit-when-empty', default=False, is_flag=True)
+async def run_worker(lease: float, **options):
+    from .jobs.queue import LEASE_SECONDS
+    from .jobs.worker import JobWorker
+
+    #   Ctrl-C hands the jobs in progress back to the queue.
+    runner = JobWorker(lease=LEASE_SECONDS if lease is None else lease, **options)
+
+    try:
+        await runner.run()
+    finally:
+        click.echo(f"{Style.BOLD}Worker {runner}{Style.RESET}")
+
+@cli.group('fake-llm')
+async def fake_llm():
+    pass
+
+@fake_llm.command('serve')
+@click.option('--host', default="127.0.0.1")
+@click.option('--port', default=8090, type=click.INT)
+@click.option('--latency', type=click.Choice(['fixed', 'uniform', 'lognormal']), help="Defaults to FAKE_LLM_LATENCY or fixed.")
+@click.option('--latency-ms', type=click.FLOAT, help="The fixed latency, or the median of the others.")
+@click.option('--latency-spread', type=click.FLOAT, help="Uniform: plus or minus this fraction of the median.  Lognormal: sigma.")
+@click.option('--rate-limit-rate', type=click.FLOAT, help="Fraction of requests refused with a 429.")
+@click.option('--malformed-rate', type=click.FLOAT, help="Fraction of completions cut off halfway.")
+@click.option('--requests-per-minute', type=click.INT)
+@click.option('--tokens-per-minute', type=click.INT)
+@click.option('--retry-after', type=click.FLOAT)
+@click.option('--seed', type=click.INT)
+async def serve(host: str, port: int, **overrides):
+    from dataclasses import replace
+
+    import uvicorn
+
+    from .ai.fake import FakeLLM, FakeLLMSettings
+    from .ai.fake_transport import create_fake_llm_app
+
+    #   Point clients at it with OPENAI_BASE_URL=http://<host>:<port>/v1.
+    settings = replace(FakeLLMSettings.from_environment(), **{ k: v for k, v in overrides.items() if v is not None })
+    app      = create_fake_llm_app(FakeLLM(settings))
+
+    await uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning")).serve()
+
 @cli.group()
 async def webserver():
     pass
 
 @webserver.command()
 async def start():
+    import uvicorn
+
+    from .webserver.app import app
 
     host = os.getenv("WEB_HOST", "127.0.0.1")
     port = int(os.getenv("WEB_PORT", 5000))
@@ -156,5 +422,109 @@ async def start():
 
     await server.serve()
 
+@cli.group()
+async def bench():
+    pass
+
+@bench.command()
+@click.option('--sizes', default="1000,10000,100000", help="Comma separated bank sizes, in sentences.")
+@click.option('--repetitions', default=200, type=click.INT)
+@click.option('--output', required=False, type=click.Path(dir_okay=False), help="Also write the results as JSON.")
+async def lookups(sizes: str, repetitions: int, output: str):
+    import json
+
+    from .benchmarks.lookups import benchmark_lookups
+
+    results = await benchmark_lookups([int(size) for size in sizes.split(",")], repetitions=repetitions)
+
+    for result in results:
+        click.echo(str(result))
+
+    if output is not None:
+        with open(output, "w", encoding="utf-8") as output_file:
+            json.dump([result.as_dict() for result in results], output_file, indent=2)
+
+BENCHMARK_SUITES = ['generation', 'serving', 'bank', 'lookups']
+
+def report_regressions(results, baseline: str, tolerance: float):
+    from .benchmarks.results import compare, read_results
+
+    regressions = compare(results, read_results(baseline), tolerance)
+
+    for regression in regressions:
+        click.echo(f"Regression: {regression}")
+
+    if regressions:
+        raise click.ClickException(f"{len(regressions)} metrics regressed by more than {tolerance:.0%} against {baseline}.")
+
+    click.echo(f"{Style.BOLD}No regressions against {baseline}.{Style.RESET}")
+
+@bench.command('run')
+@click.option('--suites', default=",".join(BENCHMARK_SUITES), help="Comma separated, of " + ", ".join(BENCHMARK_SUITES) + ".")
+@click.option('--sizes', default="1000,10000,100000,1000000,10000000", help="Comma separated bank sizes, in sentences.")
+@click.option('--quantity', default=200, type=click.INT, help="Problems generated for each generation run.")
+@click.option('--requests', default=2000, type=click.INT, help="Requests timed for each endpoint.")
+@click.option('--concurrency', default=10, type=click.IntRange(min=1), help="Workers generating, or clients requesting, at once.")
+@click.option('--llm-latency-ms', type=click.FLOAT, help="Median latency of the fake LLM.  Defaults to FAKE_LLM_LATENCY_MS.")
+@click.option('--output', required=False, type=click.Path(dir_okay=False), help="Write the results as JSON.")
+@click.option('--baseline', required=False, type=click.Path(exists=True, dir_okay=False), help="Results to compare against.")
+@click.option('--tolerance', default=0.1, type=click.FLOAT, help="Relative change allowed before a metric counts as regressed.")
+async def run_benchmarks(suites: str, sizes: str, quantity: int, requests: int, concurrency: int, llm_latency_ms: float,
+                         output: str, baseline: str, tolerance: float):
+    #   Set before anything creates a client, so that every one of them is answered by the fake.
+    os.environ["FAKE_LLM"] = "true"
+
+    if llm_latency_ms is not None:
+        os.environ["FAKE_LLM_LATENCY_MS"] = str(llm_latency_ms)
+
+    from dataclasses import asdict
+
+    from .ai.fake import FakeLLMSettings
+    from .benchmarks.results import write_results
+
+    selected  = suites.split(",")
+    bank_size = [int(size) for size in sizes.split(",")]
+    unknown   = set(selected) - set(BENCHMARK_SUITES)
+
+    if unknown:
+        raise click.BadParameter(f"Unknown suites: {', '.join(sorted(unknown))}", param_hint="--suites")
+
+    results = []
+
+    if 'generation' in selected:
+        from .benchmarks.generation import benchmark_generation
+        results += await benchmark_generation(quantity, workers=concurrency)
+
+    if 'serving' in selected:
+        from .benchmarks.serving import benchmark_serving
+        results += await benchmark_serving(requests, concurrency=concurrency)
+
+    if 'bank' in selected:
+        from .benchmarks.bank import benchmark_bank
+        results += await benchmark_bank(bank_size)
+
+    if 'lookups' in selected:
+        from .benchmarks.lookups import benchmark_lookups
+        results += [result.as_result() for result in await benchmark_lookups(bank_size)]
+
+    for result in results:
+        click.echo(str(result))
+
+    if output is not None:
+        write_results(output, results, { "suites": selected, "sizes": bank_size, "quantity": quantity, "requests": requests,
+                                         "concurrency": concurrency, "fake_llm": asdict(FakeLLMSettings.from_environment()) })
+
+    if baseline is not None:
+        report_regressions(results, baseline, tolerance)
+
+@bench.command('compare')
+@click.argument('current', type=click.Path(exists=True, dir_okay=False))
+@click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+@click.option('--tolerance', default=0.1, type=click.FLOAT)
+async def compare_benchmarks(current: str, baseline: str, tolerance: float):
+    from .benchmarks.results import read_results
+
+    report_regressions(read_results(current), baseline, tolerance)
+
 def main():
     cli(_anyio_backend="asyncio")
@@ -0,0 +1,68 @@
+from dataclasses import replace
+
+import random
+
+from sqlalchemy import false, func, select, true
+from sqlalchemy.orm import aliased
+
+from lqconsole.database.engine import unit_of_work
+from lqconsole.sentences.database import SentenceFilters, sentence_sampler
+from lqconsole.sentences.models import Sentence
+
+INCORRECT_PER_PROBLEM = 3
+MATCHABLE_COLUMNS     = ["infinitive", "tense", "direct_object", "indirect_pronoun", "negation"]
+
+def problems_query(correct_ids: list[int], match: list[str], filters: SentenceFilters=SentenceFilters()):
+
+    #   For each correct sentence, three incorrect ones sharing the matched columns and meeting the same filters.  Random
+    #   order is only taken over one correct sentence's candidates, which matching on the infinitive keeps small and
+    #   the (infinitive, is_correct) index finds.
+    correct = aliased(Sentence, name="correct")
+    fixed   = { name: value for name, value in filters.filters().items() if name != "is_correct" and value is not None }
+
+    candidates = (select(Sentence)
+        .where(Sentence.is_correct == false(),
+               *[getattr(Sentence, name) == getattr(correct, name) for name in match],
+               *[getattr(Sentence, name) == value for name, value in fixed.items()])
+        .order_by(func.random())
+        .limit(INCORRECT_PER_PROBLEM)
+        .lateral("incorrect"))
+
+    incorrect = aliased(Sentence, candidates)
+
+    return (select(correct, incorrect)
+        .join(candidates, true())
+        .where(correct.id.in_(correct_ids)))
+
+async def get_bank_problems(quantity: int, filters: SentenceFilters=SentenceFilters(), match: list[str]=None) -> list[list[Sentence]]:
+
+    #   Problems are only built from sentences already stored: nothing is generated.  Fewer than asked for are returned
+    #   when the bank runs short.
+    match = ["infinitive"] if match is None else match
+    unknown = set(match) - set(MATCHABLE_COLUMNS)
+
+    if unknown:
+        raise ValueError(f"Cannot match problems on {', '.join(sorted(unknown))}")
+
+    if "infinitive" not in match:
+        raise ValueError("Problems must match on infinitive, along with any other columns")
+
+    async with unit_of_work() as session:
+
+        #   Some correct sentences may lack three matching incorrect ones, so pick a few extra.
+        correct_ids: list[int] = await sentence_sampler.sample(session, quantity * 2, **replace(filters, is_correct=True).filters())
+
+        if not correct_ids:
+            return []
+
+        problems: dict[int, list[Sentence]] = {}
+
+        for correct, incorrect in (await session.execute(problems_query(correct_ids, match, filters))).all():
+            problems.setdefault(correct.id, [correct]).append(incorrect)
+
+    complete: list[list[Sentence]] = [problem for problem in problems.values() if len(problem) == INCORRECT_PER_PROBLEM + 1]
+
+    for problem in complete:
+        random.shuffle(problem)
+
+    return complete[:quantity]
@@ -0,0 +1,175 @@
+# pylint: disable=import-outside-toplevel
+from asyncio import CancelledError, get_running_loop, wait
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AsyncExitStack, suppress
+from dataclasses import asdict, dataclass
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+
+from lqconsole.database.engine import PoolSettings
+from lqconsole.utils.queues import Progress, RetryPolicy, stream_operation
+
+#   Problem batches, in this process or split across several.  Each process has its own event loop, engine and OpenAI
+#   client, and they divide the account's rate limits between them.  Anything that creates a client is imported
+#   only once a process knows its share, since the shared limiter is built from the environment on first use.
+
+@dataclass
+class BatchOptions:
+
+    workers:           int   = 10
+    window:            int   = 2
+    retries:           int   = 0
+    batched:           bool  = False
+    buffered_writes:   bool  = False
+    write_batch_size:  int   = 500
+    progress_interval: float = 5.0
+    display:           bool  = True
+
+@dataclass
+class BatchStats:
+
+    generated:         int   = 0
+    failed:            int   = 0
+    elapsed:           float = 0.0
+    requests:          int   = 0        # Completions, over every client.
+    throttled:         int   = 0
+    checkouts:         int   = 0
+    peak_connections:  int   = 0
+    processes:         int   = 1
+
+    @property
+    def rate(self) -> float:
+        return self.generated / self.elapsed if self.elapsed > 0 else 0.0
+
+    @classmethod
+    def merged(cls, parts: list["BatchStats"]) -> "BatchStats":
+        #   The processes run side by side, so the batch takes as long as the slowest of them.
+        merged = cls(elapsed=max((part.elapsed for part in parts), default=0.0), processes=sum(part.processes for part in parts))
+
+        for name in ["generated", "failed", "requests", "throttled", "checkouts", "peak_connections"]:
+            setattr(merged, name, sum(getattr(part, name) for part in parts))
+
+        return merged
+
+    def __str__(self):
+        return (f"{self.generated} generated, {self.failed} failed in {self.elapsed:.1f}s ({self.rate:.2f}/s) over {self.processes} "
+                f"process{'es' if self.processes != 1 else ''}; {self.requests} completions, {self.throttled} throttled; "
+                f"{self.checkouts} connection checkouts, peak {self.peak_connections}")
+
+def split_quantity(quantity: int, processes: int) -> list[int]:
+    #   As even as possible, with the remainder going to the first processes.
+    share, remainder = divmod(quantity, processes)
+    return [share + (1 if index < remainder else 0) for index in range(processes)]
+
+def batch_stats(progress: Progress) -> BatchStats:
+    from lqconsole.ai.ratelimit import shared_rate_limiter
+    from lqconsole.database.engine import pool_statistics
+
+    limiter = shared_rate_limiter()
+    pool    = pool_statistics()
+
+    return BatchStats(
+        generated        = progress.completed - progress.failed,
+        failed           = progress.failed,
+        elapsed          = time.monotonic() - progress.started,
+        requests         = limiter.completed_requests,
+        throttled        = limiter.throttled_requests,
+        checkouts        = pool.checkouts,
+        peak_connections = pool.peak_checked_out)
+
+async def run_problem_batch(quantity: int, options: BatchOptions, progress: Progress):
+    from lqconsole.problems.create import create_random_problem
+    from lqconsole.sentences.writer import SentenceWriter
+
+    #   Problems are produced and forgotten as they finish, so memory stays flat whatever the quantity.
+    async with AsyncExitStack() as stack:
+        writer = await stack.enter_async_context(SentenceWriter(batch_size=options.write_batch_size)) if options.buffered_writes else None
+
+        async for result in stream_operation(range(quantity),
+                                             lambda _: create_random_problem(display=options.display, batched=options.batched, sentence_writer=writer),
+                                             workers=options.workers, window=options.window,
+                                             retry=RetryPolicy(attempts=options.retries + 1, backoff=1.0), progress=progress):
+            if not result.ok:
+                logging.warning("Problem %d failed after %d attempts: %s", result.index, result.attempts, result.error)
+
+    if writer is not None:
+        logging.info("%s: saved %s", progress.name or "Batch", writer)
+
+async def run_in_process(quantity: int, options: BatchOptions, pool: PoolSettings, progress: Progress, reported: list[BatchStats]):
+    from lqconsole.database import engine
+
+    await engine.configure_engine(**asdict(pool))
+
+    try:
+        await run_problem_batch(quantity, options, progress)
+    except Exception: # pylint: disable=broad-exception-caught
+        logging.exception("%s stopped early.", progress.name)
+    finally:
+        #   Counted before the engine is disposed, which replaces its pool.
+        reported.append(batch_stats(progress))
+        await engine.async_engine.dispose()
+
+def run_batch_process(index: int, processes: int, quantity: int, options: BatchOptions, pool: PoolSettings, pause_file: str) -> BatchStats:
+
+    #   The entry point of each worker process.  Ctrl-C reaches every process in the group, and each one still reports
+    #   what it finished.
+    os.environ["OPENAI_RATE_SHARE"]        = str(1.0 / processes)
+    os.environ["OPENAI_SHARED_PAUSE_FILE"] = pause_file
+
+    logging.basicConfig(level=logging.INFO)
+
+    progress = Progress(total=quantity, interval=options.progress_interval, name=f"Process {index + 1}")
+    reported: list[BatchStats] = []
+
+    try:
+        asyncio.run(run_in_process(quantity, options, pool, progress, reported))
+    except KeyboardInterrupt:
+        pass
+
+    return reported[0] if reported else BatchStats(failed=quantity)
+
+async def run_batch_processes(quantity: int, processes: int, options: BatchOptions, pool: PoolSettings, reported: list[BatchStats]):
+
+    #   Spawned rather than forked: a forked child would inherit the parent's engine, its pooled connections, and the
+    #   state of its event loop.  The merged statistics are appended to reported even when interrupted.
+    context = multiprocessing.get_context("spawn")
+    shares  = [share for share in split_quantity(quantity, processes) if share > 0]
+    loop    = get_running_loop()
+
+    if not shares:
+        reported.append(BatchStats(processes=0))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="lqconsole-") as directory, \
+         ProcessPoolExecutor(max_workers=len(shares), mp_context=context) as executor:
+
+        pause_file = os.path.join(directory, "openai-pause")
+        futures    = [loop.run_in_executor(executor, run_batch_process, index, len(shares), share, options, pool, pause_file)
+                      for index, share in enumerate(shares)]
+
+        try:
+            await wait(futures)
+        except CancelledError:
+            #   Ctrl-C reaches the processes as well, and each stops and reports what it finished.  Wait for them once
+            #   more, unless interrupted again.
+            with suppress(CancelledError):
+                await wait(futures)
+            raise
+        finally:
+            reported.append(BatchStats.merged([process_stats(index, share, future) for index, (share, future) in enumerate(zip(shares, futures))]))
+
+def process_stats(index: int, share: int, future) -> BatchStats:
+    if not future.done() or future.cancelled():
+        logging.error("Process %d did not report.", index + 1)
+        return BatchStats(failed=share)
+
+    if future.exception() is not None:
+        logging.error("Process %d failed: %s", index + 1, future.exception())
+        return BatchStats(failed=share)
+
+    return future.result()
@@ -1,41 +1,67 @@
 
-from asyncio import sleep
+from asyncio import create_task, gather
 
 import logging
 import random
-import traceback
 
 from typing import List
 
 from lqconsole.ai.client import AsyncChatGPTClient
 
-from lqconsole.sentences.create import create_sentence
+from lqconsole.sentences.create import SentenceSpec, create_sentence, create_sentences
 from lqconsole.sentences.models import DirectObject, IndirectPronoun, Negation, Sentence
 from lqconsole.sentences.utils import problem_formatter
+from lqconsole.sentences.writer import SentenceWriter
 
-async def create_random_problem_with_delay(openai_client: AsyncChatGPTClient=AsyncChatGPTClient(), display=True):
-    await create_random_problem(openai_client=openai_client, display=display)
-    await sleep(random.uniform(1.5, 2.0))
+async def create_problem_sentence(is_correct: bool, openai_client: AsyncChatGPTClient, attempts: int=3,
+                                  sentence_writer: SentenceWriter=None) -> Sentence:
 
-async def create_random_problem(openai_client: AsyncChatGPTClient=AsyncChatGPTClient(), display=False):
+    for attempt in range(1, attempts + 1):
+        try:
+            return await create_sentence("", "", "",
+                direct_object    = DirectObject.random,
+                indirect_pronoun = IndirectPronoun.random,
+                negation         = Negation.none if random.randint(0, 2) == 0 else Negation.random,
+                is_correct       = is_correct,
+                openai_client    = openai_client,
+                sentence_writer  = sentence_writer)
+        except Exception as ex: # pylint: disable=broad-exception-caught
+            if attempt == attempts:
+                raise ex
+            logging.warning("Sentence generation failed (attempt %d of %d), retrying: %s", attempt, attempts, ex)
 
-    #   This will generate all four sentences sequentially to start and be parallelized later.
+async def create_random_problem(openai_client: AsyncChatGPTClient=AsyncChatGPTClient(), display=False, attempts: int=3, batched: bool=False,
+                                sentence_writer: SentenceWriter=None):
+
+    #   All four sentences are generated concurrently under the client's shared rate limiter, or in a single completion
+    #   when batched.  Each sentence is retried on its own, so one bad response does not throw away the other three.
     answer: int = random.randrange(0, 4)
     openai_client: AsyncChatGPTClient = AsyncChatGPTClient() if openai_client is None else openai_client
 
-    responses: List[Sentence] = []
+    responses: List[Sentence] = [None] * 4
+
+    if batched:
+        try:
+            responses = await create_sentences([SentenceSpec.random(is_correct = i == answer) for i in range(4)], openai_client, sentence_writer)
+        except Exception as ex: # pylint: disable=broad-exception-caught
+            logging.warning("Batched problem generation failed, falling back to single sentences: %s", ex)
 
+    missing: List[int] = [i for i, response in enumerate(responses) if response is None]
+
+    tasks = [create_task(create_problem_sentence(is_correct = i == answer, openai_client = openai_client, attempts = attempts,
+                                                 sentence_writer = sentence_writer)) for i in missing]
+
+    #   Once one sentence has given up the problem has failed, so the others must not go on paying for and saving theirs.
     try:
-        for i in range(4):
-            # responses.append(await create_random_sentence(i is answer, openai_client))
-            responses.append(await create_sentence("", "", "",
-                direct_object    = DirectObject.random,
-                indirect_pronoun = IndirectPronoun.random,
-                negation         = Negation.none if random.randint(0, 2) == 0 else Negation.random, 
-                is_correct       = i is answer))
+        retried: List[Sentence] = await gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
+        raise
 
-    except Exception as ex:
-        logging.error(traceback.format_exc())
+    for i, sentence in zip(missing, retried):
+        responses[i] = sentence
 
     if display:
         print(problem_formatter(responses))
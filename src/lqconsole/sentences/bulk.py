@@ -0,0 +1,211 @@
+from asyncio import sleep
+from dataclasses import asdict, dataclass, field
+from os import makedirs, path, replace
+
+import json
+import logging
+import uuid
+
+from sqlalchemy import column, insert, select, table
+
+from lqconsole.ai.batch import BatchBackend, batch_request, batch_response_content
+
+from lqconsole.database.engine import unit_of_work
+
+from lqconsole.sentences.create import SentenceSpec, apply_generated_sentence, prepare_sentence
+from lqconsole.sentences.models import Sentence
+from lqconsole.sentences.prompts import SentencePromptGenerator
+from lqconsole.sentences.utils import clean_json_output
+
+#   Each stage records its completion in the job's manifest before the next one starts, so that a crashed or
+#   interrupted job can be re-run with the same directory and pick up where it left off.
+PREPARED   = "prepared"
+SUBMITTING = "submitting"
+SUBMITTED  = "submitted"
+COMPLETED  = "completed"
+INGESTED   = "ingested"
+
+REQUESTS_FILE  = "requests.jsonl"
+SENTENCES_FILE = "sentences.jsonl"
+RESULTS_FILE   = "results.jsonl"
+MANIFEST_FILE  = "manifest.json"
+
+bulk_ingests = table("bulk_ingests", column("batch_id"), column("ingested"), column("failed"))
+
+@dataclass
+class BulkJob:
+
+    directory: str
+    stage:     str  = None
+    quantity:  int  = 0
+    key:       str  = None      # Names the job's batch to the backend, in case its id is never recorded.
+    batch_id:  str  = None
+    ingested:  int  = 0
+    failed:    int  = 0
+    history:   list = field(default_factory=list)
+
+    def filename(self, name: str) -> str:
+        return path.join(self.directory, name)
+
+    @classmethod
+    def load(cls, directory: str) -> "BulkJob":
+        manifest = path.join(directory, MANIFEST_FILE)
+
+        if not path.exists(manifest):
+            return cls(directory=directory)
+
+        with open(manifest, encoding="utf-8") as manifest_file:
+            return cls(directory=directory, **json.load(manifest_file))
+
+    def save(self, stage: str):
+        self.stage = stage
+        self.history.append(stage)
+
+        manifest = self.filename(MANIFEST_FILE)
+        contents = { k: v for k, v in asdict(self).items() if k != "directory" }
+
+        with open(manifest + ".tmp", "w", encoding="utf-8") as manifest_file:
+            json.dump(contents, manifest_file, indent=2)
+
+        replace(manifest + ".tmp", manifest)
+
+def serialize_sentence(sentence: Sentence) -> dict:
+    return {
+        "infinitive": sentence.infinitive,
+        "auxiliary":  sentence.auxiliary,
+        "pronoun":    str(sentence.pronoun),
+        "tense":      str(sentence.tense),
+        "is_correct": sentence.is_correct
+    }
+
+async def prepare_bulk_job(job: BulkJob, quantity: int, correct_ratio: float=0.25, model: str="gpt-4o"):
+
+    makedirs(job.directory, exist_ok=True)
+
+    generator: SentencePromptGenerator = SentencePromptGenerator()
+    correct_count: int = round(quantity * correct_ratio)
+
+    async with unit_of_work():
+        with open(job.filename(REQUESTS_FILE), "w", encoding="utf-8") as requests_file, \
+             open(job.filename(SENTENCES_FILE), "w", encoding="utf-8") as sentences_file:
+
+            for i in range(quantity):
+                sentence: Sentence = await prepare_sentence(SentenceSpec.random(is_correct = i < correct_count))
+                custom_id: str = f"sentence-{i}"
+
+                requests_file.write(json.dumps(batch_request(custom_id, generator.generate_sentence_prompt(sentence), model=model)) + "\n")
+                sentences_file.write(json.dumps({ "custom_id": custom_id, **serialize_sentence(sentence) }) + "\n")
+
+    job.quantity = quantity
+    job.save(PREPARED)
+
+    logging.info("Prepared %d generation requests in %s", quantity, job.directory)
+
+async def submit_bulk_job(job: BulkJob, backend: BatchBackend):
+
+    #   The key is recorded before submitting.  A job that stopped before it could record the batch id looks the batch
+    #   up by its key on resume, and only submits if there is none.
+    if job.stage == SUBMITTING:
+        job.batch_id = await backend.find(job.key)
+
+        if job.batch_id is not None:
+            logging.info("Found batch %s, submitted before the job was interrupted", job.batch_id)
+    else:
+        job.key = job.key or f"bulk-{uuid.uuid4().hex}"
+        job.save(SUBMITTING)
+
+    if job.batch_id is None:
+        job.batch_id = await backend.submit(job.filename(REQUESTS_FILE), job.key)
+        logging.info("Submitted batch %s", job.batch_id)
+
+    job.save(SUBMITTED)
+
+async def poll_bulk_job(job: BulkJob, backend: BatchBackend, poll_interval: float=60.0):
+
+    while True:
+        status = await backend.status(job.batch_id)
+        logging.info("Batch %s is %s (%d/%d completed, %d failed)", job.batch_id, status.state, status.completed, status.total, status.failed)
+
+        if status.is_finished:
+            break
+
+        await sleep(poll_interval)
+
+    if status.state != "completed":
+        raise RuntimeError(f"Batch {job.batch_id} finished as {status.state}")
+
+    await backend.download(job.batch_id, job.filename(RESULTS_FILE))
+    job.save(COMPLETED)
+
+def read_bulk_results(job: BulkJob) -> tuple[list[Sentence], int]:
+
+    prepared: dict[str, dict] = {}
+
+    with open(job.filename(SENTENCES_FILE), encoding="utf-8") as sentences_file:
+        for line in sentences_file:
+            if line.strip():
+                record = json.loads(line)
+                prepared[record.pop("custom_id")] = record
+
+    sentences: list[Sentence] = []
+    failed: int = 0
+
+    with open(job.filename(RESULTS_FILE), encoding="utf-8") as results_file:
+        for line in results_file:
+            if not line.strip():
+                continue
+
+            result  = json.loads(line)
+            content = batch_response_content(result)
+            record  = prepared.get(result.get("custom_id"))
+
+            try:
+                if content is None or record is None:
+                    raise ValueError(f"No usable result for {result.get('custom_id')}")
+
+                sentence = Sentence(**record)
+                sentences.append(apply_generated_sentence(sentence, clean_json_output(content)))
+            except (KeyError, TypeError, ValueError) as ex:
+                logging.warning("Skipping bulk result: %s", ex)
+                failed += 1
+
+    return sentences, failed
+
+async def ingest_bulk_job(job: BulkJob):
+
+    sentences, failed = read_bulk_results(job)
+
+    #   One transaction for the whole file and its marker, so that the batch is either ingested with the marker or
+    #   not at all.  A resume that finds the marker only has the manifest left to update.
+    async with unit_of_work() as session:
+        marker = (await session.execute(select(bulk_ingests.c.ingested, bulk_ingests.c.failed)
+                                        .where(bulk_ingests.c.batch_id == job.batch_id))).first()
+
+        if marker is None:
+            session.add_all(sentences)
+            await session.execute(insert(bulk_ingests).values(batch_id=job.batch_id, ingested=len(sentences), failed=failed))
+        else:
+            logging.info("Batch %s was ingested before the job was interrupted", job.batch_id)
+
+    job.ingested, job.failed = (len(sentences), failed) if marker is None else tuple(marker)
+    job.save(INGESTED)
+
+    logging.info("Ingested %d sentences (%d failed) from batch %s", job.ingested, failed, job.batch_id)
+
+async def run_bulk_job(directory: str, backend: BatchBackend, quantity: int=0, poll_interval: float=60.0) -> BulkJob:
+
+    job: BulkJob = BulkJob.load(directory)
+
+    if job.stage is None:
+        await prepare_bulk_job(job, quantity)
+
+    if job.stage in (PREPARED, SUBMITTING):
+        await submit_bulk_job(job, backend)
+
+    if job.stage == SUBMITTED:
+        await poll_bulk_job(job, backend, poll_interval)
+
+    if job.stage == COMPLETED:
+        await ingest_bulk_job(job)
+
+    return job
@@ -1,20 +1,129 @@
+from dataclasses import dataclass
 from json.decoder import JSONDecodeError
 
+import json
 import logging
 import random
 
 from lqconsole.ai.client import AsyncChatGPTClient
 
-from lqconsole.database.engine import get_async_session
+from lqconsole.database.engine import unit_of_work
 
-from lqconsole.sentences.database import save_sentence
+from lqconsole.sentences.database import save_sentence, save_sentences
 from lqconsole.sentences.models import Pronoun, DirectObject, IndirectPronoun, Negation, Sentence
 from lqconsole.sentences.prompts import SentencePromptGenerator
 from lqconsole.sentences.utils import clean_json_output
+from lqconsole.sentences.writer import SentenceWriter
+from lqconsole.sentences.validator import LocalValidation, Verdict, validate_locally
 
-from lqconsole.verbs.get import get_random_verb, get_verb
+from lqconsole.verbs.catalog import get_verb_catalog
+from lqconsole.verbs.get import get_conjugation, get_random_verb, get_verb
 from lqconsole.verbs.models import Tense, Verb
 
+@dataclass
+class SentenceSpec:
+
+    verb_infinitive:  str             = ""                      # An empty infinitive picks a random verb.
+    pronoun:          Pronoun         = None                    # Pronoun and tense are random unless given.
+    tense:            Tense           = None
+    direct_object:    DirectObject    = DirectObject.none
+    indirect_pronoun: IndirectPronoun = IndirectPronoun.none
+    negation:         Negation        = Negation.none
+    is_correct:       bool            = True
+
+    @classmethod
+    def random(cls, is_correct: bool=True):
+        return cls(
+            direct_object    = DirectObject.random,
+            indirect_pronoun = IndirectPronoun.random,
+            negation         = Negation.none if random.randint(0, 2) == 0 else Negation.random,
+            is_correct       = is_correct)
+
+async def prepare_sentence(spec: SentenceSpec) -> Sentence:
+
+    verb: Verb = None
+
+    if spec.verb_infinitive == "":
+        #   Weighted by corpus frequency, without a database round trip.  The catalog is only empty on a fresh database.
+        verb = (await get_verb_catalog()).sample() or await get_random_verb()
+    else:
+        verb = await get_verb(requested_verb=spec.verb_infinitive)
+
+    sentence = Sentence()
+
+    # Sentence basics:
+    sentence.infinitive = verb.infinitive
+    sentence.auxiliary  = verb.auxiliary
+    sentence.pronoun    = spec.pronoun if isinstance(spec.pronoun, Pronoun) else random.choice(list(Pronoun))
+    sentence.tense      = spec.tense if isinstance(spec.tense, Tense) else random.choice([t for t in Tense if t is not Tense.participle])
+    sentence.is_correct = spec.is_correct
+
+    # Sentence features.  These may be overwritten by the response json.  (Always will for 'random'.)
+    sentence.direct_object    = spec.direct_object
+    sentence.indirect_pronoun = spec.indirect_pronoun
+    sentence.negation         = spec.negation
+
+    return sentence
+
+def apply_generated_sentence(sentence: Sentence, response_json: dict) -> Sentence:
+
+    sentence.content     = response_json["sentence"]
+    sentence.translation = response_json["translation"]
+
+    # The Promptable extension requires the full base enum name so we have to do this here.  That can be changed later.
+    sentence.tense   = str(sentence.tense)
+    sentence.pronoun = str(sentence.pronoun)
+
+    sentence.negation          = response_json["negation"]
+    sentence.direct_object     = response_json["direct_object"]
+    sentence.indirect_pronoun  = response_json["indirect_pronoun"]
+    sentence.reflexive_pronoun = "none" # Temporarily set this to none to not break things before removed, unless kept.
+
+    return sentence
+
+async def correct_sentence(sentence: Sentence, generator: SentencePromptGenerator, openai_client: AsyncChatGPTClient) -> Sentence:
+
+    logging.debug(f"Sentence {sentence.content} is not well formed, and will be updated.")
+    correction = await openai_client.handle_request(prompt=generator.correct_sentence_prompt(sentence))
+
+    try:
+        correction_json = clean_json_output(correction)
+    except JSONDecodeError as ex:
+        logging.error(f"Unable to decode json response: {correction}")
+        raise ex
+
+    sentence.content     = correction_json["corrected_sentence"]
+    sentence.translation = correction_json["corrected_translation"]
+
+    logging.debug(f"Sentence was updated to '{sentence.content}'")
+
+    return sentence
+
+async def validate_sentence_locally(sentence: Sentence) -> LocalValidation:
+    conjugation = await get_conjugation(sentence.infinitive, str(sentence.tense))
+    return validate_locally(sentence.content, str(sentence.pronoun), str(sentence.negation), conjugation)
+
+async def is_well_formed(sentence: Sentence, generator: SentencePromptGenerator, openai_client: AsyncChatGPTClient) -> bool:
+
+    #   The local checks settle most sentences.  The LLM is only asked when they cannot.
+    local_validation: LocalValidation = await validate_sentence_locally(sentence)
+
+    if local_validation.verdict is not Verdict.inconclusive:
+        logging.debug(f"Checked '{sentence.content}' locally: {local_validation.verdict} {local_validation.reasons}")
+        return local_validation.verdict is Verdict.valid
+
+    correctness_response = await openai_client.handle_request(prompt=generator.validate_french_sentence_prompt(sentence))
+    return correctness_response.strip() == "True"
+
+def parse_validation_results(response: str, count: int) -> list[bool]:
+
+    results = clean_json_output(response)
+
+    if not isinstance(results, list) or len(results) != count:
+        raise ValueError(f"Expected {count} validation results: {response}")
+
+    return [result is True or str(result).strip() == "True" for result in results]
+
 async def create_sentence(verb_infinitive:  str,
                           pronoun:          Pronoun         = Pronoun.first_person,   # Pronoun and tense will remain both random
                           tense:            Tense           = Tense.present,          # and correct for now.  These values will be
@@ -22,84 +131,123 @@ async def create_sentence(verb_infinitive:  str,
                           indirect_pronoun: IndirectPronoun = IndirectPronoun.none,
                           negation:         Negation        = Negation.none,
                           is_correct:       bool            = True,                   # This cannot be guaranteed until the AI has responded.
-                          openai_client: AsyncChatGPTClient = AsyncChatGPTClient()):
+                          openai_client: AsyncChatGPTClient = AsyncChatGPTClient(),
+                          sentence_writer:  SentenceWriter  = None):
 
-    async with get_async_session() as db_session:
+    #   Each database step borrows a connection only for itself.  None is held while waiting on the LLM.
+    sentence: Sentence = await prepare_sentence(SentenceSpec(
+        verb_infinitive  = verb_infinitive,
+        direct_object    = direct_object,
+        indirect_pronoun = indirect_pronoun,
+        negation         = negation,
+        is_correct       = is_correct))
 
-        verb: Verb = None
+    generator: SentencePromptGenerator = SentencePromptGenerator()
 
-        if verb_infinitive == "":
-            verb = await get_random_verb(database_session=db_session)
-        else:
-            verb = await get_verb(requested_verb=verb_infinitive, database_session=db_session)
+    prompt:   str = generator.generate_sentence_prompt(sentence)
 
-        sentence = Sentence()
+    logging.debug(prompt)
 
-        # Sentence basics:
-        sentence.infinitive = verb.infinitive
-        sentence.auxiliary  = verb.auxiliary
-        sentence.pronoun    = random.choice(list(Pronoun))
-        sentence.tense      = random.choice([t for t in Tense if t is not Tense.participle])
-        sentence.is_correct = is_correct
+    response: str = await openai_client.handle_request(prompt=prompt, use_cache=False)
 
-        # Sentence features.  These may be overwritten by the response json.  (Always will for 'random'.)
-        sentence.direct_object    = direct_object
-        sentence.indirect_pronoun = indirect_pronoun
-        sentence.negation         = negation
+    try:
+        response_json = clean_json_output(response)
+    except JSONDecodeError as ex:
+        logging.error(f"Unable to decode json response: {response}")
+        raise ex
 
-        generator: SentencePromptGenerator = SentencePromptGenerator()
+    apply_generated_sentence(sentence, response_json)
 
-        prompt:   str = generator.generate_sentence_prompt(sentence)
+    # If a sentence is supposed to be correct, double check it, as the prompts to generate it are overly complicated right now.
+    if is_correct:
 
-        logging.debug(prompt)
+        is_actually_correct: bool = await is_well_formed(sentence, generator, openai_client)
 
-        response: str = await openai_client.handle_request(prompt=prompt)
+        logging.debug(f"Checked that '{sentence.content}' is well formed: {is_actually_correct}")
 
-        try:
-            response_json = clean_json_output(response)
-        except JSONDecodeError as ex:
-            logging.error(f"Unable to decode json response: {response}")
-            raise ex
+        if is_actually_correct == False:
+            await correct_sentence(sentence, generator, openai_client)
 
-        sentence.content     = response_json["sentence"]
-        sentence.translation = response_json["translation"]
+    if sentence_writer is not None:
+        await sentence_writer.add(sentence)
+    else:
+        await save_sentence(sentence=sentence)
 
-        # The Promptable extension requires the full base enum name so we have to do this here.  That can be changed later.
-        sentence.tense   = str(sentence.tense)
-        sentence.pronoun = str(sentence.pronoun)
+    return sentence
 
-        sentence.negation          = response_json["negation"]
-        sentence.direct_object     = response_json["direct_object"]
-        sentence.indirect_pronoun  = response_json["indirect_pronoun"]
-        sentence.reflexive_pronoun = "none" # Temporarily set this to none to not break things before removed, unless kept.
+async def create_sentences(specs: list[SentenceSpec], openai_client: AsyncChatGPTClient=AsyncChatGPTClient(),
+                           sentence_writer: SentenceWriter=None) -> list[Sentence]:
 
-        # If a sentence is supposed to be correct, double check it, as the prompts to generate it are overly complicated right now.
-        if is_correct:
+    #   Generates every sentence in one completion, and validates the correct ones in a second.  Any sentence missing from,
+    #   or malformed in, the batched response is left as None for the caller to retry on its own.
+    async with unit_of_work():
+        sentences: list[Sentence] = [await prepare_sentence(spec) for spec in specs]
 
-            correctness_response = await openai_client.handle_request(prompt=generator.validate_french_sentence_prompt(sentence))
-            is_actually_correct: bool = correctness_response.strip() == "True"
+    generator: SentencePromptGenerator = SentencePromptGenerator()
 
-            logging.debug(f"Checked that '{sentence.content}' is well formed: {is_actually_correct}")
+    prompt:   str = generator.generate_sentences_prompt(sentences)
 
-            if is_actually_correct == False:
+    logging.debug(prompt)
 
-                logging.debug(f"Sentence {sentence.content} is not well formed, and will be updated.")
-                correction = await openai_client.handle_request(prompt=generator.correct_sentence_prompt(sentence))
+    response: str = await openai_client.handle_request(prompt=prompt, use_cache=False)
 
-                try:
-                    correction_json = clean_json_output(correction)
-                except JSONDecodeError as ex:
-                    logging.error(f"Unable to decode json response: {correction}")
-                    raise ex
+    try:
+        response_json = clean_json_output(response)
+    except ValueError:
+        logging.error(f"Unable to decode json response: {response}")
+        response_json = []
 
-                sentence.content     = correction_json["corrected_sentence"]
-                sentence.translation = correction_json["corrected_translation"]
+    generated: list[Sentence] = [None] * len(sentences)
 
-                logging.debug(f"Sentence was updated to '{sentence.content}'")
+    for position, item in enumerate(response_json if isinstance(response_json, list) else []):
+        try:
+            index: int = int(item.get("index", position))
+            if 0 <= index < len(sentences) and generated[index] is None:
+                generated[index] = apply_generated_sentence(sentences[index], item)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            logging.error(f"Malformed sentence in batched response: {json.dumps(item)}")
 
-        await save_sentence(sentence=sentence)
+    to_check: list[int] = [i for i, sentence in enumerate(generated) if sentence is not None and sentence.is_correct]
+    results: dict[int, bool] = {}
+
+    for i in to_check:
+        local_validation: LocalValidation = await validate_sentence_locally(generated[i])
+
+        if local_validation.verdict is not Verdict.inconclusive:
+            results[i] = local_validation.verdict is Verdict.valid
+
+    to_validate: list[int] = [i for i in to_check if i not in results]
+
+    if to_validate:
+        validation_response = await openai_client.handle_request(
+            prompt=generator.validate_french_sentences_prompt([generated[i] for i in to_validate]))
+
+        try:
+            validation_results = parse_validation_results(validation_response, len(to_validate))
+        except ValueError:
+            logging.error(f"Unable to decode validation response: {validation_response}")
+            validation_results = [False] * len(to_validate)
+
+        results.update(zip(to_validate, validation_results))
+
+    for i, is_actually_correct in sorted(results.items()):
+        logging.debug(f"Checked that '{generated[i].content}' is well formed: {is_actually_correct}")
+
+        if is_actually_correct is False:
+            try:
+                await correct_sentence(generated[i], generator, openai_client)
+            except (KeyError, ValueError):
+                logging.error(f"Unable to correct '{generated[i].content}'")
+                generated[i] = None
+
+    saved: list[Sentence] = [sentence for sentence in generated if sentence is not None]
+
+    if sentence_writer is not None:
+        await sentence_writer.add_all(saved)
+    elif saved:
+        await save_sentences(saved)
 
-        return sentence
+    return generated
 
 async def create_random_sentence(is_correct: bool=True, openai_client: AsyncChatGPTClient=AsyncChatGPTClient()):
 
@@ -1,11 +1,39 @@
 
-from lqconsole.database.engine import get_async_session
+from dataclasses import asdict, dataclass
+
+from lqconsole.database.engine import unit_of_work
+from lqconsole.database.sampling import IdSampler
 
 from .models import Pronoun, DirectObject, IndirectPronoun, Negation, Sentence
 from lqconsole.verbs.models import Tense
 
 from sqlalchemy import select
-from sqlalchemy.sql.expression import func
+
+@dataclass(frozen=True)
+class SentenceFilters:
+
+    #   Stored values to match sentences on.
+    infinitive:       str  = None       # None matches any value.
+    tense:            str  = None
+    direct_object:    str  = None
+    indirect_pronoun: str  = None
+    negation:         str  = None
+    is_correct:       bool = True
+
+    @classmethod
+    def parse(cls, infinitive: str=None, tense: str=None, direct_object: str=None, indirect_pronoun: str=None,
+              negation: str=None, is_correct: bool=True) -> "SentenceFilters":
+
+        for value, enum_class in ((tense, Tense), (direct_object, DirectObject), (indirect_pronoun, IndirectPronoun), (negation, Negation)):
+            if value is not None and (value not in enum_class.__members__ or value == "random"):
+                raise ValueError(f"Unknown {enum_class.__name__} '{value}'")
+
+        return cls(infinitive or None, tense, direct_object, indirect_pronoun, negation, is_correct)
+
+    def filters(self) -> dict:
+        return asdict(self)
+
+sentence_sampler: IdSampler = IdSampler("sentences", ["infinitive", "is_correct", "tense", "direct_object", "indirect_pronoun", "negation"])
 
 async def get_random_sentence(
                     quantity:         int,
@@ -17,19 +45,33 @@ async def get_random_sentence(
                     negation:         Negation        = Negation.none,
                     is_correct:       bool            = True):                   # This cannot be guaranteed until the AI has responded.
 
-    async with get_async_session() as session:
+    #   An empty infinitive, as the CLI defaults to, matches any verb.
+    return await sample_sentences(quantity,
+        infinitive = verb_infinitive if verb_infinitive else None,
+        is_correct = is_correct)
+
+async def sample_sentences(quantity: int, **filters) -> list[Sentence]:
+
+    #   Filters are sentence columns the sampler knows, compared with their stored values.  None matches anything.
+    async with unit_of_work() as session:
+
+        ids: list[int] = await sentence_sampler.sample(session, quantity, **filters)
 
-        stmt = (
-            select(Sentence)
-                .where(Sentence.infinitive == verb_infinitive)
-                .where(Sentence.is_correct == is_correct)
-                .order_by(func.random())
-                .limit(quantity)
-        )
+        if not ids:
+            return []
 
-        return await session.scalars(stmt)
+        sentences: list[Sentence] = list(await session.scalars(select(Sentence).where(Sentence.id.in_(ids))))
+
+        if len(sentences) < len(ids):
+            for missing_id in set(ids) - {sentence.id for sentence in sentences}:
+                sentence_sampler.discard(missing_id)
+
+        return sentences
 
 async def save_sentence(sentence: Sentence):
-    async with get_async_session() as session:
+    async with unit_of_work() as session:
         session.add(sentence)
-        await session.commit()
+
+async def save_sentences(sentences: list[Sentence]):
+    async with unit_of_work() as session:
+        session.add_all(sentences)
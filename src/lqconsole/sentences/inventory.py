@@ -0,0 +1,185 @@
+from asyncio import Queue, Task, create_task, gather, sleep
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from os import environ
+
+import logging
+import math
+
+from sqlalchemy import func, select
+
+from lqconsole.ai.client import AsyncChatGPTClient
+from lqconsole.database.engine import unit_of_work
+from lqconsole.sentences.create import SentenceSpec, create_sentences
+from lqconsole.sentences.database import SentenceFilters, sample_sentences
+from lqconsole.sentences.models import DirectObject, IndirectPronoun, Negation, Sentence
+from lqconsole.verbs.get import get_verb
+from lqconsole.verbs.models import Tense
+
+#   Keeps enough stored sentences in every bucket of filters that is asked for, so that requests are answered from the table
+#   and the LLM is only called inline when a bucket is empty.  Sentences are not used up by serving them; the stock
+#   is how many there are to pick from.
+
+def refill_spec(key: SentenceFilters) -> SentenceSpec:
+    #   Anything the filters leave open is left to chance, so that refills spread over what they match.
+    return SentenceSpec(
+        verb_infinitive  = key.infinitive or "",
+        tense            = Tense[key.tense] if key.tense else None,
+        direct_object    = DirectObject[key.direct_object] if key.direct_object else DirectObject.random,
+        indirect_pronoun = IndirectPronoun[key.indirect_pronoun] if key.indirect_pronoun else IndirectPronoun.random,
+        negation         = Negation[key.negation] if key.negation else Negation.random,
+        is_correct       = key.is_correct)
+
+async def count_stock(keys: list[SentenceFilters]) -> dict[SentenceFilters, int]:
+
+    #   One round trip, with one indexed count per bucket.
+    if not keys:
+        return {}
+
+    columns = Sentence.__table__.c
+    counts  = [
+        select(func.count()) # pylint: disable=not-callable
+            .select_from(Sentence.__table__)
+            .where(*[columns[name] == value for name, value in key.filters().items() if value is not None])
+            .scalar_subquery()
+        for key in keys]
+
+    async with unit_of_work() as session:
+        row = (await session.execute(select(*counts))).one()
+
+    return dict(zip(keys, row))
+
+@dataclass
+class InventoryStats:
+
+    served_from_stock: int = 0
+    served_inline:     int = 0
+    refilled:          int = 0
+    refill_failures:   int = 0
+
+class SentenceInventory:
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, target: int=20, low_water: int=5, refill_batch: int=5, workers: int=2, interval: float=30.0,
+                 max_buckets: int=256, openai_client: AsyncChatGPTClient=None):
+        self.target        = target
+        self.low_water     = low_water
+        self.refill_batch  = refill_batch
+        self.workers       = workers
+        self.interval      = interval
+        self.max_buckets   = max_buckets
+        self.openai_client = openai_client
+
+        self.buckets: OrderedDict[SentenceFilters, int] = OrderedDict()    # Last counted stock, most recently asked for last.
+        self.queue:   Queue                             = Queue()
+        self.queued:  set[SentenceFilters]              = set()
+        self.tasks:   list[Task]                        = []
+        self.stats:   InventoryStats                    = InventoryStats()
+
+    @classmethod
+    def from_environment(cls) -> "SentenceInventory":
+        return cls(
+            target       = int(environ.get("SENTENCE_STOCK_TARGET", 20)),
+            low_water    = int(environ.get("SENTENCE_STOCK_LOW_WATER", 5)),
+            refill_batch = int(environ.get("SENTENCE_REFILL_BATCH", 5)),
+            workers      = int(environ.get("SENTENCE_REFILL_WORKERS", 2)),
+            interval     = float(environ.get("SENTENCE_STOCK_INTERVAL", 30)))
+
+    def track(self, key: SentenceFilters):
+        self.buckets.setdefault(key, None)
+        self.buckets.move_to_end(key)
+
+        while len(self.buckets) > self.max_buckets:
+            self.buckets.popitem(last=False)
+
+    def request_refill(self, key: SentenceFilters):
+        if key not in self.queued:
+            self.queued.add(key)
+            self.queue.put_nowait(key)
+
+    async def take(self, key: SentenceFilters) -> Sentence | None:
+
+        #   Checked before sampling, since the sampler keeps ids for every distinct set of filters it is asked for.
+        #   Tracked buckets have been checked already.
+        if key.infinitive is not None and key not in self.buckets and await get_verb(key.infinitive) is None:
+            raise LookupError(f"Unknown verb '{key.infinitive}'")
+
+        sentences: list[Sentence] = await sample_sentences(1, **key.filters())
+
+        if sentences:
+            self.track(key)
+            self.stats.served_from_stock += 1
+            return sentences[0]
+
+        #   An empty bucket: answer this request directly, and stock the bucket behind it.
+        self.track(key)
+        self.request_refill(key)
+        self.stats.served_inline += 1
+
+        return (await create_sentences([refill_spec(key)], self.__client()))[0]
+
+    async def check(self):
+        for key, stock in (await count_stock(list(self.buckets))).items():
+            if key in self.buckets:
+                self.buckets[key] = stock
+
+            if stock < self.low_water:
+                self.request_refill(key)
+
+    async def refill(self, key: SentenceFilters):
+
+        stock:   int = (await count_stock([key]))[key]
+        missing: int = self.target - stock
+
+        for _ in range(math.ceil(max(0, missing) / self.refill_batch)):
+            quantity  = min(self.refill_batch, missing)
+            generated = [sentence for sentence in await create_sentences([refill_spec(key)] * quantity, self.__client()) if sentence is not None]
+
+            self.stats.refilled += len(generated)
+            missing -= quantity
+
+        logging.debug("Refilled %s from %d towards %d sentences.", key, stock, self.target)
+
+    def __client(self) -> AsyncChatGPTClient:
+        if self.openai_client is None:
+            self.openai_client = AsyncChatGPTClient()
+        return self.openai_client
+
+    async def __monitor(self):
+        while True:
+            try:
+                await self.check()
+            except Exception: # pylint: disable=broad-exception-caught
+                logging.exception("Unable to count the sentence stock.")
+
+            await sleep(self.interval)
+
+    async def __refill(self):
+        while True:
+            key: SentenceFilters = await self.queue.get()
+
+            try:
+                await self.refill(key)
+            except Exception: # pylint: disable=broad-exception-caught
+                self.stats.refill_failures += 1
+                logging.exception("Unable to refill sentences for %s.", key)
+            finally:
+                self.queued.discard(key)
+
+    async def start(self):
+        self.tasks = [create_task(self.__monitor())] + [create_task(self.__refill()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+
+        await gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def report(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "buckets": len(self.buckets),
+            "refills_queued": len(self.queued),
+            "low": [asdict(key) | { "stock": stock } for key, stock in self.buckets.items() if stock is not None and stock < self.low_water],
+        }
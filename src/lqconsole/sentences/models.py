@@ -1,9 +1,11 @@
 from enum import auto
 
+from sqlalchemy import Boolean, Column, Integer, String, true
 from sqlalchemy.ext.asyncio import AsyncAttrs
 
 from lqconsole.database.metadata import Base
-from lqconsole.database.utils import DatabaseStringEnum
+from lqconsole.database.utils import DatabaseStringEnum, database_enum
+from lqconsole.verbs.models import Tense
 
 from lqconsole.utils.prompt_enum import PromptEnum
 
@@ -49,3 +51,15 @@ class Negation(DatabaseStringEnum, PromptEnum):
 
 class Sentence(AsyncAttrs, Base): # pylint: disable=too-few-public-methods
     __tablename__ = "sentences"
+
+    id               = Column(Integer, primary_key=True)
+    infinitive       = Column(String(), nullable=False)
+    auxiliary        = Column(String(), nullable=False)
+    pronoun          = Column(database_enum(Pronoun, "pronoun"), nullable=False)
+    tense            = Column(database_enum(Tense, "tense"), nullable=False)
+    direct_object    = Column(database_enum(DirectObject, "direct_object"), nullable=False)
+    indirect_pronoun = Column(database_enum(IndirectPronoun, "indirect_pronoun"), nullable=False)
+    negation         = Column(database_enum(Negation, "negation"), nullable=False)
+    content          = Column(String(), nullable=False)
+    translation      = Column(String(), nullable=False)
+    is_correct       = Column(Boolean, default=True, server_default=true())
@@ -0,0 +1,96 @@
+from asyncio import create_task, sleep
+from json.decoder import JSONDecodeError
+
+import logging
+import random
+
+from lqconsole.ai.client import AsyncChatGPTClient
+
+from lqconsole.sentences.create import SentenceSpec, apply_generated_sentence, correct_sentence, is_well_formed, prepare_sentence
+from lqconsole.sentences.models import Sentence
+from lqconsole.sentences.prompts import SentencePromptGenerator
+from lqconsole.sentences.utils import clean_json_output
+from lqconsole.sentences.writer import SentenceWriter
+
+from lqconsole.utils.queues import PipelineStage
+
+class SentencePipeline:
+    # pylint: disable=too-many-instance-attributes, too-many-arguments
+
+    #   The same steps as create_sentence (generate, validate, correct, save) as separate stages joined by bounded
+    #   queues, so that a bulk run keeps every stage busy at once.  Database writes are batched at the tail by a
+    #   SentenceWriter.
+    def __init__(self,
+                 openai_client: AsyncChatGPTClient = None,
+                 generators:    int                = 8,
+                 validators:    int                = 4,
+                 correctors:    int                = 2,
+                 queue_size:    int                = 32,
+                 save_batch:    int                = 50):
+
+        self.openai_client = AsyncChatGPTClient() if openai_client is None else openai_client
+        self.generator     = SentencePromptGenerator()
+        self.writer        = SentenceWriter(batch_size=save_batch)
+
+        self.generate = PipelineStage("generate", self.__generate, generators, queue_size)
+        self.validate = PipelineStage("validate", self.__validate, validators, queue_size)
+        self.correct  = PipelineStage("correct",  self.__correct,  correctors, queue_size)
+        self.save     = PipelineStage("save",     self.__save,     1,          queue_size)
+
+        self.stages: list[PipelineStage] = [self.generate, self.validate, self.correct, self.save]
+
+    async def __generate(self, spec: SentenceSpec):
+        sentence: Sentence = await prepare_sentence(spec)
+
+        response: str = await self.openai_client.handle_request(prompt=self.generator.generate_sentence_prompt(sentence), use_cache=False)
+
+        try:
+            response_json = clean_json_output(response)
+        except JSONDecodeError as ex:
+            logging.error(f"Unable to decode json response: {response}")
+            raise ex
+
+        await self.validate.put(apply_generated_sentence(sentence, response_json))
+
+    async def __validate(self, sentence: Sentence):
+        if sentence.is_correct and not await is_well_formed(sentence, self.generator, self.openai_client):
+            await self.correct.put(sentence)
+            return
+
+        await self.save.put(sentence)
+
+    async def __correct(self, sentence: Sentence):
+        await self.save.put(await correct_sentence(sentence, self.generator, self.openai_client))
+
+    async def __save(self, sentence: Sentence):
+        await self.writer.add(sentence)
+
+    def report(self) -> str:
+        return "\n".join([str(stage) for stage in self.stages] + [f"saved: {self.writer}"])
+
+    async def __monitor(self, interval: float):
+        while True:
+            await sleep(interval)
+            print(self.report(), flush=True)
+
+    async def run(self, quantity: int, correct_ratio: float=0.25, display_interval: float=None) -> int:
+
+        for stage in self.stages:
+            stage.start()
+
+        monitor = create_task(self.__monitor(display_interval)) if display_interval else None
+
+        try:
+            async with self.writer:
+                for _ in range(quantity):
+                    #   Blocks once the generate queue is full, which is the backpressure for the whole pipeline.
+                    await self.generate.put(SentenceSpec.random(is_correct = random.random() < correct_ratio))
+
+                #   Stages are closed in order, as validate feeds both correct and save.
+                for stage in self.stages:
+                    await stage.close()
+        finally:
+            if monitor is not None:
+                monitor.cancel()
+
+        return self.writer.rows
@@ -103,6 +103,57 @@ class SentencePromptGenerator:
                 self.__extra_rules()
             ])
 
+    def __batch_translation(self, sentence):
+        return "The 'translation' field should be an English translation." if sentence.is_correct else "The 'translation' field should be a short reason why the sentence is incorrect, without repeating the sentence."
+
+    def __batch_json_format(self, count: int):
+        return f"""The response should be returned as a raw json array of exactly {count} objects, one per numbered sentence below and in the same order, in the format below.  All seven fields must be present.  Do not use json code fencing.
+    [
+        {{
+            "index": 0,
+            "sentence": "",
+            "translation": "",
+            "is_correct": "",
+            "negation": "",
+            "direct_object": "",
+            "indirect_pronoun": ""
+        }}
+    ]
+    """
+
+    def generate_sentences_prompt(self, sentences) -> str:
+        #   The shared rules are sent once, followed by the per-sentence requirements, so that the instruction block is
+        #   paid for once per batch instead of once per sentence.
+        return '\n'.join([
+                "Generate the numbered French sentences described below.  The rules for every sentence are:",
+                self.__pronoun_ordering(),
+                self.__verb_compliments(),
+                self.__prepositions(),
+                self.__detect_negations(),
+                self.__set_negation_field(None),
+                self.__set_object_type_field("COD", "direct_object"),
+                self.__set_object_type_field("COI", "indirect_pronoun"),
+                self.__correct_elisions(),
+                self.__extra_rules(),
+                self.__batch_json_format(len(sentences)),
+                *['\n'.join([
+                    f"Sentence {i}:",
+                    self.__complement_object_direct(sentence),
+                    self.__complement_pronoun_indirect(sentence),
+                    self.__negatedness(sentence),
+                    self.__verb_properties(sentence),
+                    self.__sentence_correctness(sentence),
+                    self.__batch_translation(sentence)
+                ]) for i, sentence in enumerate(sentences)]
+            ])
+
+    def validate_french_sentences_prompt(self, sentences) -> str:
+        return '\n'.join([
+            "For each of the numbered sentences below, decide whether it is grammatically correct in terms of French syntax, verb usage, object placement, pronoun placement, and preposition usage.",
+            f"Return only a raw json array of exactly {len(sentences)} values, in the same order, each being true if the sentence is correct for all, or false if not.  Do not use json code fencing.",
+            *[f"{i}: {sentence.content}" for i, sentence in enumerate(sentences)]
+        ])
+
     def validate_french_sentence_prompt(self, sentence) -> str:
         return f"Is the sentence '{sentence.content}' grammatically correct in terms of French syntax, verb usage, object placement, pronoun placement, and preposition usage? If it is correct for all, return 'True', or if not, return 'False'."
 
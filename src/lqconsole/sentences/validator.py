@@ -0,0 +1,157 @@
+from dataclasses import dataclass, field
+from enum import auto
+
+import re
+
+from lqconsole.database.utils import DatabaseStringEnum
+from lqconsole.sentences.models import Pronoun, Negation
+
+#   Cheap, local checks of a generated sentence against what we already know about its verb.  These only give a
+#   verdict when the evidence is clear either way, and otherwise leave the decision to the LLM.
+
+class Verdict(DatabaseStringEnum):
+    valid        = auto()
+    invalid      = auto()
+    inconclusive = auto()
+
+@dataclass
+class LocalValidation:
+
+    verdict: Verdict   = Verdict.inconclusive
+    reasons: list[str] = field(default_factory=list)
+
+CONJUGATION_FIELDS: dict[str, str] = {
+    Pronoun.first_person.name:         "first_person_singular",
+    Pronoun.second_person.name:        "second_person_singular",
+    Pronoun.third_person.name:         "third_person_singular",
+    Pronoun.first_person_plural.name:  "first_person_plural",
+    Pronoun.second_person_plural.name: "second_person_formal",
+    Pronoun.third_person_plural.name:  "third_person_plural",
+}
+
+SUBJECTS: dict[str, set[str]] = {
+    Pronoun.first_person.name:         { "je", "j'" },
+    Pronoun.second_person.name:        { "tu" },
+    Pronoun.third_person.name:         { "il", "elle", "on" },
+    Pronoun.first_person_plural.name:  { "nous" },
+    Pronoun.second_person_plural.name: { "vous" },
+    Pronoun.third_person_plural.name:  { "ils", "elles" },
+}
+
+SUBJECT_PRONOUNS: set[str] = set().union(*SUBJECTS.values())
+
+#   Words that must elide before a vowel, and whose elided form must not appear before a consonant.
+ELIDING_WORDS: dict[str, str] = { "je": "j'", "me": "m'", "te": "t'", "se": "s'", "ne": "n'", "le": "l'", "la": "l'", "de": "d'", "que": "qu'" }
+
+VOWELS: str = "aeiouàâäéèêëîïôöùûüœæ"
+
+#   Object pronouns in the order they must appear before a verb.
+CLITIC_RANKS: dict[str, int] = {
+    "me": 0, "m'": 0, "te": 0, "t'": 0, "se": 0, "s'": 0, "nous": 0, "vous": 0,
+    "le": 1, "la": 1, "l'": 1, "les": 1,
+    "lui": 2, "leur": 2,
+    "y": 3,
+    "en": 4,
+}
+
+NEGATION_WORDS: dict[str, str] = { n.name: n.name for n in Negation if n not in (Negation.none, Negation.random) }
+NEGATION_WORDS[Negation.encore.name] = "pas"     # 'ne ... pas encore'
+
+TOKEN_PATTERN = re.compile(r"[a-zàâäçéèêëîïôöùûüÿœæ]+'?|[a-zàâäçéèêëîïôöùûüÿœæ]")
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower().replace("’", "'").replace("_", " "))
+
+def find_subsequence(tokens: list[str], words: list[str]) -> int:
+    #   Returns the position of the first word, allowing other words (ie. negations) in between.
+    for start, token in enumerate(tokens):
+        if token != words[0]:
+            continue
+
+        position = start
+        for word in words[1:]:
+            try:
+                position = tokens.index(word, position + 1)
+            except ValueError:
+                break
+        else:
+            return start
+
+    return -1
+
+def check_elisions(tokens: list[str]) -> list[str]:
+    errors = []
+
+    #   The pronoun 'y' always takes an elision (j'y, n'y), while other words starting with 'y' or 'h' may go either
+    #   way (le yaourt, d'Yves, l'homme, le héros), so those are left alone.
+    for word, following in zip(tokens, tokens[1:]):
+        if word in ELIDING_WORDS and (following[0] in VOWELS or following == "y"):
+            errors.append(f"'{word} {following}' should be elided to '{ELIDING_WORDS[word]}{following}'")
+        elif word.endswith("'") and word in ELIDING_WORDS.values() and following[0] not in VOWELS + "hy":
+            errors.append(f"'{word}{following}' should not be elided")
+
+    return errors
+
+def check_negation(tokens: list[str], negation: str) -> tuple[list[str], bool]:
+    #   Returns any errors, and whether the placement could be confirmed.
+    if negation in (None, Negation.none.name, Negation.random.name) or negation not in NEGATION_WORDS:
+        return [], negation in (None, Negation.none.name) and "ne" not in tokens and "n'" not in tokens
+
+    negation_word = NEGATION_WORDS[negation]
+    ne_positions  = [i for i, token in enumerate(tokens) if token in ("ne", "n'")]
+
+    if not ne_positions:
+        return [f"the negation '{negation}' is missing its 'ne'"], True
+
+    if negation_word not in tokens:
+        return [f"the negation '{negation_word}' is missing"], True
+
+    #   'Personne ne ...' and 'Rien ne ...' are valid with the negation first, so that ordering is left to the LLM.
+    return [], tokens.index(negation_word) > ne_positions[0]
+
+def check_clitic_order(tokens: list[str], verb_position: int) -> list[str]:
+    start = 0
+
+    for i in range(verb_position):
+        if tokens[i] in SUBJECT_PRONOUNS or tokens[i] in ("ne", "n'"):
+            start = i + 1
+
+    clitics = [token for token in tokens[start:verb_position] if token in CLITIC_RANKS]
+    ranks   = [CLITIC_RANKS[clitic] for clitic in clitics]
+
+    if ranks != sorted(ranks):
+        return [f"the object pronouns '{' '.join(clitics)}' are out of order"]
+
+    return []
+
+def check_subject(tokens: list[str], pronoun: str, verb_position: int) -> bool:
+    #   Many forms are shared between persons (je sais, tu sais), so a found verb only counts if any subject pronoun
+    #   in front of it is the one that was asked for.
+    subjects = [token for token in tokens[:verb_position] if token in SUBJECT_PRONOUNS]
+    return not subjects or subjects[0] in SUBJECTS.get(pronoun, set())
+
+def validate_locally(content: str, pronoun: str, negation: str, conjugation: dict | None) -> LocalValidation:
+
+    tokens: list[str] = tokenize(content)
+
+    if not tokens:
+        return LocalValidation(Verdict.invalid, ["the sentence is empty"])
+
+    errors: list[str] = check_elisions(tokens)
+
+    negation_errors, negation_confirmed = check_negation(tokens, negation)
+    errors += negation_errors
+
+    conjugated: str = conjugation.get(CONJUGATION_FIELDS.get(str(pronoun))) if conjugation else None
+    verb_position: int = find_subsequence(tokens, tokenize(conjugated)) if conjugated else -1
+
+    if verb_position >= 0:
+        errors += check_clitic_order(tokens, verb_position)
+
+    if errors:
+        return LocalValidation(Verdict.invalid, errors)
+
+    if verb_position >= 0 and negation_confirmed and check_subject(tokens, str(pronoun), verb_position):
+        return LocalValidation(Verdict.valid)
+
+    return LocalValidation(Verdict.inconclusive)
@@ -0,0 +1,128 @@
+from asyncio import CancelledError, Lock, create_task, sleep
+from contextlib import suppress
+
+import logging
+import time
+
+from sqlalchemy import insert, table, column
+
+from lqconsole.database.engine import get_async_session
+
+SENTENCE_COLUMNS: list[str] = [
+    "infinitive", "auxiliary", "pronoun", "tense", "direct_object", "indirect_pronoun", "negation", "content", "translation", "is_correct"
+]
+
+sentence_table = table("sentences", *[column(name) for name in SENTENCE_COLUMNS])
+
+def sentence_row(sentence) -> dict:
+    #   Enum members are stored by name, and the database enums match the enum names.
+    row = { name: getattr(sentence, name) for name in SENTENCE_COLUMNS }
+
+    for name in ("pronoun", "tense", "direct_object", "indirect_pronoun", "negation"):
+        row[name] = str(row[name])
+
+    return row
+
+class SentenceWriter:
+    # pylint: disable=too-many-instance-attributes
+
+    #   Buffers finished sentences and writes them in one statement once either enough have been gathered or the
+    #   oldest has waited long enough.  Use as an async context manager, so that anything left is flushed on exit.
+    def __init__(self, batch_size: int=500, flush_interval: float=2.0, use_copy: bool=False):
+        self.batch_size     = batch_size
+        self.flush_interval = flush_interval
+        self.use_copy       = use_copy
+
+        self.pending: list[dict] = []
+        self.lock:    Lock       = Lock()
+
+        self.rows:       int   = 0
+        self.flushes:    int   = 0
+        self.write_time: float = 0.0
+        self.started:    float = None
+
+        self.timer = None
+
+    async def __aenter__(self):
+        self.started = time.monotonic()
+        self.timer   = create_task(self.__flush_periodically())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        #   A periodic flush cancelled midway has put its rows back by the time the timer has finished.
+        self.timer.cancel()
+
+        with suppress(CancelledError):
+            await self.timer
+
+        await self.flush()
+
+    async def __flush_periodically(self):
+        while True:
+            await sleep(self.flush_interval)
+
+            try:
+                await self.flush()
+            except Exception: # pylint: disable=broad-exception-caught
+                logging.exception("Periodic sentence flush failed; the rows will be retried on the next flush.")
+
+    async def add(self, sentence):
+        self.pending.append(sentence_row(sentence))
+
+        #   The sentence is buffered either way, so a failed write must not reach the caller, who would make it again.
+        if len(self.pending) >= self.batch_size:
+            try:
+                await self.flush()
+            except Exception: # pylint: disable=broad-exception-caught
+                logging.exception("Sentence flush failed; the rows will be retried on the next flush.")
+
+    async def add_all(self, sentences):
+        for sentence in sentences:
+            await self.add(sentence)
+
+    async def flush(self):
+        async with self.lock:
+            if not self.pending:
+                return
+
+            rows, self.pending = self.pending, []
+            started = time.monotonic()
+
+            try:
+                await (self.__copy(rows) if self.use_copy else self.__insert(rows))
+            except BaseException:
+                #   Put the rows back so that a later flush can retry them, including when cancelled.
+                self.pending = rows + self.pending
+                raise
+
+            self.write_time += time.monotonic() - started
+            self.rows       += len(rows)
+            self.flushes    += 1
+
+            logging.debug("Wrote %d sentences in %.3fs", len(rows), time.monotonic() - started)
+
+    async def __insert(self, rows: list[dict]):
+        async with get_async_session() as session:
+            await session.execute(insert(sentence_table), rows)
+
+    async def __copy(self, rows: list[dict]):
+        async with get_async_session() as session:
+            connection     = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+
+            await raw_connection.driver_connection.copy_records_to_table(
+                "sentences",
+                records = [tuple(row[name] for name in SENTENCE_COLUMNS) for row in rows],
+                columns = SENTENCE_COLUMNS)
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.started is None:
+            return 0.0
+
+        elapsed = time.monotonic() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        write_rate = self.rows / self.write_time if self.write_time > 0 else 0.0
+        return f"{self.rows} sentences in {self.flushes} writes, {self.rows_per_second:.1f} rows/s overall ({write_rate:.0f} rows/s while writing)"
@@ -1,37 +1,259 @@
-from asyncio import create_task, gather, Queue
-from typing import Any, Awaitable
+from asyncio import Queue, Semaphore, Task, create_task, gather, sleep
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
 
-async def worker(queue: Queue, results):
-    while True:
-        task = await queue.get()
+import logging
+import sys
+import time
 
-        if task is None:
-            queue.task_done()
-            break
+@dataclass
+class ItemResult:
 
+    index:    int
+    item:     Any
+    value:    Any           = None
+    error:    BaseException = None
+    latency:  float         = 0.0       # Seconds, over every attempt.
+    attempts: int           = 1
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass
+class RetryPolicy:
+
+    attempts:    int   = 1              # Including the first.
+    backoff:     float = 0.0            # Seconds before the first retry, doubled before each one after.
+    max_backoff: float = 30.0
+    retry_on:    tuple[type[BaseException], ...] = (Exception,)
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        return attempt < self.attempts and isinstance(error, self.retry_on)
+
+    def delay(self, attempt: int) -> float:
+        return min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+
+class Progress:
+
+    #   Counts finished items, and reports throughput and time remaining at most once per interval.
+    def __init__(self, total: int=None, interval: float=5.0, stream=sys.stderr, name: str=None):
+        self.total    = total
+        self.interval = interval
+        self.stream   = stream
+        self.name     = name
+
+        self.completed: int   = 0
+        self.failed:    int   = 0
+        self.started:   float = time.monotonic()
+        self.reported:  float = self.started
+
+    def record(self, result: ItemResult):
+        self.completed += 1
+        self.failed    += 0 if result.ok else 1
+
+        if self.stream is not None and time.monotonic() - self.reported >= self.interval:
+            self.reported = time.monotonic()
+            print(self, file=self.stream, flush=True)
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        if self.total is None or self.rate == 0:
+            return None
+        return (self.total - self.completed) / self.rate
+
+    def __str__(self):
+        done = f"{self.completed}/{self.total}" if self.total is not None else f"{self.completed}"
+        eta  = f", ETA {time.strftime('%H:%M:%S', time.gmtime(self.eta))}" if self.eta is not None else ""
+        name = f"{self.name}: " if self.name is not None else ""
+        return f"{name}{done} done, {self.failed} failed, {self.rate:.2f}/s{eta}"
+
+async def stream_operation(items:       Iterable[Any] | AsyncIterable[Any],
+                           method:      Callable[[Any], Awaitable[Any]],
+                           workers:     int                                          = 10,
+                           window:      int                                          = 2,
+                           retry:       RetryPolicy | Callable[[Any], RetryPolicy]  = None,
+                           ordered:     bool                                         = False,
+                           progress:    Progress                                     = None) -> AsyncIterator[ItemResult]:
+
+    #   Runs method(item) for every item with a fixed number of workers, yielding each outcome as an ItemResult.  At most
+    #   workers * window items are taken from the producer and not yet handed back, which bounds memory however many
+    #   items there are, including results held back to keep them in order.  Failures are yielded, not raised.
+    #   Closing the iterator, or cancelling its consumer (ie. Ctrl-C), cancels the work still in flight.
+    slots:   Semaphore = Semaphore(workers * window)
+    inputs:  Queue     = Queue()
+    outputs: Queue     = Queue()
+
+    def policy_for(item: Any) -> RetryPolicy:
+        if retry is None:
+            return RetryPolicy()
+        return retry if isinstance(retry, RetryPolicy) else retry(item)
+
+    async def produce():
         try:
-            result = await task
-            results.append(result)
-        except Exception as ex: # pylint: disable=broad-exception-caught
-            print(ex)
+            index = 0
+
+            if isinstance(items, AsyncIterable):
+                async for item in items:
+                    await slots.acquire()
+                    inputs.put_nowait((index, item))
+                    index += 1
+            else:
+                for item in items:
+                    await slots.acquire()
+                    inputs.put_nowait((index, item))
+                    index += 1
         finally:
-            queue.task_done()
+            for _ in range(workers):
+                inputs.put_nowait(None)
 
-async def batch_operation(workers: int, quantity: int, method: list[Awaitable[Any]], **kwargs):
+    async def run(index: int, item: Any) -> ItemResult:
+        policy  = policy_for(item)
+        started = time.monotonic()
+        attempt = 0
 
-    queue: Queue = Queue()
-    results = []
-    worker_tasks = [create_task(worker(queue, results)) for _ in range(workers)]
+        while True:
+            attempt += 1
+
+            try:
+                value = await method(item)
+                return ItemResult(index, item, value, None, time.monotonic() - started, attempt)
+            except Exception as ex: # pylint: disable=broad-exception-caught
+                if not policy.should_retry(ex, attempt):
+                    return ItemResult(index, item, None, ex, time.monotonic() - started, attempt)
+
+                logging.debug("Item %d failed (attempt %d of %d), retrying: %s", index, attempt, policy.attempts, ex)
+                await sleep(policy.delay(attempt))
+
+    async def work():
+        while (entry := await inputs.get()) is not None:
+            outputs.put_nowait(await run(*entry))
+
+        outputs.put_nowait(None)
+
+    producer:     Task       = create_task(produce())
+    worker_tasks: list[Task] = [create_task(work()) for _ in range(workers)]
+
+    held: dict[int, ItemResult] = {}
+    next_index: int = 0
+    finished:   int = 0
 
-    for _ in range(quantity):
-        task = method(**kwargs)
-        queue.put_nowait(task)
+    try:
+        while finished < workers:
+            result: ItemResult = await outputs.get()
 
-    await queue.join()
+            if result is None:
+                finished += 1
+                continue
 
-    for _ in range(workers):
-        queue.put_nowait(None)
+            if progress is not None:
+                progress.record(result)
 
-    await gather(*worker_tasks)
+            if not ordered:
+                slots.release()
+                yield result
+                continue
+
+            held[result.index] = result
+
+            while next_index in held:
+                slots.release()
+                yield held.pop(next_index)
+                next_index += 1
+
+        #   Raises anything the producer itself failed with.
+        await producer
+    finally:
+        for task in [producer, *worker_tasks]:
+            task.cancel()
+
+        await gather(producer, *worker_tasks, return_exceptions=True)
+
+async def batch_operation(workers: int, quantity: int, method: Callable[..., Awaitable[Any]], **kwargs) -> list[Any]:
+
+    #   Calls method(**kwargs) quantity times and collects what succeeded.  Use stream_operation directly for large
+    #   quantities, as this keeps every result.
+    results = []
+
+    async for result in stream_operation(range(quantity), lambda _: method(**kwargs), workers=workers):
+        if result.ok:
+            results.append(result.value)
+        else:
+            logging.warning("Batch item %d failed: %s", result.index, result.error)
 
     return results
+
+class PipelineStage:
+    # pylint: disable=too-many-instance-attributes
+
+    #   One stage of a streaming pipeline: a fixed number of workers reading from a bounded input queue, so that a slow
+    #   stage pushes back on the ones feeding it instead of letting work pile up in memory.
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[Any]], workers: int=1, queue_size: int=0):
+        self.name    = name
+        self.handler = handler
+        self.workers = workers
+        self.queue: Queue = Queue(maxsize=queue_size)
+
+        self.processed: int   = 0
+        self.failed:    int   = 0
+        self.busy_time: float = 0.0
+        self.started:   float = None
+        self.finished:  float = None
+
+        self.worker_tasks: list[Task] = []
+
+    def start(self):
+        self.started = time.monotonic()
+        self.worker_tasks = [create_task(self.__work()) for _ in range(self.workers)]
+
+    async def put(self, item: Any):
+        await self.queue.put(item)
+
+    async def __work(self):
+        while True:
+            item = await self.queue.get()
+
+            try:
+                if item is None:
+                    break
+
+                started = time.monotonic()
+
+                try:
+                    await self.handler(item)
+                    self.processed += 1
+                except Exception as ex: # pylint: disable=broad-exception-caught
+                    self.failed += 1
+                    logging.warning("%s stage failed: %s", self.name, ex)
+                finally:
+                    self.busy_time += time.monotonic() - started
+            finally:
+                self.queue.task_done()
+
+    async def close(self):
+        #   Only call once everything feeding this stage has been closed.
+        for _ in range(self.workers):
+            await self.queue.put(None)
+
+        await gather(*self.worker_tasks)
+        self.finished = time.monotonic()
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    @property
+    def throughput(self) -> float:
+        if self.started is None:
+            return 0.0
+
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f"{self.name}: {self.processed} done, {self.failed} failed, {self.throughput:.2f}/s, queue {self.depth}/{self.queue.maxsize}"
@@ -0,0 +1,133 @@
+from asyncio import Lock
+from importlib.resources import files
+from os import environ
+from typing import Generic, Sequence, TypeVar
+
+import logging
+import random
+
+from sqlalchemy import select
+
+from lqconsole.database.engine import unit_of_work
+from lqconsole.verbs.models import Conjugation, Verb
+
+T = TypeVar("T")
+
+#   Shipped inside the package, so that installs and images have it wherever the source tree is.
+DEFAULT_FREQUENCY_FILE = str(files("lqconsole.verbs") / "verbs.txt")
+
+class AliasTable(Generic[T]):
+
+    #   Walker's alias method (Vose's variant): O(n) to build, O(1) per weighted sample.
+    def __init__(self, items: Sequence[T], weights: Sequence[float]):
+
+        if len(items) == 0 or len(items) != len(weights):
+            raise ValueError("An alias table needs one positive weight per item.")
+
+        total = float(sum(weights))
+
+        if total <= 0:
+            raise ValueError("An alias table needs one positive weight per item.")
+
+        count = len(items)
+
+        self.items       = list(items)
+        self.probability = [0.0] * count
+        self.alias       = [0] * count
+
+        scaled = [weight * count / total for weight in weights]
+        small  = [i for i, p in enumerate(scaled) if p < 1.0]
+        large  = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            less, more = small.pop(), large.pop()
+
+            self.probability[less] = scaled[less]
+            self.alias[less]       = more
+
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def sample(self, rng: random.Random=random) -> T:
+        i = rng.randrange(len(self.items))
+        return self.items[i] if rng.random() < self.probability[i] else self.items[self.alias[i]]
+
+    def __len__(self):
+        return len(self.items)
+
+def read_verb_frequencies(filename: str, column: int=1) -> dict[str, float]:
+
+    #   Lines look like 'aller<TAB>4,22%<TAB>9,75%'.
+    frequencies: dict[str, float] = {}
+
+    with open(filename, encoding="utf-8") as frequency_file:
+        for line in frequency_file:
+            fields = line.rstrip("\n").split("\t")
+
+            if len(fields) <= column or not fields[0].strip():
+                continue
+
+            try:
+                frequencies[fields[0].strip()] = float(fields[column].strip().rstrip("%").replace(",", "."))
+            except ValueError:
+                logging.warning("Skipping malformed verb frequency line: %s", line.strip())
+
+    return frequencies
+
+class VerbCatalog:
+
+    #   Verbs that are stored but not in the frequency list are still picked, at the rate of the rarest listed verb.
+    def __init__(self, verbs: list[Verb], frequencies: dict[str, float]):
+
+        self.verbs = verbs
+        floor      = min(frequencies.values(), default=1.0)
+        weights    = [frequencies.get(verb.infinitive, floor) for verb in verbs]
+
+        self.table: AliasTable[Verb] = AliasTable(verbs, weights) if verbs else None
+
+    def sample(self) -> Verb:
+        return self.table.sample() if self.table is not None else None
+
+    def __len__(self):
+        return len(self.verbs)
+
+    @classmethod
+    async def load(cls, frequency_file: str=None, column: int=1, require_conjugations: bool=True) -> "VerbCatalog":
+
+        #   A missing file is an error rather than a quiet fall back to uniform sampling.  Set VERB_FREQUENCY_FILE to
+        #   an empty string to sample uniformly on purpose.
+        frequency_file = environ.get("VERB_FREQUENCY_FILE", DEFAULT_FREQUENCY_FILE) if frequency_file is None else frequency_file
+        frequencies: dict[str, float] = read_verb_frequencies(frequency_file, column) if frequency_file else {}
+
+        async with unit_of_work() as session:
+            stmt = select(Verb)
+
+            if require_conjugations:
+                stmt = stmt.where(Verb.id.in_(select(Conjugation.verb_id)))
+
+            #   Keep only the latest row for each infinitive, as get_verb does.
+            verbs: dict[str, Verb] = {}
+
+            for verb in (await session.scalars(stmt.order_by(Verb.id))).all():
+                verbs[verb.infinitive] = verb
+
+        logging.debug("Loaded %d verbs into the verb catalog.", len(verbs))
+
+        return cls(list(verbs.values()), frequencies)
+
+catalog_lock: Lock = Lock()
+catalogs: dict[bool, VerbCatalog] = {}
+
+async def get_verb_catalog(require_conjugations: bool=True) -> VerbCatalog:
+
+    async with catalog_lock:
+        if require_conjugations not in catalogs:
+            catalogs[require_conjugations] = await VerbCatalog.load(require_conjugations=require_conjugations)
+
+    return catalogs[require_conjugations]
+
+def invalidate_verb_catalog():
+    catalogs.clear()
@@ -1,17 +1,35 @@
+from typing import Callable
+
 import json
 import logging
 
 from sqlalchemy import and_, func, select
-from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
 
 from lqconsole.ai.client import AsyncChatGPTClient
-from lqconsole.database.engine import get_async_session
-from lqconsole.verbs.models import Verb, Conjugation
+from lqconsole.database.engine import unit_of_work
+from lqconsole.database.sampling import IdSampler
+from lqconsole.verbs.catalog import invalidate_verb_catalog
+from lqconsole.verbs.models import Verb, Tense, conjugation_fields, conjugation_table
 from lqconsole.verbs.prompts import generate_verb_prompt
 
-async def get_verb(requested_verb: str, database_session: AsyncSession=get_async_session()) -> Verb:
+verb_sampler: IdSampler = IdSampler("verbs")
+
+#   Called with the infinitive of every verb written, or None when any verb may have changed.
+verb_listeners: list[Callable[[str | None], None]] = []
+
+def add_verb_listener(listener: Callable[[str | None], None]):
+    verb_listeners.append(listener)
+
+def notify_verb_changed(infinitive: str | None=None):
+    invalidate_verb_catalog()
+
+    for listener in verb_listeners:
+        listener(infinitive)
+
+async def get_verb(requested_verb: str) -> Verb:
 
-    async with database_session as session:
+    async with unit_of_work() as session:
 
         verb: Verb = (
         await session.scalars(select(Verb)
@@ -20,91 +38,133 @@ async def get_verb(requested_verb: str, database_session: AsyncSession=get_async
 
         return verb
 
-async def get_random_verb(database_session: AsyncSession=get_async_session()) -> Verb:
-    # pylint: disable=not-callable
-    async with database_session as session:
+async def get_random_verb() -> Verb:
 
-        verb: Verb = (
-        await session.scalars(select(Verb)
-            .order_by(func.random()))).first()
+    async with unit_of_work() as session:
+
+        verb: Verb = None
+
+        while verb is None:
+            ids: list[int] = await verb_sampler.sample(session)
+
+            if not ids:
+                return None
+
+            verb = await session.get(Verb, ids[0])
+
+            if verb is None:
+                verb_sampler.discard(ids[0])
 
         return verb
 
+async def get_conjugation(infinitive: str, tense: str) -> dict | None:
+
+    async with unit_of_work() as session:
+
+        row = (await session.execute(select(conjugation_table)
+            .where(and_(conjugation_table.c.infinitive == infinitive, conjugation_table.c.tense == tense))
+            .order_by(conjugation_table.c.id.desc())
+            .limit(1))).first()
+
+        return dict(row._mapping) if row is not None else None
+
+def parse_conjugations(response_json: dict) -> list[dict]:
+
+    #   One row per known tense, with a value for every conjugation column.  Pronouns the response left out, or gave
+    #   no verb for, are None so that the upsert keeps whatever was stored before.
+    rows: dict[str, dict] = {}
+
+    for response_tense in response_json["tenses"]:
+
+        tense = response_tense["tense"]
+
+        if tense not in Tense.__members__:
+            logging.warning("Ignoring unknown tense %s for %s.", tense, response_json["infinitive"])
+            continue
+
+        row: dict = rows.setdefault(tense, { "tense": tense, **{ field: None for field in conjugation_fields } })
+
+        for response_conjugation in response_tense["conjugations"]:
+
+            verb = response_conjugation.get("verb")
+
+            #   Should only set if response is not null to account for ChatGTP non-determinism:
+            if not verb:
+                continue
+
+            match response_conjugation["pronoun"]:
+                case "je" | "j'" | "j":
+                    row["first_person_singular"] = verb
+                case "tu":
+                    row["second_person_singular"] = verb
+                case "il/elle/on" | "il" | "elle" | "on":
+                    row["third_person_singular"] = verb
+                case "nous":
+                    row["first_person_plural"] = verb
+                case "vous":
+                    row["second_person_formal"] = verb
+                case "ils/elles" | "ils" | "elles":
+                    row["third_person_plural"] = verb
+                case "-":
+                    for field in conjugation_fields:
+                        row[field] = verb
+
+    return list(rows.values())
+
 async def download_verb(requested_verb: str, openapi_client: AsyncChatGPTClient=AsyncChatGPTClient()):
 
     logging.info("Fetching verb %s.", requested_verb)
 
-    async with get_async_session() as session:
+    prompt:   str = generate_verb_prompt(verb_infinitive=requested_verb)
+    response: str = await openapi_client.handle_request(prompt=prompt)
 
-        logging.info("Saving verb %s", requested_verb)
-
-        response: str = await openapi_client.handle_request(prompt=generate_verb_prompt(verb_infinitive=requested_verb))
+    try:
         response_json = json.loads(response)
-        infinitive: str = response_json["infinitive"]
+    except json.JSONDecodeError as ex:
+        openapi_client.forget(prompt)
+        raise ex
+
+    infinitive:   str        = response_json["infinitive"]
+    conjugations: list[dict] = parse_conjugations(response_json)
 
-        existing_verb: Verb = await get_verb(requested_verb=requested_verb, database_session=session)
+    #   The verb and all of its conjugations are written in one transaction, committed as the unit of work closes.
+    async with unit_of_work() as session:
 
-        if existing_verb:
+        logging.info("Saving verb %s", requested_verb)
+
+        verb: Verb = (
+            await session.scalars(select(Verb)
+                .filter(Verb.infinitive == requested_verb)
+                .order_by(Verb.id.desc())
+                .limit(1))).first()
+
+        if verb:
             logging.info("The verb %s already exists and will be updated if needed.", infinitive)
         else:
             logging.info("The verb %s does not yet exist in the database.", infinitive)
+            verb = Verb()
+            session.add(verb)
 
-        verb: Verb = Verb() if existing_verb is None else existing_verb
         verb.auxiliary   = response_json["auxiliary"]
         verb.infinitive  = infinitive
 
-        session.add(verb)
-        await session.commit()
-
-        for response_tense in response_json["tenses"]:
-
-            tense = response_tense["tense"]
-
-            existing_conjugation: Conjugation = (
-                await session.scalars(select(Conjugation)
-                    .filter(and_(Conjugation.infinitive == infinitive, Conjugation.tense == tense))
-                    .order_by(Conjugation.id.desc()))).first()
-
-            if existing_conjugation:
-                logging.info("A verb conjugation for %s, %s already exists and will be updated.", infinitive, tense)
-            else:
-                logging.info("Verb conjugations are missing or are incomplete for %s and will be added/updated.", infinitive)
-
-            conjugation: Conjugation = Conjugation() if existing_conjugation is None else existing_conjugation
-            conjugation.infinitive   = infinitive
-            conjugation.tense        = tense
-            conjugation.verb_id      = verb.id
-
-            for response_conjugation in response_tense["conjugations"]:
-
-                #   Should only set if response is not null to account for ChatGTP non-determinism:
-                match response_conjugation["pronoun"]:
-                    case "je" | "j'" | "j":
-                        conjugation.first_person_singular = response_conjugation["verb"]
-                    case "tu":
-                        conjugation.second_person_singular = response_conjugation["verb"]
-                    case "il/elle/on" | "il" | "elle" | "on":
-                        conjugation.third_person_singular = response_conjugation["verb"]
-                    case "nous":
-                        conjugation.first_person_plural = response_conjugation["verb"]
-                    case "vous":
-                        conjugation.second_person_formal = response_conjugation["verb"]
-                    case "ils/elles" | "ils" | "elles":
-                        conjugation.third_person_plural = response_conjugation["verb"]
-                    case "-":
-                        conjugation.first_person_singular  = response_conjugation["verb"]
-                        conjugation.second_person_singular = response_conjugation["verb"]
-                        conjugation.third_person_singular  = response_conjugation["verb"]
-                        conjugation.first_person_plural    = response_conjugation["verb"]
-                        conjugation.second_person_formal   = response_conjugation["verb"]
-                        conjugation.third_person_plural    = response_conjugation["verb"]
-
-            #   Since we are using Postgres we can upsert instead of doing this:
-            if existing_conjugation is None:
-                logging.info("Adding %s with tense %s.", conjugation.infinitive, conjugation.tense)
-                await session.merge(conjugation)
-            else:
-                logging.info("Updating %s with tense %s.", conjugation.infinitive, conjugation.tense)
-                await session.merge(conjugation)
+        await session.flush()
 
-        return verb
+        if conjugations:
+            logging.info("Upserting %d tenses for %s.", len(conjugations), infinitive)
+
+            stmt = insert(conjugation_table).values([
+                { **conjugation, "verb_id": verb.id, "infinitive": infinitive } for conjugation in conjugations])
+
+            stmt = stmt.on_conflict_do_update(
+                index_elements = [conjugation_table.c.verb_id, conjugation_table.c.tense],
+                set_ = {
+                    "infinitive": stmt.excluded.infinitive,
+                    **{ field: func.coalesce(stmt.excluded[field], conjugation_table.c[field]) for field in conjugation_fields }
+                })
+
+            await session.execute(stmt)
+
+    notify_verb_changed(infinitive)
+
+    return verb
@@ -0,0 +1,126 @@
+from asyncio import Queue, create_task, gather
+from dataclasses import dataclass, field
+from os import path
+
+import json
+import logging
+
+from sqlalchemy import distinct, func, select
+
+from lqconsole.ai.client import AsyncChatGPTClient
+from lqconsole.database.engine import unit_of_work
+from lqconsole.verbs.get import download_verb
+from lqconsole.verbs.models import Conjugation, Tense
+
+IMPORTED = "imported"
+FAILED   = "failed"
+
+@dataclass
+class ImportReport:
+
+    requested: int             = 0
+    skipped:   list[str]       = field(default_factory=list)
+    imported:  list[str]       = field(default_factory=list)
+    failed:    dict[str, str]  = field(default_factory=dict)
+
+    def __str__(self):
+        lines = [f"{self.requested} requested, {len(self.skipped)} already stored, {len(self.imported)} imported, {len(self.failed)} failed"]
+        lines += [f"  {verb}: {error}" for verb, error in sorted(self.failed.items())]
+        return "\n".join(lines)
+
+def read_verb_list(filename: str) -> list[str]:
+
+    #   Accepts plain lists, and the tab separated frequency lists where the verb is the first field.
+    verbs: list[str] = []
+
+    with open(filename, encoding="utf-8") as verb_file:
+        for line in verb_file:
+            verb = line.split("\t")[0].strip()
+
+            if verb and not verb.startswith("#") and verb not in verbs:
+                verbs.append(verb)
+
+    return verbs
+
+def read_checkpoint(filename: str) -> dict[str, str]:
+
+    #   The checkpoint is an append-only JSON lines file, so that the latest line for each verb wins on resume.
+    statuses: dict[str, str] = {}
+
+    if filename is not None and path.exists(filename):
+        with open(filename, encoding="utf-8") as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    entry = json.loads(line)
+                    statuses[entry["verb"]] = entry["status"]
+                except (json.JSONDecodeError, KeyError):
+                    logging.warning("Ignoring malformed checkpoint line: %s", line.strip())
+
+    return statuses
+
+async def get_stored_verbs(verbs: list[str]) -> set[str]:
+
+    #   A verb only counts as stored once all of its tenses are.
+    async with unit_of_work() as session:
+        stmt = (select(Conjugation.infinitive)
+            .where(Conjugation.infinitive.in_(verbs))
+            .group_by(Conjugation.infinitive)
+            .having(func.count(distinct(Conjugation.tense)) >= len(Tense))) # pylint: disable=not-callable
+
+        return set((await session.scalars(stmt)).all())
+
+async def import_verbs(verbs: list[str],
+                       checkpoint:    str                = None,
+                       workers:       int                = 16,
+                       attempts:      int                = 3,
+                       openai_client: AsyncChatGPTClient = None) -> ImportReport:
+
+    openai_client = AsyncChatGPTClient() if openai_client is None else openai_client
+    report: ImportReport = ImportReport(requested=len(verbs))
+
+    completed: set[str] = {verb for verb, status in read_checkpoint(checkpoint).items() if status == IMPORTED}
+    stored:    set[str] = await get_stored_verbs(verbs)
+
+    report.skipped = [verb for verb in verbs if verb in stored or verb in completed]
+    pending: list[str] = [verb for verb in verbs if verb not in stored and verb not in completed]
+
+    logging.info("Importing %d verbs (%d already stored).", len(pending), len(report.skipped))
+
+    queue: Queue = Queue()
+
+    for verb in pending:
+        queue.put_nowait(verb)
+
+    checkpoint_file = open(checkpoint, "a", encoding="utf-8") if checkpoint is not None else None # pylint: disable=consider-using-with
+
+    def record(verb: str, status: str, error: str=None):
+        if checkpoint_file is not None:
+            checkpoint_file.write(json.dumps({ "verb": verb, "status": status, "error": error }) + "\n")
+            checkpoint_file.flush()
+
+    async def work():
+        #   Throttling is left to the client's shared rate limiter.  The worker count only bounds open sessions.
+        while not queue.empty():
+            verb = queue.get_nowait()
+
+            for attempt in range(1, attempts + 1):
+                try:
+                    await download_verb(requested_verb=verb, openapi_client=openai_client)
+                    report.imported.append(verb)
+                    report.failed.pop(verb, None)
+                    record(verb, IMPORTED)
+                    break
+                except Exception as ex: # pylint: disable=broad-exception-caught
+                    logging.warning("Failed to import %s (attempt %d of %d): %s", verb, attempt, attempts, ex)
+                    report.failed[verb] = str(ex) or ex.__class__.__name__
+
+            if verb in report.failed:
+                record(verb, FAILED, report.failed[verb])
+
+    try:
+        await gather(*[create_task(work()) for _ in range(max(1, min(workers, len(pending))))])
+    finally:
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+
+    return report
@@ -1,8 +1,7 @@
 from enum import auto
 
-from sqlalchemy import Enum, Table, Column, Integer, String, ForeignKey
+from sqlalchemy import Enum, Table, Column, Integer, String, ForeignKey, UniqueConstraint
 
-from lqconsole.database.engine import async_engine
 from lqconsole.database.metadata import Base, metadata
 from lqconsole.database.utils import DatabaseStringEnum
 
@@ -18,30 +17,36 @@ class Tense(DatabaseStringEnum, PromptEnum):
 conjugation_table = Table("conjugations", metadata,
     Column("id", Integer, primary_key=True),
     # relationship("verbs", cascade="all"),
-    Column("verb_id", ForeignKey('verbs.id')),
+    Column("verb_id", ForeignKey('verbs.id', ondelete="CASCADE"), nullable=False),
     # Column('group_id', ForeignKey('verb_groups.id')),
     # Column('mode', Enum(Mode), nullable=False),
     Column('tense', Enum(Tense), nullable=False),
-    Column('infinitive', String()),
+    Column('infinitive', String(), nullable=False),
     Column('first_person_singular', String()),
     Column('second_person_singular', String()),
     Column('third_person_singular', String()),
     Column('first_person_plural', String()),
     Column('second_person_formal', String()),
     Column('third_person_plural', String()),
+    UniqueConstraint('verb_id', 'tense'),
     extend_existing=False
 )
 
+conjugation_fields: list[str] = [
+    c.name for c in conjugation_table.columns
+    if c.name not in ("id", "verb_id", "tense", "infinitive")
+]
+
 class Conjugation(Base): # pylint: disable=too-few-public-methods
-    __table__ = Table('conjugations', metadata, autoload=True, autoload_with=async_engine)
+    __table__ = conjugation_table
 
 verb_table = Table("verbs", metadata,
     Column("id", Integer, primary_key=True),
     # Column('group_id', ForeignKey('verb_groups.id')),
-    Column('infinitive', String()),
-    Column('auxiliary', String()),
+    Column('infinitive', String(), nullable=False),
+    Column('auxiliary', String(), nullable=False),
     extend_existing=False
 )
 
 class Verb(Base): # pylint: disable=too-few-public-methods
-    __table__ = Table('verbs', metadata, autoload=True, autoload_with=async_engine)
+    __table__ = verb_table
@@ -1,21 +1,122 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 
-from lqconsole.sentences.create import create_sentence
-from lqconsole.webserver.verbs.get import get_verb_and_conjugations
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
 
-app = FastAPI()
+from lqconsole.database.engine import pool_statistics
+from lqconsole.database.utils import object_as_dict
+from lqconsole.jobs.queue import enqueue, get_job
+from lqconsole.problems.bank import get_bank_problems
+from lqconsole.sentences.database import SentenceFilters
+from lqconsole.sentences.inventory import SentenceInventory
+from lqconsole.webserver.verbs.cache import CachedPayload, etag_matches
+from lqconsole.webserver.verbs.get import get_verb_payload, get_verb_payloads, verb_cache
+
+inventory: SentenceInventory = SentenceInventory.from_environment()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    #   The inventory refills its buckets in the background for as long as the server runs.
+    await inventory.start()
+    try:
+        yield
+    finally:
+        await inventory.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+class JobRequest(BaseModel):
+
+    kind:         str
+    quantity:     int  = Field(default=1, ge=1)
+    parameters:   dict = Field(default_factory=dict)
+    max_attempts: int  = Field(default=3, ge=1)
+
+def payload_response(payload: CachedPayload, request: Request) -> Response:
+    #   Clients may keep the payload, but must revalidate it.  Unchanged verbs cost them a 304 and no body.
+    headers = { "ETag": payload.etag, "Cache-Control": "no-cache" }
+
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=payload.body, media_type="application/json", headers=headers)
 
 @app.get("/hello")
 async def hello():
     return "Hello, world!"
 
+@app.get("/stats/pool")
+async def pool_stats():
+    return pool_statistics()
+
+@app.get("/stats/verb-cache")
+async def verb_cache_stats():
+    return { "entries": len(verb_cache), **asdict(verb_cache.stats), "hit_rate": verb_cache.stats.hit_rate }
+
+@app.get("/stats/inventory")
+async def inventory_stats():
+    return inventory.report()
+
 @app.get("/sentence")
-async def sentence():
-    return await create_sentence("savoir")
+async def sentence(verb: str = None, tense: str = None, direct_object: str = None, indirect_pronoun: str = None,
+                   negation: str = None, is_correct: bool = True):
+    try:
+        key = SentenceFilters.parse(verb, tense, direct_object, indirect_pronoun, negation, is_correct)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex)) from ex
+
+    try:
+        result = await inventory.take(key)
+    except LookupError as ex:
+        raise HTTPException(status_code=404, detail=str(ex)) from ex
+
+    if result is None:
+        raise HTTPException(status_code=503, detail="No sentence is available")
+    return object_as_dict(result)
+
+@app.get("/problems")
+async def problems(quantity: int = Query(default=1, ge=1, le=100), verb: str = None, tense: str = None, direct_object: str = None,
+                   indirect_pronoun: str = None, negation: str = None, match: list[str] = Query(default=["infinitive"])):
+    try:
+        filters = SentenceFilters.parse(verb, tense, direct_object, indirect_pronoun, negation)
+        results = await get_bank_problems(quantity, filters, match)
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex)) from ex
+
+    return [[object_as_dict(sentence) for sentence in problem] for problem in results]
+
+@app.get("/verbs")
+async def get_verbs(request: Request, infinitive: list[str] = Query(default=[])):
+    #   The stored documents are joined as they are, in the order asked for.  Unknown verbs are left out.
+    payloads = await get_verb_payloads(infinitive)
+    bodies   = [payloads[verb].body for verb in dict.fromkeys(infinitive) if payloads[verb] is not None]
+
+    return payload_response(CachedPayload.of(b"[" + b",".join(bodies) + b"]"), request)
 
 @app.get("/verbs/{infinitive}")
-async def get_verb(infinitive: str):
-    data = await get_verb_and_conjugations(infinitive)
-    if data is None:
+async def get_verb(infinitive: str, request: Request):
+    payload = await get_verb_payload(infinitive)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Verb not found")
-    return data
\ No newline at end of file
+
+    return payload_response(payload, request)
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest, response: Response):
+    #   One job, to be picked up by whichever worker claims it first.  Poll its Location for the outcome.
+    try:
+        job_id = (await enqueue(request.kind, request.quantity, request.parameters, max_attempts=request.max_attempts))[0]
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex)) from ex
+
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return object_as_dict(await get_job(job_id))
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: int):
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return object_as_dict(job)
@@ -0,0 +1,143 @@
+from asyncio import CancelledError, Future, get_running_loop, shield
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import hashlib
+import time
+
+from lqconsole.ai.cache import CacheStats
+
+@dataclass
+class CachedPayload:
+
+    body:    bytes
+    etag:    str
+    created: float = 0.0
+
+    @classmethod
+    def of(cls, body: bytes) -> "CachedPayload":
+        return cls(body, f'"{hashlib.sha256(body).hexdigest()[:32]}"', time.monotonic())
+
+class LoadAbandoned(Exception):
+    #   Given to the callers sharing a load whose own caller was cancelled, so that they load the key themselves.
+    pass
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    #   Weak comparison, as If-None-Match requires.
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+class PayloadCache:
+
+    #   Serialized responses by key, least recently used first.  Concurrent misses for the same key share one load,
+    #   and a load that overlaps an invalidation is returned to its callers but not kept.  The ttl only bounds how
+    #   stale an entry can get when it is written by another process; writes in this process invalidate it directly.
+    def __init__(self, max_entries: int=1024, ttl: float=300.0):
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        self.stats       = CacheStats()
+
+        self.entries:  OrderedDict[str, CachedPayload] = OrderedDict()
+        self.inflight: dict[str, Future]               = {}
+        self.generation: int                           = 0
+
+    def __fresh(self, payload: CachedPayload) -> bool:
+        return self.ttl is None or time.monotonic() - payload.created < self.ttl
+
+    def __hit(self, key: str) -> CachedPayload | None:
+        payload = self.entries.get(key)
+
+        if payload is None or not self.__fresh(payload):
+            self.stats.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.stats.hits += 1
+        return payload
+
+    def __store(self, key: str, payload: CachedPayload):
+        self.entries[key] = payload
+        self.entries.move_to_end(key)
+        self.stats.writes += 1
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[bytes | None]]) -> CachedPayload | None:
+
+        async def load_one(keys: list[str]) -> dict[str, bytes]:
+            body = await loader()
+            return { key: body } if body is not None else {}
+
+        return (await self.get_many([key], load_one))[key]
+
+    async def get_many(self, keys: list[str], loader: Callable[[list[str]], Awaitable[dict[str, bytes]]]) -> dict[str, CachedPayload | None]:
+
+        #   Every key that is neither cached nor already loading is loaded in one call.  Keys the loader leaves out
+        #   have no payload.
+        payloads: dict[str, CachedPayload | None] = {}
+
+        for key in dict.fromkeys(keys):
+            payload = self.__hit(key)
+
+            if payload is not None:
+                payloads[key] = payload
+
+        waiting: dict[str, Future] = { key: self.inflight[key] for key in dict.fromkeys(keys) if key not in payloads and key in self.inflight }
+        missing: list[str]         = [key for key in dict.fromkeys(keys) if key not in payloads and key not in waiting]
+
+        if missing:
+            loop = get_running_loop()
+            futures: dict[str, Future] = { key: loop.create_future() for key in missing }
+
+            self.inflight.update(futures)
+            generation = self.generation
+
+            try:
+                bodies = await loader(missing)
+            except (CancelledError, Exception) as ex:
+                for future in futures.values():
+                    future.set_exception(LoadAbandoned() if isinstance(ex, CancelledError) else ex)
+                    #   Only waiters see the exception, so mark it retrieved for when there are none.
+                    future.exception()
+                raise
+            finally:
+                for key in missing:
+                    del self.inflight[key]
+
+            for key in missing:
+                payload = CachedPayload.of(bodies[key]) if bodies.get(key) is not None else None
+                futures[key].set_result(payload)
+                payloads[key] = payload
+
+                if payload is not None and generation == self.generation:
+                    self.__store(key, payload)
+
+        abandoned: list[str] = []
+
+        for key, future in waiting.items():
+            try:
+                payloads[key] = await shield(future)
+            except LoadAbandoned:
+                abandoned.append(key)
+
+        if abandoned:
+            payloads.update(await self.get_many(abandoned, loader))
+
+        return payloads
+
+    def invalidate(self, key: str | None=None):
+        #   None drops everything.
+        self.generation += 1
+
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,52 +1,61 @@
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import sessionmaker
+from itertools import chain
+from os import environ
 
-from lqconsole.database.engine import async_engine
-from lqconsole.verbs.models import conjugation_table, verb_table
+from sqlalchemy import Text, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
-async_session = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+from lqconsole.database.engine import AsyncSessionLocal
+from lqconsole.verbs.get import add_verb_listener
+from lqconsole.verbs.models import conjugation_fields, conjugation_table, verb_table
+from lqconsole.webserver.verbs.cache import CachedPayload, PayloadCache
 
-async def get_verb_and_conjugations(infinitive: str):
-    async with async_session() as session:
-        result = await session.execute(
-            select(verb_table).where(verb_table.c.infinitive == infinitive)
-        )
+verb_cache: PayloadCache = PayloadCache(
+    max_entries = int(environ.get("VERB_CACHE_SIZE", 1024)),
+    ttl         = float(environ.get("VERB_CACHE_TTL", 300)))
 
-        verb_row = result.fetchone()
-        if not verb_row:
-            return None
+add_verb_listener(verb_cache.invalidate)
 
-        verb_id   = verb_row.id
-        auxiliary = verb_row.auxiliary
+def sql_string(value: str):
+    #   Constants are rendered inline rather than bound, so the statement is the same for every request.
+    return literal_column(f"'{value}'")
 
-        result = await session.execute(
-            select(conjugation_table).where(conjugation_table.c.verb_id == verb_id)
-        )
+#   The whole response is built by Postgres: one object per conjugation, without its empty persons and with spaces
+#   for underscores, aggregated under the latest verb row for each infinitive.  Its bytes are served as they are, so
+#   no JSON encoder runs on the verb endpoints.
+conjugation_document = func.json_strip_nulls(func.json_build_object(
+    sql_string("tense"),      conjugation_table.c.tense,
+    sql_string("infinitive"), conjugation_table.c.infinitive,
+    *chain.from_iterable((sql_string(field), func.replace(conjugation_table.c[field], sql_string("_"), sql_string(" "))) for field in conjugation_fields)))
 
-        conjugations = []
+verb_document = cast(func.json_build_object(
+    sql_string("infinitive"),   verb_table.c.infinitive,
+    sql_string("auxiliary"),    verb_table.c.auxiliary,
+    sql_string("conjugations"), func.coalesce(
+        func.json_agg(aggregate_order_by(conjugation_document, conjugation_table.c.id)).filter(conjugation_table.c.id.isnot(None)),
+        literal_column("'[]'::json"))), Text)
 
-        for row in result.fetchall():
-            conjugation = {
-                "tense": row.tense.name,
-                "infinitive": row.infinitive
-            }
+def verb_documents_query(infinitives: list[str]):
 
-            conjugation_fields = [
-                c.name for c in conjugation_table.columns
-                if c.name not in ("id", "verb_id", "tense", "infinitive")
-            ]
+    latest_verbs = (select(func.max(verb_table.c.id)) # pylint: disable=not-callable
+        .where(verb_table.c.infinitive.in_(infinitives))
+        .group_by(verb_table.c.infinitive))
 
-            for field in conjugation_fields:
-                value = getattr(row, field)
+    return (select(verb_table.c.infinitive, verb_document)
+        .select_from(verb_table.outerjoin(conjugation_table, conjugation_table.c.verb_id == verb_table.c.id))
+        .where(verb_table.c.id.in_(latest_verbs))
+        .group_by(verb_table.c.id))
 
-                if value is not None:
-                    conjugation[field] = value.replace("_", " ")
+async def get_verb_documents(infinitives: list[str]) -> dict[str, bytes]:
 
-            conjugations.append(conjugation)
+    #   The shared session factory follows the engine if the pool is reconfigured at startup.
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(verb_documents_query(infinitives))).all()
 
-        return {
-            "infinitive": verb_row.infinitive,
-            "auxiliary": auxiliary,
-            "conjugations": conjugations
-        }
+    return { infinitive: document.encode("utf-8") for infinitive, document in rows }
+
+async def get_verb_payload(infinitive: str) -> CachedPayload | None:
+    return (await get_verb_payloads([infinitive]))[infinitive]
+
+async def get_verb_payloads(infinitives: list[str]) -> dict[str, CachedPayload | None]:
+    #   Cached verbs are served as they are, and all of the others are fetched together in one query.
+    return await verb_cache.get_many(infinitives, get_verb_documents)
@@ -0,0 +1,5 @@
+import os
+
+#   Clients are constructed as default arguments at import time, and the OpenAI SDK refuses to build one without a key.
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("RESPONSE_CACHE_DISABLED", "true")
@@ -0,0 +1,32 @@
+from sqlalchemy.dialects import postgresql
+
+from lqconsole.problems.bank import get_bank_problems, problems_query
+from lqconsole.sentences.database import SentenceFilters
+
+import asyncio
+import pytest
+
+def test_problems_are_read_in_one_lateral_query():
+
+    sql = str(problems_query([1, 2], ["infinitive", "tense"]).compile(dialect=postgresql.dialect()))
+
+    assert "JOIN LATERAL" in sql
+    assert "sentences.is_correct = false" in sql
+    assert "sentences.infinitive = correct.infinitive AND sentences.tense = correct.tense" in sql
+
+def test_unknown_match_columns_are_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(get_bank_problems(1, match=["content"]))
+
+def test_incorrect_sentences_meet_the_filters_too():
+
+    filters = SentenceFilters(tense="present", negation="pas")
+    sql     = str(problems_query([1], ["infinitive"], filters).compile(dialect=postgresql.dialect(), compile_kwargs={ "literal_binds": True }))
+    lateral = sql[sql.index("LATERAL"):]
+
+    assert "sentences.tense = 'present'" in lateral
+    assert "sentences.negation = 'pas'" in lateral
+
+def test_problems_must_match_on_infinitive():
+    with pytest.raises(ValueError):
+        asyncio.run(get_bank_problems(1, match=["tense"]))
@@ -0,0 +1,31 @@
+from lqconsole.benchmarks.results import BenchmarkResult, compare, read_results, write_results
+
+def result(name: str, **metrics) -> BenchmarkResult:
+    return BenchmarkResult("serving", name, { "concurrency": 10 }, metrics)
+
+def test_regressions_follow_the_direction_of_each_metric():
+
+    baseline = [result("/sentence", requests_per_second=100.0, p99_ms=10.0, errors=0)]
+
+    assert not compare([result("/sentence", requests_per_second=95.0, p99_ms=10.5, errors=3)], baseline, tolerance=0.1)
+    assert not compare([result("/sentence", requests_per_second=200.0, p99_ms=2.0)], baseline, tolerance=0.1)
+
+    regressions = compare([result("/sentence", requests_per_second=80.0, p99_ms=12.0)], baseline, tolerance=0.1)
+
+    assert [(regression.metric, round(regression.change, 2)) for regression in regressions] == [("requests_per_second", -0.2), ("p99_ms", 0.2)]
+
+def test_only_matching_results_are_compared():
+
+    baseline = [result("/sentence", requests_per_second=100.0)]
+    changed  = BenchmarkResult("serving", "/sentence", { "concurrency": 50 }, { "requests_per_second": 10.0 })
+
+    assert not compare([changed, result("/verbs/{infinitive}", requests_per_second=1.0)], baseline)
+
+def test_results_round_trip_through_json(tmp_path):
+
+    filename = str(tmp_path / "results.json")
+    results  = [result("/sentence", requests_per_second=100.0, p50_ms=1.5)]
+
+    write_results(filename, results, { "requests": 2000 })
+
+    assert read_results(filename) == results
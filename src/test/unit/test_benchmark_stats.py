@@ -0,0 +1,14 @@
+from lqconsole.benchmarks.stats import LatencySummary, percentile
+
+def test_percentiles_use_the_nearest_rank():
+
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+    assert LatencySummary.of([0.001, 0.002]).max_ms == 2.0
+
+def test_summaries_report_their_metrics_in_milliseconds():
+    assert LatencySummary.of([0.001, 0.002]).metrics(prefix="read_") == {
+        "read_mean_ms": 1.5, "read_p50_ms": 1.0, "read_p95_ms": 2.0, "read_p99_ms": 2.0, "read_max_ms": 2.0 }
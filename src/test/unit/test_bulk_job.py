@@ -0,0 +1,154 @@
+from contextlib import asynccontextmanager
+from os import makedirs
+from types import SimpleNamespace
+
+from sqlalchemy.sql.dml import Insert
+
+from lqconsole.ai.batch import LocalBatchBackend, batch_request
+from lqconsole.sentences import bulk
+from lqconsole.sentences.bulk import COMPLETED, INGESTED, PREPARED, SUBMITTED, SUBMITTING, BulkJob, run_bulk_job
+
+import asyncio
+import json
+import pytest
+
+class Interrupted(Exception):
+    pass
+
+class FakeDatabase:
+
+    #   Commits what a unit of work added only when it ends without an error, as the real one does.
+    def __init__(self):
+        self.sentences: list         = []
+        self.ingests:   dict[str, dict] = {}
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        added, ingests = [], {}
+
+        async def execute(statement):
+            params = statement.compile().params
+
+            if isinstance(statement, Insert):
+                ingests[params["batch_id"]] = params
+                return None
+
+            row = self.ingests.get(next(iter(params.values())))
+            return SimpleNamespace(first=lambda: None if row is None else (row["ingested"], row["failed"]))
+
+        yield SimpleNamespace(add_all=added.extend, execute=execute)
+
+        self.sentences += added
+        self.ingests.update(ingests)
+
+class CountingBackend(LocalBatchBackend):
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self.submitted: int = 0
+
+    async def submit(self, input_filename: str, key: str) -> str:
+        self.submitted += 1
+        return await super().submit(input_filename, key)
+
+@pytest.fixture(name="database")
+def fake_database(monkeypatch) -> FakeDatabase:
+    database = FakeDatabase()
+    monkeypatch.setattr(bulk, "unit_of_work", database.unit_of_work)
+    return database
+
+def prepared_job(directory: str, quantity: int=3) -> BulkJob:
+
+    #   What prepare_bulk_job leaves behind, without the database it needs to pick the sentences.
+    job = BulkJob(directory=directory)
+    makedirs(directory)
+
+    with open(job.filename(bulk.REQUESTS_FILE), "w", encoding="utf-8") as requests_file, \
+         open(job.filename(bulk.SENTENCES_FILE), "w", encoding="utf-8") as sentences_file:
+
+        for i in range(quantity):
+            requests_file.write(json.dumps(batch_request(f"sentence-{i}", f"prompt {i}")) + "\n")
+            sentences_file.write(json.dumps({ "custom_id": f"sentence-{i}", "infinitive": "savoir", "auxiliary": "avoir",
+                                              "pronoun": "first_person", "tense": "present", "is_correct": True }) + "\n")
+
+    job.quantity = quantity
+    job.save(PREPARED)
+
+    return job
+
+def interrupt_at(monkeypatch, stage: str):
+
+    #   The job stops just before its manifest records the stage, once.
+    save = BulkJob.save
+
+    def interrupted_save(job: BulkJob, saved_stage: str):
+        if saved_stage == stage:
+            monkeypatch.setattr(BulkJob, "save", save)
+            raise Interrupted(stage)
+        save(job, saved_stage)
+
+    monkeypatch.setattr(BulkJob, "save", interrupted_save)
+
+def test_a_prepared_job_runs_to_the_end(tmp_path, database):
+
+    prepared_job(str(tmp_path / "job"))
+    backend = CountingBackend(str(tmp_path / "batches"))
+
+    job = asyncio.run(run_bulk_job(str(tmp_path / "job"), backend, poll_interval=0))
+
+    assert job.stage == INGESTED
+    assert job.ingested == 3
+    assert len(database.sentences) == 3
+    assert BulkJob.load(str(tmp_path / "job")).history == [PREPARED, SUBMITTING, SUBMITTED, COMPLETED, INGESTED]
+
+def test_a_batch_submitted_before_an_interruption_is_not_resubmitted(tmp_path, database, monkeypatch):
+
+    prepared_job(str(tmp_path / "job"))
+    backend = CountingBackend(str(tmp_path / "batches"))
+
+    interrupt_at(monkeypatch, SUBMITTED)
+
+    with pytest.raises(Interrupted):
+        asyncio.run(run_bulk_job(str(tmp_path / "job"), backend, poll_interval=0))
+
+    job = asyncio.run(run_bulk_job(str(tmp_path / "job"), backend, poll_interval=0))
+
+    assert backend.submitted == 1
+    assert job.stage == INGESTED
+    assert len(database.sentences) == 3
+
+def test_a_batch_ingested_before_an_interruption_is_not_ingested_again(tmp_path, database, monkeypatch):
+
+    prepared_job(str(tmp_path / "job"))
+    backend = CountingBackend(str(tmp_path / "batches"))
+
+    interrupt_at(monkeypatch, INGESTED)
+
+    with pytest.raises(Interrupted):
+        asyncio.run(run_bulk_job(str(tmp_path / "job"), backend, poll_interval=0))
+
+    assert BulkJob.load(str(tmp_path / "job")).stage == COMPLETED
+
+    job = asyncio.run(run_bulk_job(str(tmp_path / "job"), backend, poll_interval=0))
+
+    assert job.stage == INGESTED
+    assert job.ingested == 3
+    assert len(database.sentences) == 3
+
+def test_a_completed_job_resumes_at_ingest(tmp_path, database, monkeypatch):
+
+    prepared_job(str(tmp_path / "job"))
+    backend = CountingBackend(str(tmp_path / "batches"))
+
+    interrupt_at(monkeypatch, COMPLETED)
+
+    with pytest.raises(Interrupted):
+        asyncio.run(run_bulk_job(str(tmp_path / "job"), backend, poll_interval=0))
+
+    assert not database.sentences
+
+    job = asyncio.run(run_bulk_job(str(tmp_path / "job"), backend, poll_interval=0))
+
+    assert backend.submitted == 1
+    assert job.stage == INGESTED
+    assert len(database.sentences) == 3
@@ -0,0 +1,110 @@
+from lqconsole.ai.fake import FakeLLM, FakeLLMSettings, respond
+from lqconsole.ai.ratelimit import AdaptiveRateLimiter
+from lqconsole.sentences.models import DirectObject, IndirectPronoun, Negation, Pronoun, Sentence
+from lqconsole.sentences.prompts import SentencePromptGenerator
+from lqconsole.sentences.validator import Verdict, validate_locally
+from lqconsole.verbs.get import parse_conjugations
+from lqconsole.verbs.models import Tense
+from lqconsole.verbs.prompts import generate_verb_prompt
+
+import asyncio
+import json
+import pytest
+
+def sentence(pronoun: Pronoun, negation: Negation=Negation.none, is_correct: bool=True) -> Sentence:
+    return Sentence(infinitive="aimer", pronoun=pronoun, tense=Tense.passe_compose, direct_object=DirectObject.none,
+                    indirect_pronoun=IndirectPronoun.none, negation=negation, is_correct=is_correct)
+
+def test_verbs_are_conjugated_from_templates():
+
+    rows = { row["tense"]: row for row in parse_conjugations(json.loads(respond(generate_verb_prompt("finir")))) }
+
+    assert rows["present"]["first_person_plural"] == "finissons"
+    assert rows["passe_compose"]["third_person_plural"] == "ont fini"
+    assert rows["participle"]["first_person_singular"] == "fini"
+
+def test_batched_sentences_pass_the_local_validator():
+
+    sentences = [sentence(Pronoun.first_person), sentence(Pronoun.third_person_plural, Negation.pas), sentence(Pronoun.second_person, is_correct=False)]
+    prompt    = SentencePromptGenerator().generate_sentences_prompt(sentences)
+    generated = json.loads(respond(prompt))
+
+    conjugation = { row["tense"]: row for row in parse_conjugations(json.loads(respond(generate_verb_prompt("aimer")))) }["passe_compose"]
+
+    assert [item["index"] for item in generated] == [0, 1, 2]
+    assert generated[0]["sentence"] == "J'ai aimé."
+    assert generated[1]["sentence"] == "Ils n'ont pas aimé."
+    assert generated[2]["is_correct"] == "False"
+
+    for spec, item in zip(sentences[:2], generated[:2]):
+        assert validate_locally(item["sentence"], spec.pronoun.name, item["negation"], conjugation).verdict is Verdict.valid
+
+    #   The same prompt always gets the same answer.
+    assert respond(prompt) == respond(prompt)
+
+def test_validation_and_correction_templates():
+
+    generator = SentencePromptGenerator()
+    checked   = sentence(Pronoun.first_person)
+    checked.content = "J'ai aimé."
+
+    assert respond(generator.validate_french_sentence_prompt(checked)) == "True"
+    assert json.loads(respond(generator.validate_french_sentences_prompt([checked, checked]))) == [True, True]
+    assert json.loads(respond(generator.correct_sentence_prompt(checked)))["corrected_sentence"] == "J'ai aimé."
+
+def test_rate_limits_are_enforced_and_reported():
+
+    fake: FakeLLM=FakeLLM(FakeLLMSettings(requests_per_minute=2), clock=lambda: 0.0)
+    body = { "messages": [{ "role": "user", "content": "Is the sentence 'Je sais.' correct?" }] }
+
+    statuses = [fake.complete(body)[0] for _ in range(3)]
+    _, headers, _ = fake.complete(body)
+
+    assert statuses == [200, 200, 429]
+    assert headers["retry-after"] == "1"
+    assert headers["x-ratelimit-remaining-requests"] == "0"
+
+    #   The headers are what the client's limiter expects.
+    limiter: AdaptiveRateLimiter=AdaptiveRateLimiter(clock=lambda: 0.0)
+    limiter.throttle(headers)
+
+    assert limiter.delay(0) == 1.0
+
+def test_injected_failures():
+
+    body = { "messages": [{ "role": "user", "content": generate_verb_prompt("parler") }] }
+
+    status, _, _ = FakeLLM(FakeLLMSettings(rate_limit_rate=1.0)).complete(body)
+    assert status == 429
+
+    status, _, completion = FakeLLM(FakeLLMSettings(malformed_rate=1.0)).complete(body)
+    assert status == 200
+
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(completion["choices"][0]["message"]["content"])
+
+def test_latency_follows_the_seeded_distribution():
+
+    def latencies(**settings) -> list[float]:
+        fake = FakeLLM(FakeLLMSettings(latency_ms=100, seed=7, **settings))
+        return [fake.latency() for _ in range(200)]
+
+    assert set(latencies()) == { 0.1 }
+    assert latencies(latency="lognormal") == latencies(latency="lognormal")
+    assert all(0.05 <= value <= 0.15 for value in latencies(latency="uniform", latency_spread=0.5))
+    assert 0.08 < sorted(latencies(latency="lognormal", latency_spread=0.3))[100] < 0.12
+
+def test_transport_answers_an_httpx_client():
+
+    httpx = pytest.importorskip("httpx")
+
+    from lqconsole.ai.fake_transport import FakeLLMTransport # pylint: disable=import-outside-toplevel
+
+    async def request():
+        async with httpx.AsyncClient(transport=FakeLLMTransport(), base_url="http://fake-llm/v1") as client:
+            return await client.post("/chat/completions", json={ "messages": [{ "role": "user", "content": "Is the sentence 'Je sais.' correct?" }] })
+
+    response = asyncio.run(request())
+
+    assert response.status_code == 200
+    assert response.json()["choices"][0]["message"]["content"] == "True"
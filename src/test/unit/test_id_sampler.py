@@ -0,0 +1,70 @@
+from lqconsole.database.sampling import IdSampler
+
+import asyncio
+import pytest
+
+class FakeResult:
+
+    def __init__(self, ids: list[int]):
+        self.ids = ids
+
+    def all(self):
+        return self.ids
+
+class FakeSession:
+
+    #   Answers each id query with the next batch of new ids, and records the statements it was given.
+    def __init__(self, *batches: list[int]):
+        self.batches    = list(batches)
+        self.statements = []
+
+    async def scalars(self, stmt):
+        self.statements.append(stmt.compile(compile_kwargs={ "literal_binds": True }).string)
+        return FakeResult(self.batches.pop(0) if self.batches else [])
+
+def test_sample_loads_a_bucket_once_and_picks_from_it():
+
+    sampler: IdSampler=IdSampler("sentences", ["infinitive", "is_correct"])
+    session: FakeSession=FakeSession([1, 2, 3])
+
+    async def run():
+        return [await sampler.sample(session, infinitive="savoir", is_correct=True) for _ in range(20)]
+
+    samples = asyncio.run(run())
+
+    assert all(len(sample) == 1 and sample[0] in (1, 2, 3) for sample in samples)
+    assert len(session.statements) == 1
+    assert "infinitive = 'savoir'" in session.statements[0]
+
+def test_refresh_only_fetches_new_rows():
+
+    sampler: IdSampler=IdSampler("verbs", refresh_interval=0)
+    session: FakeSession=FakeSession([1, 2], [5])
+
+    async def run():
+        await sampler.sample(session)
+        return await sampler.sample(session, quantity=10)
+
+    sample = asyncio.run(run())
+
+    assert sorted(sample) == [1, 2, 5]
+    assert "id > 2" in session.statements[1]
+
+def test_discarded_ids_are_not_sampled():
+
+    sampler: IdSampler=IdSampler("verbs")
+    session: FakeSession=FakeSession([1, 2])
+
+    async def run():
+        await sampler.sample(session)
+        sampler.discard(1)
+        return await sampler.sample(session, quantity=10)
+
+    assert asyncio.run(run()) == [2]
+
+def test_unknown_filters_are_rejected():
+
+    sampler: IdSampler=IdSampler("verbs")
+
+    with pytest.raises(ValueError):
+        asyncio.run(sampler.sample(FakeSession(), infinitive="savoir"))
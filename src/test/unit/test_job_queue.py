@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from lqconsole.jobs import queue
+from lqconsole.jobs.queue import claim_query, split_jobs, validate_job
+from lqconsole.jobs.worker import JobWorker
+
+import asyncio
+import pytest
+
+def test_claims_skip_rows_other_workers_hold():
+
+    sql = str(claim_query("host:1", 60).compile(dialect=postgresql.dialect()))
+
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "generation_jobs.lease_expires_at < now()" in sql
+    assert "RETURNING generation_jobs.id" in sql
+
+def test_jobs_are_split_and_validated():
+
+    assert split_jobs(10) == [10]
+    assert split_jobs(10, 4) == [4, 4, 2]
+    assert split_jobs(8, 4) == [4, 4]
+
+    validate_job("problems", 1, { "batched": True })
+    validate_job("sentences", 1, { "infinitive": "savoir", "tense": "present" })
+
+    with pytest.raises(ValueError):
+        validate_job("verbs", 1, {})
+    with pytest.raises(ValueError):
+        validate_job("sentences", 1, { "tense": "later" })
+    with pytest.raises(ValueError):
+        validate_job("sentences", 1, { "colour": "blue" })
+    with pytest.raises(ValueError):
+        validate_job("problems", 0, {})
+
+class FakeQueue:
+
+    #   The queue functions the worker calls, over a list of jobs instead of the table.
+    def __init__(self, jobs: list, renewals: bool=True):
+        self.jobs     = jobs
+        self.renewals = renewals
+        self.outcomes = {}
+
+    async def claim(self, owner, lease):
+        return self.jobs.pop(0) if self.jobs else None
+
+    async def renew(self, job_id, owner, lease):
+        return self.renewals
+
+    async def succeed(self, job_id, owner, result):
+        self.outcomes[job_id] = ("succeeded", result)
+        return True
+
+    async def fail(self, job_id, owner, error):
+        self.outcomes[job_id] = ("failed", error)
+        return True
+
+    async def release(self, job_id, owner):
+        self.outcomes[job_id] = ("released", None)
+        return True
+
+def fake_queue(monkeypatch, jobs: list, **kwargs) -> FakeQueue:
+    fake = FakeQueue(jobs, **kwargs)
+
+    for name in ["claim", "renew", "succeed", "fail", "release"]:
+        monkeypatch.setattr(queue, name, getattr(fake, name))
+
+    return fake
+
+def job(job_id: int, kind: str="problems") -> SimpleNamespace:
+    return SimpleNamespace(id=job_id, kind=kind, quantity=1, parameters={}, attempts=1, max_attempts=3)
+
+def test_worker_records_every_outcome(monkeypatch):
+
+    fake = fake_queue(monkeypatch, [job(1), job(2), job(3, kind="unknown")])
+
+    async def handler(claimed):
+        if claimed.id == 2:
+            raise RuntimeError("No sentences were generated")
+        return { "generated": claimed.quantity }
+
+    worker: JobWorker=JobWorker(concurrency=2, exit_when_empty=True, handlers={ "problems": handler })
+    stats = asyncio.run(worker.run())
+
+    assert fake.outcomes[1] == ("succeeded", { "generated": 1 })
+    assert fake.outcomes[2] == ("failed", "No sentences were generated")
+    assert fake.outcomes[3][0] == "failed"
+    assert (stats.claimed, stats.succeeded, stats.failed) == (3, 1, 2)
+
+def test_worker_stops_work_when_its_lease_is_lost(monkeypatch):
+
+    fake = fake_queue(monkeypatch, [job(1)], renewals=False)
+
+    async def handler(_):
+        await asyncio.sleep(10)
+
+    worker: JobWorker=JobWorker(lease=0.03, exit_when_empty=True, handlers={ "problems": handler })
+    stats = asyncio.run(asyncio.wait_for(worker.run(), timeout=5))
+
+    assert stats.lost == 1
+    assert not fake.outcomes
+
+def test_worker_stops_after_max_jobs(monkeypatch):
+
+    fake = fake_queue(monkeypatch, [job(1), job(2), job(3)])
+
+    async def handler(_):
+        return {}
+
+    stats = asyncio.run(JobWorker(max_jobs=2, handlers={ "problems": handler }).run())
+
+    assert stats.claimed == 2
+    assert len(fake.jobs) == 1
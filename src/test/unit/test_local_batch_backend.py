@@ -0,0 +1,43 @@
+from lqconsole.ai.batch import LocalBatchBackend, batch_request, batch_response_content
+
+import asyncio
+import json
+
+def test_local_backend_round_trip(tmp_path):
+
+    input_filename:  str=str(tmp_path / "requests.jsonl")
+    output_filename: str=str(tmp_path / "results.jsonl")
+
+    with open(input_filename, "w", encoding="utf-8") as input_file:
+        for i in range(3):
+            input_file.write(json.dumps(batch_request(f"sentence-{i}", f"prompt {i}")) + "\n")
+
+    backend: LocalBatchBackend=LocalBatchBackend(str(tmp_path / "batches"), responder=lambda body: body["messages"][0]["content"].upper())
+
+    async def run():
+        batch_id = await backend.submit(input_filename, "job")
+        status   = await backend.status(batch_id)
+        await backend.download(batch_id, output_filename)
+        return status
+
+    status = asyncio.run(run())
+
+    assert status.is_finished
+    assert status.completed == 3
+
+    with open(output_filename, encoding="utf-8") as output_file:
+        results = [json.loads(line) for line in output_file]
+
+    assert [result["custom_id"] for result in results] == ["sentence-0", "sentence-1", "sentence-2"]
+    assert batch_response_content(results[1]) == "PROMPT 1"
+
+def test_unknown_batch_fails(tmp_path):
+
+    backend: LocalBatchBackend=LocalBatchBackend(str(tmp_path))
+
+    assert asyncio.run(backend.status("missing")).state == "failed"
+
+def test_failed_results_have_no_content():
+
+    assert batch_response_content({ "custom_id": "sentence-0", "response": None, "error": { "message": "failed" } }) is None
+    assert batch_response_content({ "custom_id": "sentence-0", "response": { "status_code": 500, "body": {} }, "error": None }) is None
@@ -0,0 +1,61 @@
+from lqconsole.sentences.validator import Verdict, tokenize, validate_locally
+
+savoir_present: dict={
+    "first_person_singular":  "sais",
+    "second_person_singular": "sais",
+    "third_person_singular":  "sait",
+    "first_person_plural":    "savons",
+    "second_person_formal":   "savez",
+    "third_person_plural":    "savent",
+}
+
+donner_passe_compose: dict={
+    "first_person_singular": "ai donné",
+    "third_person_plural":   "ont donné",
+}
+
+def test_tokenize_splits_elisions():
+    assert tokenize("Je ne l’ai pas donné.") == ["je", "ne", "l'", "ai", "pas", "donné"]
+
+def test_well_formed_sentence_is_valid():
+    result = validate_locally("Je sais la réponse.", "first_person", "none", savoir_present)
+    assert result.verdict is Verdict.valid
+
+def test_compound_tense_with_negation_is_valid():
+    result = validate_locally("Je ne le lui ai jamais donné.", "first_person", "jamais", donner_passe_compose)
+    assert result.verdict is Verdict.valid
+
+def test_missing_elision_is_invalid():
+    result = validate_locally("Je ai donné le livre.", "first_person", "none", donner_passe_compose)
+    assert result.verdict is Verdict.invalid
+
+def test_negation_without_ne_is_invalid():
+    result = validate_locally("Je sais pas.", "first_person", "pas", savoir_present)
+    assert result.verdict is Verdict.invalid
+
+def test_object_pronouns_out_of_order_are_invalid():
+    result = validate_locally("Ils lui l'ont donné.", "third_person_plural", "none", donner_passe_compose)
+    assert result.verdict is Verdict.invalid
+
+def test_unknown_conjugation_is_inconclusive():
+    result = validate_locally("Je sais la réponse.", "first_person", "none", None)
+    assert result.verdict is Verdict.inconclusive
+
+def test_wrong_subject_is_inconclusive():
+    result = validate_locally("Tu sais la réponse.", "first_person", "none", savoir_present)
+    assert result.verdict is Verdict.inconclusive
+
+def test_negative_subject_is_inconclusive():
+    result = validate_locally("Personne ne sait la réponse.", "third_person", "personne", savoir_present)
+    assert result.verdict is Verdict.inconclusive
+
+def test_words_starting_with_y_do_not_need_an_elision():
+    assert validate_locally("Je mange le yaourt.", "first_person", "none", None).verdict is not Verdict.invalid
+    assert validate_locally("Je sais les pommes de Yves.", "first_person", "none", savoir_present).verdict is Verdict.valid
+    assert validate_locally("Je sais les pommes d'Yves.", "first_person", "none", savoir_present).verdict is Verdict.valid
+
+def test_the_pronoun_y_takes_an_elision():
+    assert validate_locally("Je n'y sais rien.", "first_person", "rien", savoir_present).verdict is Verdict.valid
+    assert validate_locally("J'y ai donné le livre.", "first_person", "none", donner_passe_compose).verdict is Verdict.valid
+    assert validate_locally("Je ne y sais rien.", "first_person", "rien", savoir_present).verdict is Verdict.invalid
+    assert validate_locally("Je le y ai donné.", "first_person", "none", donner_passe_compose).verdict is Verdict.invalid
@@ -0,0 +1,24 @@
+from lqconsole.database.migrate import read_migrations
+
+import pytest
+
+def test_shipped_migrations_are_in_version_order():
+
+    migrations = read_migrations()
+
+    assert [m.version for m in migrations] == sorted(m.version for m in migrations)
+    assert str(migrations[0]) == "0001-AddConjugationUniqueKey"
+    assert "sentences_lookup_index" in migrations[1].sql()
+
+def test_other_files_are_ignored_and_duplicate_versions_rejected(tmp_path):
+
+    (tmp_path / "README.md").write_text("")
+    (tmp_path / "2-Second.sql").write_text("")
+    (tmp_path / "1-First.sql").write_text("")
+
+    assert [m.name for m in read_migrations(str(tmp_path))] == ["First", "Second"]
+
+    (tmp_path / "01-Again.sql").write_text("")
+
+    with pytest.raises(ValueError):
+        read_migrations(str(tmp_path))
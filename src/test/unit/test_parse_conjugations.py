@@ -0,0 +1,42 @@
+from lqconsole.verbs.get import parse_conjugations
+
+def test_conjugations_are_mapped_to_columns():
+
+    rows = parse_conjugations({
+        "infinitive": "savoir",
+        "tenses": [
+            { "tense": "present", "conjugations": [
+                { "pronoun": "je", "verb": "sais" },
+                { "pronoun": "il/elle/on", "verb": "sait" },
+                { "pronoun": "vous", "verb": "savez" }
+            ]},
+            { "tense": "participle", "conjugations": [{ "pronoun": "-", "verb": "su" }] }
+        ]
+    })
+
+    present, participle = rows
+
+    assert present["tense"] == "present"
+    assert present["first_person_singular"] == "sais"
+    assert present["third_person_singular"] == "sait"
+    assert present["second_person_formal"] == "savez"
+    assert participle["third_person_plural"] == "su"
+
+def test_missing_values_are_left_null_for_the_upsert():
+
+    rows = parse_conjugations({
+        "infinitive": "savoir",
+        "tenses": [{ "tense": "present", "conjugations": [{ "pronoun": "tu", "verb": None }] }]
+    })
+
+    assert rows[0]["second_person_singular"] is None
+    assert rows[0]["first_person_plural"] is None
+
+def test_unknown_tenses_are_skipped():
+
+    rows = parse_conjugations({
+        "infinitive": "savoir",
+        "tenses": [{ "tense": "subjonctif", "conjugations": [{ "pronoun": "je", "verb": "sache" }] }]
+    })
+
+    assert rows == []
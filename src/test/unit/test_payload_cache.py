@@ -0,0 +1,150 @@
+from lqconsole.webserver.verbs.cache import PayloadCache, etag_matches
+
+import asyncio
+import pytest
+
+class Loader:
+
+    #   Counts loads, and can hold them open until released.
+    def __init__(self, body: bytes=b'{"infinitive":"savoir"}'):
+        self.body    = body
+        self.loads   = 0
+        self.release = None
+
+    async def __call__(self) -> bytes:
+        self.loads += 1
+
+        if self.release is not None:
+            await self.release.wait()
+
+        return self.body
+
+def test_hits_are_served_without_loading():
+
+    cache: PayloadCache=PayloadCache()
+    loader: Loader=Loader()
+
+    async def run():
+        first  = await cache.get("savoir", loader)
+        second = await cache.get("savoir", loader)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first is second
+    assert loader.loads == 1
+    assert cache.stats.hits == 1
+
+def test_concurrent_misses_share_one_load():
+
+    cache: PayloadCache=PayloadCache()
+    loader: Loader=Loader()
+
+    async def run():
+        loader.release = asyncio.Event()
+        waiting = asyncio.gather(*[cache.get("savoir", loader) for _ in range(10)])
+        await asyncio.sleep(0)
+        loader.release.set()
+        return await waiting
+
+    payloads = asyncio.run(run())
+
+    assert loader.loads == 1
+    assert all(payload.body == loader.body for payload in payloads)
+
+def test_least_recently_used_entries_are_evicted():
+
+    cache: PayloadCache=PayloadCache(max_entries=2)
+
+    async def run():
+        for key in ("aller", "savoir", "aller", "faire"):
+            await cache.get(key, Loader(key.encode()))
+
+    asyncio.run(run())
+
+    assert list(cache.entries) == ["aller", "faire"]
+
+def test_loads_overlapping_an_invalidation_are_not_kept():
+
+    cache: PayloadCache=PayloadCache()
+    loader: Loader=Loader()
+
+    async def run():
+        loader.release = asyncio.Event()
+        loading = asyncio.create_task(cache.get("savoir", loader))
+        await asyncio.sleep(0)
+        cache.invalidate("savoir")
+        loader.release.set()
+        return await loading
+
+    assert asyncio.run(run()) is not None
+    assert len(cache) == 0
+
+def test_failed_loads_reach_every_waiter():
+
+    cache: PayloadCache=PayloadCache()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("no database")
+
+    async def run():
+        return await asyncio.gather(cache.get("savoir", fail), cache.get("savoir", fail), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(run()))
+    assert cache.inflight == {}
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", "abc"', True),
+    ('*', True),
+    ('"xyz"', False),
+])
+def test_etag_matching(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+
+def test_get_many_loads_all_misses_together():
+
+    cache: PayloadCache=PayloadCache()
+    batches: list[list[str]] = []
+
+    async def load(keys: list[str]) -> dict[str, bytes]:
+        batches.append(keys)
+        return { key: key.encode() for key in keys if key != "unknown" }
+
+    async def run():
+        await cache.get_many(["aller"], load)
+        return await cache.get_many(["savoir", "aller", "unknown", "savoir"], load)
+
+    payloads = asyncio.run(run())
+
+    assert batches == [["aller"], ["savoir", "unknown"]]
+    assert payloads["aller"].body == b"aller"
+    assert payloads["unknown"] is None
+
+def test_waiters_load_for_themselves_when_the_first_caller_is_cancelled():
+
+    cache: PayloadCache=PayloadCache()
+    loader: Loader=Loader()
+
+    async def run():
+        loader.release = asyncio.Event()
+        owner    = asyncio.create_task(cache.get("savoir", loader))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get("savoir", loader))
+        await asyncio.sleep(0)
+
+        owner.cancel()
+        await asyncio.sleep(0)
+        loader.release.set()
+
+        return owner, await follower
+
+    owner, payload = asyncio.run(run())
+
+    assert owner.cancelled()
+    assert payload.body == loader.body
+    assert loader.loads == 2
+    assert cache.inflight == {}
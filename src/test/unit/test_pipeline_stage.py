@@ -0,0 +1,71 @@
+from lqconsole.utils.queues import PipelineStage
+
+import asyncio
+
+def test_stages_pass_items_along_and_count_failures():
+
+    results: list[int]=[]
+
+    async def run():
+
+        async def collect(item: int):
+            results.append(item)
+
+        async def double(item: int):
+            if item == 3:
+                raise ValueError("bad item")
+            await sink.put(item * 2)
+
+        sink   = PipelineStage("sink", collect, workers=1, queue_size=2)
+        source = PipelineStage("double", double, workers=3, queue_size=2)
+
+        sink.start()
+        source.start()
+
+        for i in range(6):
+            await source.put(i)
+
+        await source.close()
+        await sink.close()
+
+        return source, sink
+
+    source, sink = asyncio.run(run())
+
+    assert sorted(results) == [0, 2, 4, 8, 10]
+    assert source.processed == 5
+    assert source.failed == 1
+    assert sink.processed == 5
+    assert sink.depth == 0
+
+def test_bounded_queue_applies_backpressure():
+
+    async def run():
+        release = asyncio.Event()
+
+        async def blocked(item: int): # pylint: disable=unused-argument
+            await release.wait()
+
+        stage = PipelineStage("blocked", blocked, workers=1, queue_size=2)
+        stage.start()
+
+        for i in range(3):
+            await stage.put(i)
+
+        producer = asyncio.create_task(stage.put(3))
+        await asyncio.sleep(0.01)
+
+        blocked_depth = stage.depth
+        was_blocked   = not producer.done()
+
+        release.set()
+        await producer
+        await stage.close()
+
+        return blocked_depth, was_blocked, stage.processed
+
+    depth, was_blocked, processed = asyncio.run(run())
+
+    assert depth == 2
+    assert was_blocked
+    assert processed == 4
@@ -0,0 +1,30 @@
+from lqconsole.database import engine
+from lqconsole.database.engine import PoolSettings, configure_engine
+
+import asyncio
+
+def test_pool_settings_read_the_environment(monkeypatch):
+
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "true")
+
+    settings: PoolSettings=PoolSettings.from_environment()
+
+    assert settings.pool_size == 20
+    assert settings.pool_pre_ping is True
+    assert settings.max_overflow == PoolSettings.max_overflow
+
+def test_configure_engine_applies_only_given_overrides():
+
+    original: PoolSettings=engine.pool_settings
+
+    try:
+        settings = asyncio.run(configure_engine(pool_size=3, max_overflow=None, debug=True))
+
+        assert settings.pool_size == 3
+        assert settings.max_overflow == original.max_overflow
+        assert engine.async_engine.pool.size() == 3
+        assert engine.AsyncSessionLocal.kw["bind"] is engine.async_engine
+        assert engine.pool_statistics().checkouts == 0
+    finally:
+        asyncio.run(configure_engine(**{ "pool_size": original.pool_size }))
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from lqconsole.database.engine import PoolSettings
+from lqconsole.problems import batch
+from lqconsole.problems.batch import BatchOptions, BatchStats, run_batch_processes, split_quantity
+
+import asyncio
+import threading
+
+def test_split_quantity_is_even():
+
+    assert split_quantity(10, 3) == [4, 3, 3]
+    assert split_quantity(9, 3) == [3, 3, 3]
+    assert split_quantity(2, 4) == [1, 1, 0, 0]
+    assert sum(split_quantity(1001, 7)) == 1001
+
+def test_stats_are_merged_across_processes():
+
+    merged: BatchStats=BatchStats.merged([
+        BatchStats(generated=40, failed=1, elapsed=10.0, requests=170, throttled=2, checkouts=50, peak_connections=4),
+        BatchStats(generated=39, failed=2, elapsed=12.0, requests=160, throttled=0, checkouts=48, peak_connections=5)])
+
+    assert merged.generated == 79
+    assert merged.failed == 3
+    assert merged.requests == 330
+    assert merged.throttled == 2
+    assert merged.peak_connections == 9
+    assert merged.processes == 2
+
+    #   The processes overlap, so the slowest of them is the batch's elapsed time.
+    assert merged.elapsed == 12.0
+    assert merged.rate == 79 / 12.0
+
+def test_interrupted_processes_still_report(monkeypatch):
+
+    #   Threads stand in for the processes.  Each one stops when Ctrl-C would reach it, and reports what it finished.
+    interrupted: threading.Event=threading.Event()
+
+    def run_batch_process(index, processes, quantity, *_) -> BatchStats:
+        if index == 0:
+            raise RuntimeError("crashed")
+
+        interrupted.wait(5)
+        return BatchStats(generated=quantity - 1, failed=1, elapsed=1.0)
+
+    monkeypatch.setattr(batch, "run_batch_process", run_batch_process)
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", lambda max_workers, mp_context: ThreadPoolExecutor(max_workers))
+
+    reported: list[BatchStats]=[]
+
+    async def run():
+        task = asyncio.create_task(run_batch_processes(9, 3, BatchOptions(), PoolSettings(), reported))
+        await asyncio.sleep(0.1)
+
+        task.cancel()
+        interrupted.set()
+
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+
+        return False
+
+    assert asyncio.run(run())
+    assert [(stats.generated, stats.failed, stats.processes) for stats in reported] == [(4, 5, 3)]
@@ -0,0 +1,29 @@
+from lqconsole.problems import create
+from lqconsole.problems.create import create_random_problem
+
+import asyncio
+import pytest
+
+def test_a_failed_sentence_cancels_the_others(monkeypatch):
+
+    saved: list[bool] = []
+
+    async def create_sentence(*_, is_correct: bool, **__):
+        if is_correct:
+            raise RuntimeError("out of attempts")
+
+        await asyncio.sleep(0.1)
+        saved.append(is_correct)
+
+    monkeypatch.setattr(create, "create_sentence", create_sentence)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await create_random_problem(openai_client=object(), attempts=1)
+
+        #   Long enough for any sentence that was left running to be saved.
+        await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+
+    assert not saved
@@ -0,0 +1,155 @@
+from types import SimpleNamespace
+
+from lqconsole.ai.client import AsyncChatGPTClient
+from lqconsole.ai.ratelimit import AdaptiveRateLimiter, SharedPause, TokenBucket, parse_duration
+
+import asyncio
+import openai
+import os
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_parse_duration():
+
+    assert parse_duration("20") == 20.0
+    assert parse_duration("1s") == 1.0
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("1h2m3.5s") == 3723.5
+    assert parse_duration("soon") is None
+    assert parse_duration(None) is None
+
+def test_token_bucket_refills_over_time():
+
+    clock:  FakeClock=FakeClock()
+    bucket: TokenBucket=TokenBucket(60, clock)
+
+    bucket.take(60)
+    assert bucket.delay(1) == 1.0
+
+    clock.now = 30.0
+    assert bucket.delay(30) == 0.0
+    assert bucket.delay(31) == 1.0
+
+def test_token_bucket_follows_server_headers():
+
+    clock:  FakeClock=FakeClock()
+    bucket: TokenBucket=TokenBucket(60, clock)
+
+    bucket.observe(limit=600, remaining=0)
+
+    assert bucket.capacity == 600
+    assert bucket.delay(10) == 1.0
+
+def test_limiter_grows_and_halves_concurrency():
+
+    clock:   FakeClock=FakeClock()
+    limiter: AdaptiveRateLimiter=AdaptiveRateLimiter(initial_concurrency=4, max_concurrency=8, clock=clock)
+
+    for _ in range(100):
+        limiter.observe({})
+
+    assert limiter.concurrency == 8
+
+    limiter.throttle({ "retry-after": "2" })
+
+    assert limiter.concurrency == 4
+    assert limiter.delay(0) == 2.0
+
+def test_limiter_bounds_requests_in_flight():
+
+    limiter: AdaptiveRateLimiter=AdaptiveRateLimiter(initial_concurrency=2, max_concurrency=2)
+    peak: int=0
+
+    async def request():
+        nonlocal peak
+
+        async with limiter.request(estimated_tokens=1) as permit:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+            permit.completed({})
+
+    async def run():
+        await asyncio.gather(*[request() for _ in range(6)])
+
+    asyncio.run(run())
+
+    assert peak == 2
+    assert limiter.in_flight == 0
+    assert limiter.completed_requests == 6
+
+def test_limiter_scales_its_share_of_the_account():
+
+    clock:   FakeClock=FakeClock()
+    limiter: AdaptiveRateLimiter=AdaptiveRateLimiter(requests_per_minute=600, share=0.25, clock=clock)
+
+    assert limiter.requests.capacity == 150
+
+    #   The server reports the whole account, of which this limiter has a quarter.
+    limiter.observe({ "x-ratelimit-limit-requests": "1000", "x-ratelimit-remaining-requests": "40" })
+
+    assert limiter.requests.capacity == 250
+    assert limiter.requests.tokens == 10
+
+def test_shared_pause_is_seen_by_every_limiter(tmp_path):
+
+    clock: FakeClock=FakeClock()
+    now:   list[float]=[1000.0]
+
+    def shared_pause() -> SharedPause:
+        return SharedPause(os.path.join(tmp_path, "pause"), clock=lambda: now[0])
+
+    first:  AdaptiveRateLimiter=AdaptiveRateLimiter(shared_pause=shared_pause(), clock=clock)
+    second: AdaptiveRateLimiter=AdaptiveRateLimiter(shared_pause=shared_pause(), clock=clock)
+
+    assert second.delay(0) == 0.0
+
+    first.throttle({ "retry-after": "3" })
+
+    #   The others see it once they next read the file, after at most the refresh interval.
+    assert second.delay(0) == 0.0
+
+    now[0]    += 0.5
+    clock.now += 0.5
+
+    assert second.delay(0) == 2.5
+
+    #   A shorter pause never cuts a longer one short.
+    second.throttle({ "retry-after": "1" })
+    now[0]    += 2.0
+    clock.now += 2.0
+
+    assert second.delay(0) == 0.5
+    assert first.delay(0) == 0.5
+
+def test_client_retries_transient_failures():
+
+    failures: list[Exception]=[openai.APIConnectionError(request=None), openai.APITimeoutError(request=None)]
+
+    class RawResponse:
+        headers = {}
+
+        def parse(self):
+            return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content="True"))])
+
+    async def create(**_):
+        if failures:
+            raise failures.pop(0)
+        return RawResponse()
+
+    client: AsyncChatGPTClient=AsyncChatGPTClient(api_key="test", limiter=AdaptiveRateLimiter(), retry_backoff=0.0)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(with_raw_response=SimpleNamespace(create=create))))
+
+    assert asyncio.run(client.handle_request("prompt", use_cache=False)) == "True"
+    assert not failures
+
+    #   Anything else is not retried.
+    failures.extend([openai.BadRequestError("bad", response=SimpleNamespace(status_code=400, headers={}, request=None), body=None), None])
+
+    assert asyncio.run(client.handle_request("prompt", use_cache=False)).startswith("str(bad)")
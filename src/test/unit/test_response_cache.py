@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+
+from lqconsole.ai.cache import MemoryCache, SqliteCache, TieredCache, cache_key
+from lqconsole.ai.client import AsyncChatGPTClient
+
+import asyncio
+import sqlite3
+
+def test_cache_key_depends_on_model_role_and_prompt():
+
+    key: str=cache_key("gpt-4o", "user", "prompt")
+
+    assert key == cache_key("gpt-4o", "user", "prompt")
+    assert key != cache_key("gpt-4o-mini", "user", "prompt")
+    assert key != cache_key("gpt-4o", "system", "prompt")
+    assert key != cache_key("gpt-4o", "user", "another prompt")
+    assert key != cache_key("gpt-4o", "user", "prompt", "http://127.0.0.1:8090/v1/")
+
+def test_other_endpoints_do_not_share_openai_responses():
+
+    cache: MemoryCache=MemoryCache()
+
+    openai_client: AsyncChatGPTClient=AsyncChatGPTClient(api_key="test", cache=cache)
+    fake_client:   AsyncChatGPTClient=AsyncChatGPTClient(api_key="test", cache=cache, base_url="http://127.0.0.1:8090/v1")
+
+    cache.set(cache_key(fake_client.model, fake_client.role, "prompt", fake_client.endpoint), "fake")
+
+    assert openai_client.endpoint is None
+    assert cache.get(cache_key(openai_client.model, openai_client.role, "prompt", openai_client.endpoint)) is None
+
+def test_memory_cache_evicts_least_recently_used():
+
+    cache: MemoryCache=MemoryCache(max_entries=2)
+
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+
+def test_memory_cache_expires_entries():
+
+    cache: MemoryCache=MemoryCache(ttl=-1)
+    cache.set("a", "1")
+
+    assert cache.get("a") is None
+    assert cache.stats.misses == 1
+
+def test_sqlite_cache_persists_and_evicts(tmp_path):
+
+    filename: str=str(tmp_path / "responses.sqlite")
+
+    cache: SqliteCache=SqliteCache(filename, max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.set("c", "3")
+
+    reopened: SqliteCache=SqliteCache(filename, max_entries=2)
+
+    assert reopened.get("a") is None
+    assert reopened.get("c") == "3"
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+
+    memory: MemoryCache=MemoryCache()
+    disk:   SqliteCache=SqliteCache(str(tmp_path / "responses.sqlite"))
+
+    disk.set("a", "1")
+
+    cache: TieredCache=TieredCache(memory, disk)
+
+    assert cache.get("a") == "1"
+    assert memory.get("a") == "1"
+    assert cache.stats.hits == 1
+
+def test_client_only_calls_api_on_a_miss():
+
+    client: AsyncChatGPTClient=AsyncChatGPTClient(api_key="test", cache=MemoryCache())
+    calls: list[str]=[]
+
+    class Message:
+        content = "response"
+
+    class Choice:
+        message = Message()
+
+    class Completion:
+        choices = [Choice()]
+
+    async def completions(**kwargs):
+        calls.append(kwargs["messages"][0]["content"])
+        return Completion()
+
+    client.completions_with_backoff = completions
+
+    async def run():
+        assert await client.handle_request("prompt") == "response"
+        assert await client.handle_request("prompt") == "response"
+        assert await client.handle_request("prompt", use_cache=False) == "response"
+
+    asyncio.run(run())
+
+    assert len(calls) == 2
+    assert client.cache.stats.hits == 1
+
+def test_client_forgets_responses():
+
+    prompt: str="prompt"
+
+    client: AsyncChatGPTClient=AsyncChatGPTClient(api_key="test", cache=MemoryCache())
+    client.cache.set(cache_key(client.model, client.role, prompt), "malformed")
+
+    client.forget(prompt)
+
+    assert client.cache.get(cache_key(client.model, client.role, prompt)) is None
+
+def test_cache_failures_do_not_lose_completions():
+
+    class LockedCache(MemoryCache):
+
+        def _get(self, key: str):
+            raise sqlite3.OperationalError("database is locked")
+
+        def _set(self, key: str, value: str):
+            raise sqlite3.OperationalError("database is locked")
+
+    client: AsyncChatGPTClient=AsyncChatGPTClient(api_key="test", cache=LockedCache())
+
+    async def completions(**_):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="response"))])
+
+    client.completions_with_backoff = completions
+
+    assert asyncio.run(client.handle_request("prompt")) == "response"
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine
+
+from lqconsole.database.metadata import metadata
+from lqconsole.database.schema import compare_schema
+from lqconsole.sentences.models import Sentence
+
+def test_matching_schema_has_no_problems():
+
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+
+    with engine.connect() as connection:
+        assert compare_schema(connection) == []
+
+def test_missing_tables_and_columns_are_reported():
+
+    engine = create_engine("sqlite://")
+    Table("verbs", MetaData(), Column("id", Integer, primary_key=True)).create(engine)
+
+    with engine.connect() as connection:
+        problems = compare_schema(connection)
+
+    assert "Column verbs.infinitive does not exist." in problems
+    assert "Table sentences does not exist." in problems
+
+def test_sentences_are_mapped_without_a_database():
+
+    sentence: Sentence=Sentence(infinitive="savoir", pronoun="first_person", tense="present")
+
+    assert sentence.infinitive == "savoir"
+    assert [column.name for column in Sentence.__table__.columns][-1] == "is_correct"
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+from lqconsole.sentences import inventory as inventory_module
+from lqconsole.sentences.database import SentenceFilters
+from lqconsole.sentences.inventory import SentenceInventory
+
+import asyncio
+import pytest
+
+class FakeBank:
+
+    #   Stands in for the sentence table, the verb table and the LLM.
+    def __init__(self, stock: dict[SentenceFilters, int], verbs: set[str]):
+        self.stock     = stock
+        self.verbs     = verbs
+        self.sampled:  list[SentenceFilters] = []
+        self.created:  list[int]             = []
+
+    async def sample_sentences(self, quantity: int, **filters):
+        key = SentenceFilters(**filters)
+        self.sampled.append(key)
+        return [SimpleNamespace(content="En stock.")] * min(quantity, self.stock.get(key, 0))
+
+    async def get_verb(self, infinitive: str):
+        return SimpleNamespace(infinitive=infinitive) if infinitive in self.verbs else None
+
+    async def count_stock(self, keys: list[SentenceFilters]):
+        return { key: self.stock.get(key, 0) for key in keys }
+
+    async def create_sentences(self, specs, _):
+        self.created.append(len(specs))
+
+        for spec in specs:
+            key = SentenceFilters(infinitive=spec.verb_infinitive or None, is_correct=spec.is_correct)
+            self.stock[key] = self.stock.get(key, 0) + 1
+
+        return [SimpleNamespace(content="Nouvelle.") for _ in specs]
+
+@pytest.fixture(name="bank")
+def fake_bank(monkeypatch) -> FakeBank:
+
+    bank = FakeBank({ SentenceFilters("parler"): 3 }, { "parler", "finir" })
+
+    for name in ("sample_sentences", "get_verb", "count_stock", "create_sentences"):
+        monkeypatch.setattr(inventory_module, name, getattr(bank, name))
+
+    return bank
+
+def test_stocked_buckets_are_served_from_the_table(bank):
+
+    inventory = SentenceInventory(openai_client=object())
+
+    assert asyncio.run(inventory.take(SentenceFilters("parler"))).content == "En stock."
+    assert inventory.stats.served_from_stock == 1
+    assert inventory.queue.empty()
+    assert not bank.created
+
+def test_empty_buckets_are_answered_inline_and_refilled(bank):
+
+    inventory = SentenceInventory(openai_client=object())
+    key       = SentenceFilters("finir")
+
+    assert asyncio.run(inventory.take(key)).content == "Nouvelle."
+    assert inventory.stats.served_inline == 1
+    assert inventory.queue.get_nowait() == key
+
+def test_unknown_verbs_are_rejected_before_sampling(bank):
+
+    inventory = SentenceInventory(openai_client=object())
+
+    with pytest.raises(LookupError):
+        asyncio.run(inventory.take(SentenceFilters("xyzzy")))
+
+    assert not bank.sampled
+    assert not inventory.buckets
+
+def test_check_queues_low_buckets(bank):
+
+    inventory = SentenceInventory(low_water=5, openai_client=object())
+    inventory.track(SentenceFilters("parler"))
+    inventory.track(SentenceFilters("finir"))
+    bank.stock[SentenceFilters("finir")] = 10
+
+    asyncio.run(inventory.check())
+
+    assert inventory.buckets == { SentenceFilters("parler"): 3, SentenceFilters("finir"): 10 }
+    assert inventory.queued == { SentenceFilters("parler") }
+
+def test_refill_tops_up_to_the_target_in_batches(bank):
+
+    inventory = SentenceInventory(target=10, refill_batch=3, openai_client=object())
+
+    asyncio.run(inventory.refill(SentenceFilters("parler")))
+
+    assert bank.created == [3, 3, 1]
+    assert bank.stock[SentenceFilters("parler")] == 10
+    assert inventory.stats.refilled == 7
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from lqconsole.sentences.models import DirectObject, IndirectPronoun, Negation, Pronoun
+from lqconsole.sentences.prompts import SentencePromptGenerator
+from lqconsole.verbs.models import Tense
+
+def sentence(infinitive: str, is_correct: bool=True, content: str=None):
+    return SimpleNamespace(
+        infinitive       = infinitive,
+        pronoun          = Pronoun.first_person,
+        tense            = Tense.present,
+        direct_object    = DirectObject.none,
+        indirect_pronoun = IndirectPronoun.none,
+        negation         = Negation.none,
+        is_correct       = is_correct,
+        content          = content)
+
+def test_batched_prompt_shares_rules_and_numbers_sentences():
+
+    generator: SentencePromptGenerator=SentencePromptGenerator()
+    sentences=[sentence("savoir"), sentence("faire", is_correct=False), sentence("aller")]
+
+    single:  str=generator.generate_sentence_prompt(sentences[0])
+    batched: str=generator.generate_sentences_prompt(sentences)
+
+    for i, s in enumerate(sentences):
+        assert f"Sentence {i}:" in batched
+        assert s.infinitive in batched
+
+    assert "exactly 3 objects" in batched
+    assert batched.count("The sentence should have correct French elisions.") == 1
+    assert len(batched) < len(single) * len(sentences)
+
+def test_batched_validation_prompt_lists_every_sentence():
+
+    generator: SentencePromptGenerator=SentencePromptGenerator()
+    sentences=[sentence("savoir", content="Je sais."), sentence("aller", content="Je vais.")]
+
+    prompt: str=generator.validate_french_sentences_prompt(sentences)
+
+    assert "exactly 2 values" in prompt
+    assert "0: Je sais." in prompt
+    assert "1: Je vais." in prompt
@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+
+from lqconsole.sentences.models import DirectObject, IndirectPronoun, Negation, Pronoun
+from lqconsole.sentences.writer import SentenceWriter, sentence_row
+from lqconsole.verbs.models import Tense
+
+import asyncio
+
+def sentence(content: str):
+    return SimpleNamespace(
+        infinitive       = "savoir",
+        auxiliary        = "avoir",
+        pronoun          = Pronoun.first_person,
+        tense            = "present",
+        direct_object    = DirectObject.none,
+        indirect_pronoun = IndirectPronoun.none,
+        negation         = Negation.pas,
+        content          = content,
+        translation      = "",
+        is_correct       = True)
+
+def recording_writer(**kwargs) -> tuple[SentenceWriter, list[list[dict]]]:
+
+    writer: SentenceWriter=SentenceWriter(**kwargs)
+    writes: list[list[dict]]=[]
+
+    async def insert(rows):
+        writes.append(rows)
+
+    writer._SentenceWriter__insert = insert # pylint: disable=protected-access
+    return writer, writes
+
+def test_rows_store_enums_by_name():
+
+    row = sentence_row(sentence("Je ne sais pas."))
+
+    assert row["pronoun"] == "first_person"
+    assert row["negation"] == "pas"
+    assert row["tense"] == str(Tense.present)
+
+def test_writer_flushes_by_size_and_on_exit():
+
+    writer, writes = recording_writer(batch_size=3, flush_interval=60)
+
+    async def run():
+        async with writer:
+            for i in range(7):
+                await writer.add(sentence(str(i)))
+
+    asyncio.run(run())
+
+    assert [len(rows) for rows in writes] == [3, 3, 1]
+    assert writer.rows == 7
+    assert writer.flushes == 3
+
+def test_writer_flushes_on_a_timer():
+
+    writer, writes = recording_writer(batch_size=100, flush_interval=0.01)
+
+    async def run():
+        async with writer:
+            await writer.add(sentence("0"))
+            await asyncio.sleep(0.05)
+            return len(writes)
+
+    assert asyncio.run(run()) == 1
+
+def test_failed_rows_are_kept_for_the_next_flush():
+
+    writer: SentenceWriter=SentenceWriter(batch_size=100)
+    attempts: list[int]=[]
+
+    async def insert(rows):
+        attempts.append(len(rows))
+        if len(attempts) == 1:
+            raise ConnectionError("database went away")
+
+    writer._SentenceWriter__insert = insert # pylint: disable=protected-access
+
+    async def run():
+        await writer.add(sentence("0"))
+
+        try:
+            await writer.flush()
+        except ConnectionError:
+            pass
+
+        await writer.add(sentence("1"))
+        await writer.flush()
+
+    asyncio.run(run())
+
+    assert attempts == [1, 2]
+    assert writer.rows == 2
+
+def test_rows_survive_a_flush_cancelled_on_exit():
+
+    writer: SentenceWriter=SentenceWriter(batch_size=100, flush_interval=0.01)
+    written: list[list[dict]]=[]
+
+    async def insert(rows):
+        #   The first write is still in progress when the writer is closed.
+        if not written:
+            written.append([])
+            await asyncio.sleep(10)
+        written.append(rows)
+
+    writer._SentenceWriter__insert = insert # pylint: disable=protected-access
+
+    async def run():
+        async with writer:
+            await writer.add(sentence("0"))
+            await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+
+    assert [len(rows) for rows in written] == [0, 1]
+    assert writer.rows == 1
+
+def test_a_failed_flush_does_not_reach_the_sentence_that_triggered_it():
+
+    writer: SentenceWriter=SentenceWriter(batch_size=2)
+    written: list[str]=[]
+    attempts: list[int]=[]
+
+    async def insert(rows):
+        attempts.append(len(rows))
+        if len(attempts) == 1:
+            raise ConnectionError("database went away")
+        written.extend(row["content"] for row in rows)
+
+    writer._SentenceWriter__insert = insert # pylint: disable=protected-access
+
+    async def run():
+        await writer.add(sentence("a"))
+        await writer.add(sentence("b"))
+        await writer.flush()
+
+    asyncio.run(run())
+
+    assert written == ["a", "b"]
+    assert attempts == [2, 2]
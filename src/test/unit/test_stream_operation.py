@@ -0,0 +1,117 @@
+from lqconsole.utils.queues import Progress, RetryPolicy, batch_operation, stream_operation
+
+import asyncio
+import random
+
+def collect(**kwargs) -> list:
+
+    async def run():
+        return [result async for result in stream_operation(**kwargs)]
+
+    return asyncio.run(run())
+
+def test_results_carry_their_index_and_errors():
+
+    async def method(item: int):
+        await asyncio.sleep(0)
+        if item == 3:
+            raise ValueError("three")
+        return item * 2
+
+    results = collect(items=range(6), method=method, workers=2)
+
+    assert sorted(result.index for result in results) == list(range(6))
+    assert {result.index: result.value for result in results if result.ok} == {0: 0, 1: 2, 2: 4, 4: 8, 5: 10}
+    assert [str(result.error) for result in results if not result.ok] == ["three"]
+
+def test_ordered_results_follow_the_producer():
+
+    async def method(item: int):
+        await asyncio.sleep(random.random() / 1000)
+        return item
+
+    results = collect(items=range(50), method=method, workers=5, ordered=True)
+
+    assert [result.value for result in results] == list(range(50))
+
+def test_items_are_pulled_lazily_and_in_flight_work_is_bounded():
+
+    produced, running, peak = [0], [0], [0]
+
+    def items():
+        for i in range(1000):
+            produced[0] += 1
+            yield i
+
+    async def method(item: int):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0)
+        running[0] -= 1
+        return item
+
+    async def run():
+        taken = 0
+        async for _ in stream_operation(items(), method, workers=4, window=2):
+            taken += 1
+            #   Never more than workers * window ahead of the consumer.
+            assert produced[0] - taken <= 8
+        return taken
+
+    assert asyncio.run(run()) == 1000
+    assert peak[0] <= 4
+
+def test_retry_policies_are_applied_per_item():
+
+    calls: dict[int, int] = {}
+
+    async def method(item: int):
+        calls[item] = calls.get(item, 0) + 1
+        if calls[item] < 3:
+            raise ConnectionError("again")
+        return item
+
+    results = collect(items=[1, 2], method=method, workers=2,
+                      retry=lambda item: RetryPolicy(attempts=3 if item == 1 else 1))
+
+    by_index = { result.index: result for result in results }
+
+    assert by_index[0].ok and by_index[0].attempts == 3
+    assert not by_index[1].ok and by_index[1].attempts == 1
+
+def test_closing_the_stream_cancels_work_in_flight():
+
+    cancelled = [0]
+
+    async def method(item: int):
+        try:
+            await asyncio.sleep(0 if item == 0 else 10)
+        except asyncio.CancelledError:
+            cancelled[0] += 1
+            raise
+        return item
+
+    async def run():
+        stream = stream_operation(range(100), method, workers=3)
+        async for result in stream:
+            break
+        await stream.aclose()
+        return result
+
+    assert asyncio.run(run()).index == 0
+    assert cancelled[0] >= 2
+
+def test_progress_and_batch_operation():
+
+    progress: Progress=Progress(total=10, stream=None)
+
+    async def method(**kwargs):
+        return kwargs["value"]
+
+    async def run():
+        async for result in stream_operation(range(10), lambda _: method(value=1), progress=progress):
+            pass
+        return await batch_operation(workers=3, quantity=5, method=method, value=7)
+
+    assert asyncio.run(run()) == [7] * 5
+    assert progress.completed == 10 and progress.eta == 0
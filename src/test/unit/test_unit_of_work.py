@@ -0,0 +1,43 @@
+from lqconsole.database.engine import unit_of_work
+
+import asyncio
+
+#   Sessions only connect on their first query, so these run without a database.
+
+def test_nested_units_share_the_outer_session():
+
+    async def run():
+        async with unit_of_work() as outer:
+            async with unit_of_work() as inner:
+                return outer, inner
+
+    outer, inner = asyncio.run(run())
+
+    assert outer is inner
+
+def test_units_end_with_their_block():
+
+    async def run():
+        async with unit_of_work() as first:
+            pass
+        async with unit_of_work() as second:
+            return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first is not second
+
+def test_tasks_do_not_join_their_parents_unit():
+
+    async def child():
+        async with unit_of_work() as session:
+            return session
+
+    async def run():
+        async with unit_of_work() as parent:
+            return parent, await asyncio.gather(child(), child())
+
+    parent, children = asyncio.run(run())
+
+    assert parent not in children
+    assert children[0] is not children[1]
@@ -0,0 +1,52 @@
+from collections import Counter
+from types import SimpleNamespace
+
+from lqconsole.verbs.catalog import DEFAULT_FREQUENCY_FILE, AliasTable, VerbCatalog, read_verb_frequencies
+
+import asyncio
+import random
+import pytest
+
+def test_alias_table_matches_weights():
+
+    table: AliasTable=AliasTable(["a", "b", "c"], [1, 2, 7])
+    rng = random.Random(42)
+
+    counts = Counter(table.sample(rng) for _ in range(100_000))
+
+    assert counts["a"] / 100_000 == pytest.approx(0.1, abs=0.01)
+    assert counts["b"] / 100_000 == pytest.approx(0.2, abs=0.01)
+    assert counts["c"] / 100_000 == pytest.approx(0.7, abs=0.01)
+
+def test_alias_table_rejects_bad_weights():
+
+    with pytest.raises(ValueError):
+        AliasTable([], [])
+
+    with pytest.raises(ValueError):
+        AliasTable(["a"], [0])
+
+def test_read_shipped_verb_frequencies():
+
+    frequencies = read_verb_frequencies(DEFAULT_FREQUENCY_FILE)
+
+    assert len(frequencies) == 98
+    assert frequencies["faire"] == 7.87
+
+    #   'verb import' reads the same list, and would store anything in it as a verb.
+    assert all(verb.endswith(("er", "ir", "re")) and "-" not in verb for verb in frequencies)
+
+def test_a_missing_frequency_file_is_an_error(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(VerbCatalog.load(str(tmp_path / "missing.txt")))
+
+def test_catalog_gives_unlisted_verbs_the_lowest_weight():
+
+    verbs = [SimpleNamespace(infinitive="faire"), SimpleNamespace(infinitive="inconnu")]
+    catalog: VerbCatalog=VerbCatalog(verbs, { "faire": 3.0, "dire": 1.0 })
+
+    assert catalog.table.probability[1] == pytest.approx(0.5)
+    assert len(catalog) == 2
+
+def test_empty_catalog_samples_nothing():
+    assert VerbCatalog([], {}).sample() is None
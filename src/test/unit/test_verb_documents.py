@@ -0,0 +1,11 @@
+from sqlalchemy.dialects import postgresql
+
+from lqconsole.webserver.verbs.get import verb_documents_query
+
+def test_verbs_are_read_in_one_statement():
+
+    sql = str(verb_documents_query(["savoir", "aller"]).compile(dialect=postgresql.dialect()))
+
+    assert sql.count("SELECT") == 2     # The documents, and the latest row of each verb inside them.
+    assert "json_agg" in sql
+    assert "'second_person_formal', replace(conjugations.second_person_formal, '_', ' ')" in sql